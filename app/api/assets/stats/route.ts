@@ -7,7 +7,7 @@ export async function GET() {
       totalAssets,
       stocksCount,
       fiisCount,
-      lastUpdate,
+      cacheTimestamp,
       topSectors,
       recentlyUpdated
     ] = await Promise.all([
@@ -32,11 +32,11 @@ export async function GET() {
         }
       }),
       
-      // Last update timestamp
-      prisma.assetData.findFirst({
-        where: { isActive: true },
-        orderBy: { lastUpdated: 'desc' },
-        select: { lastUpdated: true }
+      // Last completed cache refresh. AssetCacheAgent only rewrites new and
+      // changed rows, so asset_data."lastUpdated" says nothing about freshness.
+      prisma.cache_metadata.findUnique({
+        where: { key: 'asset_cache_last_update' },
+        select: { updatedAt: true }
       }),
       
       // Top sectors
@@ -49,28 +49,33 @@ export async function GET() {
         LIMIT 10
       `,
       
-      // Recently updated assets
+      // Assets whose data changed in the last 24 hours: a refresh only bumps
+      // "lastUpdated" on new and changed rows
       prisma.assetData.count({
         where: {
           isActive: true,
           lastUpdated: {
-            gte: new Date(Date.now() - 24 * 60 * 60 * 1000) // Last 24 hours
+            gte: new Date(Date.now() - 24 * 60 * 60 * 1000)
           }
         }
       })
     ]);
 
+    const lastUpdate = cacheTimestamp?.updatedAt ?? null;
+    const lastUpdateAgeMs = lastUpdate ? Date.now() - new Date(lastUpdate).getTime() : null;
+    const refreshedRecently = lastUpdateAgeMs !== null && lastUpdateAgeMs < 24 * 60 * 60 * 1000;
+
     return NextResponse.json({
       totalAssets,
       stocksCount,
       fiisCount,
-      lastUpdate: lastUpdate?.lastUpdated,
+      lastUpdate,
       topSectors,
       recentlyUpdated,
       cacheHealth: {
-        isHealthy: recentlyUpdated > 0,
-        lastUpdateAge: lastUpdate?.lastUpdated 
-          ? Math.floor((Date.now() - new Date(lastUpdate.lastUpdated).getTime()) / (1000 * 60 * 60))
+        isHealthy: refreshedRecently,
+        lastUpdateAge: lastUpdateAgeMs !== null
+          ? Math.floor(lastUpdateAgeMs / (1000 * 60 * 60))
           : null
       }
     });
@@ -4,6 +4,24 @@ import { authOptions } from '@/lib/auth';
 import { prisma } from '@/lib/prisma';
 import { AssetType } from '@prisma/client';
 
+// Shape of each entry in user_recommendations.recommendations
+interface PrecomputedRecommendation {
+  recommendedAsset: string;
+  score: number;
+  basedOn: string[];
+  baseAsset: string;
+  similarityScore: number;
+  support: number;
+  confidence: number;
+  usersWithBoth: number;
+  usersWithBase: number;
+  percentageAlsoInvest: number;
+  recommendationStrength: number;
+}
+
+// Entries stored per user (WalletSimilarityAgent max_recommendations_per_user)
+const MAX_STORED_RECOMMENDATIONS = 50;
+
 export async function GET(request: NextRequest) {
   try {
     const session = await getServerSession(authOptions);
@@ -16,24 +34,19 @@ export async function GET(request: NextRequest) {
     }
 
     const { searchParams } = new URL(request.url);
-    const limit = parseInt(searchParams.get('limit') || '20');
+    // The list is precomputed, so no more than the stored entries can be returned
+    const limit = Math.min(parseInt(searchParams.get('limit') || '20'), MAX_STORED_RECOMMENDATIONS);
     const minConfidence = parseFloat(searchParams.get('minConfidence') || '0.1');
 
-    // Get user's wallet assets
-    const userWallet = await prisma.wallet.findUnique({
+    // Lists are precomputed per user by the wallet similarity agent:
+    // a single primary-key lookup, no per-request ranking
+    const userRecommendation = await prisma.userRecommendation.findUnique({
       where: {
         userId: session.user.id,
       },
-      include: {
-        assets: {
-          select: {
-            ticker: true,
-          },
-        },
-      },
     });
 
-    const userAssets = userWallet?.assets.map(asset => asset.ticker) || [];
+    const userAssets = userRecommendation?.assets || [];
 
     if (userAssets.length === 0) {
       return NextResponse.json({
@@ -47,41 +60,31 @@ export async function GET(request: NextRequest) {
       });
     }
 
-    // Get recommendations based on user's assets
-    const recommendations = await prisma.assetRecommendation.findMany({
-      where: {
-        baseAsset: {
-          in: userAssets
-        },
-        recommendedAsset: {
-          notIn: userAssets // Don't recommend assets they already have
-        },
-        confidence: {
-          gte: minConfidence
-        }
-      },
-      orderBy: {
-        recommendationStrength: 'desc'
-      },
-      take: limit
-    });
+    const recommendations = (userRecommendation?.recommendations || []) as unknown as PrecomputedRecommendation[];
 
-    // Format the response with user-friendly messages
-    const formattedRecommendations = recommendations.map(rec => ({
-      id: rec.id,
-      baseAsset: rec.baseAsset,
-      recommendedAsset: rec.recommendedAsset,
-      similarityScore: rec.similarityScore,
-      support: rec.support,
-      confidence: rec.confidence,
-      usersWithBoth: rec.usersWithBoth,
-      usersWithBase: rec.usersWithBase,
-      percentageAlsoInvest: rec.percentageAlsoInvest,
-      recommendationStrength: rec.recommendationStrength,
-      message: `${rec.percentageAlsoInvest.toFixed(1)}% dos usuários que investem em ${rec.baseAsset} também investem em ${rec.recommendedAsset}`,
-      createdAt: rec.createdAt,
-      updatedAt: rec.updatedAt
-    }));
+    // minConfidence filters the stored top entries (ranked by score, not
+    // confidence), so fewer than `limit` may come back even when weaker
+    // qualifying assets exist beyond the stored list
+    const formattedRecommendations = recommendations
+      .filter(rec => rec.confidence >= minConfidence)
+      .slice(0, limit)
+      .map(rec => ({
+        id: `${rec.baseAsset}-${rec.recommendedAsset}`,
+        baseAsset: rec.baseAsset,
+        recommendedAsset: rec.recommendedAsset,
+        similarityScore: rec.similarityScore,
+        support: rec.support,
+        confidence: rec.confidence,
+        usersWithBoth: rec.usersWithBoth,
+        usersWithBase: rec.usersWithBase,
+        percentageAlsoInvest: rec.percentageAlsoInvest,
+        recommendationStrength: rec.recommendationStrength,
+        score: rec.score,
+        basedOn: rec.basedOn,
+        message: `${rec.percentageAlsoInvest.toFixed(1)}% dos usuários que investem em ${rec.baseAsset} também investem em ${rec.recommendedAsset}`,
+        createdAt: userRecommendation!.updatedAt,
+        updatedAt: userRecommendation!.updatedAt
+      }));
 
     return NextResponse.json({
       recommendations: formattedRecommendations,
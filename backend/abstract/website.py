@@ -1,12 +1,240 @@
-class Website:
-    def __init__(self, nome_fonte: str):
-        self.nome_fonte = nome_fonte
-
-    def start(self):
-        print(f'Iniciando web scraping no site {self.nome_fonte}.')
-        noticias = self.extract()
-        from lib.db import salvar_noticias_no_postgres
-        salvar_noticias_no_postgres(noticias)
-
-    def extract(self):
-        raise NotImplementedError("Este método deve ser implementado pelas subclasses.")
\ No newline at end of file
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Container, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+import threading
+
+from bs4 import BeautifulSoup
+import requests
+
+from lib.https import HEADERS
+from lib.openai import (
+    gerar_resumo_com_ia, validar_conteudo_com_ia, capturar_tipo_por_conteudo, enriquecer_noticia_com_ia
+)
+from lib.near_duplicates import simhash, to_signed
+from lib.ticker_extractor import shared_extractor
+
+
+class Website:
+    """
+    Pipeline compartilhado de coleta e enriquecimento de notícias.
+
+    As páginas de listagem e de artigo são baixadas em paralelo por um pool
+    de threads limitado, com um limite de requisições simultâneas por host.
+    Cada subclasse fornece apenas as URLs de listagem, os seletores e o parsing.
+    """
+
+    BASE_URL = ""
+
+    # Limites do pipeline de coleta
+    max_workers = 8
+    max_requisicoes_por_host = 4
+    timeout = 30
+
+    def __init__(self, nome_fonte: str):
+        self.nome_fonte = nome_fonte
+        self.ticker_extractor = shared_extractor
+        self._semaforos_host: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock_semaforos = threading.Lock()
+        self._sessoes = threading.local()
+
+        # Índice de URLs já salvas, consultado antes de baixar cada artigo
+        self.urls_vistas: Optional[Container[str]] = None
+
+        # "combined": uma única chamada à IA por artigo; "separate": três chamadas
+        self.modo_ia = "combined"
+
+        # Índice LSH de SimHash das notícias recentes, consultado antes da IA.
+        # "skip" descarta a quase-duplicata; "mark" a salva apontando a original.
+        self.indice_duplicatas = None
+        self.modo_duplicatas = "skip"
+        self.urls_duplicadas: List[str] = []
+        self.metricas = self._novas_metricas()
+
+    def start(self):
+        print(f'Iniciando web scraping no site {self.nome_fonte}.')
+        noticias = self.extract()
+        from lib.db import salvar_noticias_no_postgres
+        salvar_noticias_no_postgres(noticias)
+
+    def extract(self) -> List[Dict[str, Any]]:
+        noticias = []
+        self.metricas = self._novas_metricas()
+        self.urls_duplicadas = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            listagens = pool.map(self._coletar_listagem, self.listing_urls())
+            artigos = self._filtrar_novos([artigo for itens in listagens for artigo in itens])
+
+            futuros = [pool.submit(self._processar_artigo, artigo) for artigo in artigos]
+            for futuro in as_completed(futuros):
+                noticia = futuro.result()
+                if noticia:
+                    noticias.append(noticia)
+
+        self.metricas["articles_extracted"] = len(noticias)
+        self.metricas["duplicates_skipped"] = len(self.urls_duplicadas)
+        self.metricas["duplicates_marked"] = sum(1 for noticia in noticias if noticia.get("duplicateOf"))
+        self.metricas["errors"] = len(artigos) - len(noticias) - len(self.urls_duplicadas)
+        return noticias
+
+    # --- Pontos de extensão das subclasses ---
+
+    def listing_urls(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Retorna as páginas de listagem como pares (url, categoria).
+        A categoria é None quando deve ser inferida a partir do conteúdo.
+        """
+        raise NotImplementedError("Este método deve ser implementado pelas subclasses.")
+
+    def parse_listing(self, soup: BeautifulSoup, categoria: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Extrai os artigos de uma página de listagem. Cada item deve conter ao
+        menos "link" e "category"; outros campos são repassados ao parse_article.
+        """
+        raise NotImplementedError("Este método deve ser implementado pelas subclasses.")
+
+    def parse_article(self, soup: BeautifulSoup, artigo: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extrai "title", "body", "publishedAt" (datetime) e "imageUrl" da página do artigo.
+        """
+        raise NotImplementedError("Este método deve ser implementado pelas subclasses.")
+
+    # --- Pipeline ---
+
+    def _novas_metricas(self) -> Dict[str, int]:
+        return {
+            "links_found": 0,
+            "links_skipped": 0,
+            "articles_extracted": 0,
+            "duplicates_skipped": 0,
+            "duplicates_marked": 0,
+            "errors": 0
+        }
+
+    def _filtrar_novos(self, artigos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Descarta links repetidos na listagem e os que já estão no banco,
+        antes de qualquer download de artigo ou chamada à IA.
+        """
+        novos = []
+        links = set()
+        for artigo in artigos:
+            link = artigo["link"]
+            if link in links:
+                continue
+            links.add(link)
+
+            if self.urls_vistas is not None and link in self.urls_vistas:
+                self.metricas["links_skipped"] += 1
+                continue
+            novos.append(artigo)
+
+        self.metricas["links_found"] = len(links)
+        return novos
+
+    def _coletar_listagem(self, entrada: Tuple[str, Optional[str]]) -> List[Dict[str, Any]]:
+        url, categoria = entrada
+        try:
+            soup = self._baixar_html(url)
+            artigos = self.parse_listing(soup, categoria)
+            for artigo in artigos:
+                artigo["link"] = self._url_absoluta(artigo["link"])
+            return artigos
+        except Exception as e:
+            print(f"[ERRO] Listagem {url}: {e}")
+            return []
+
+    def _processar_artigo(self, artigo: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        link = artigo["link"]
+        indexada = False
+        try:
+            soup_content = self._baixar_html(link)
+            dados = self.parse_article(soup_content, artigo)
+
+            impressao = simhash(dados["body"])
+            original = None
+            if impressao is not None and self.indice_duplicatas is not None:
+                encontrada = self.indice_duplicatas.match_or_add(link, impressao)
+                indexada = encontrada is None
+                if encontrada:
+                    original, distancia = encontrada
+                    print(f"Quase-duplicata de {original} (distância {distancia}): {link}")
+                    if self.modo_duplicatas == "skip":
+                        self.urls_duplicadas.append(link)
+                        return None
+
+            noticia = self._enriquecer(artigo, dados)
+            if impressao is not None:
+                noticia["fingerprint"] = to_signed(impressao)
+                noticia["duplicateOf"] = original
+            print(f"Adicionado: {noticia['title']} | Tickers: {noticia['tickers']}")
+            return noticia
+        except Exception as e:
+            print(f"[ERRO] {e}")
+            if indexada:
+                # Não deixa um artigo perdido esconder as cópias de outras fontes
+                self.indice_duplicatas.remove(link)
+            return None
+
+    def _enriquecer(self, artigo: Dict[str, Any], dados: Dict[str, Any]) -> Dict[str, Any]:
+        titulo = dados["title"]
+        tipo_categoria = artigo.get("category")
+        tickers_candidatos = []
+
+        if self.modo_ia == "combined":
+            enriquecido = enriquecer_noticia_com_ia(titulo, dados["body"])
+            conteudo_limpo = enriquecido["content"]
+            resumo = enriquecido["summary"]
+            tipo_categoria = tipo_categoria or enriquecido["category"]
+            tickers_candidatos = enriquecido["tickers"]
+        else:
+            conteudo_limpo = validar_conteudo_com_ia(titulo, dados["body"])
+            resumo = gerar_resumo_com_ia(conteudo_limpo)
+            if not tipo_categoria:
+                tipo_categoria = capturar_tipo_por_conteudo(conteudo_limpo)
+
+        # Extract tickers from title and content; LLM candidates go through the same validation
+        all_tickers = self.ticker_extractor.extract_document(
+            titulo, conteudo_limpo, " ".join(tickers_candidatos)
+        )
+
+        return {
+            "title": titulo,
+            "summary": resumo,
+            "content": conteudo_limpo,
+            "imageUrl": dados.get("imageUrl"),
+            "source": self.nome_fonte,
+            "sourceUrl": artigo["link"],
+            "publishedAt": dados["publishedAt"].isoformat(),
+            "category": tipo_categoria.upper().replace(' ', ''),
+            "tags": [],
+            "tickers": all_tickers
+        }
+
+    # --- HTTP ---
+
+    def _baixar_html(self, url: str) -> BeautifulSoup:
+        with self._semaforo_host(url):
+            res = self._sessao().get(url, headers=HEADERS, timeout=self.timeout)
+        res.raise_for_status()
+        return BeautifulSoup(res.text, 'html.parser')
+
+    def _sessao(self) -> requests.Session:
+        # requests.Session não é thread-safe: uma sessão (keep-alive) por thread
+        sessao = getattr(self._sessoes, "sessao", None)
+        if sessao is None:
+            sessao = requests.Session()
+            self._sessoes.sessao = sessao
+        return sessao
+
+    def _semaforo_host(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock_semaforos:
+            if host not in self._semaforos_host:
+                self._semaforos_host[host] = threading.BoundedSemaphore(self.max_requisicoes_por_host)
+            return self._semaforos_host[host]
+
+    def _url_absoluta(self, link: str) -> str:
+        if link.startswith("http"):
+            return link
+        return urljoin(self.BASE_URL, link)
@@ -1,6 +1,8 @@
 from typing import Dict, List, Any, Optional, Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import heapq
+import itertools
 import threading
-import time
 from datetime import datetime, timedelta
 from agents.base_agent import BaseAgent
 from agents.news_scraper_agent import NewsScraperAgent
@@ -8,19 +10,52 @@ from agents.wallet_similarity_agent import WalletSimilarityAgent
 import logging
 
 from agents.asset_cache_agent import AssetCacheAgent
+from agents.quote_refresh_agent import QuoteRefreshAgent
+from agents.ticker_backfill_agent import TickerBackfillAgent
+from lib.db_pool import DatabasePool, set_default_pool
+from lib.clock import SystemClock
+from lib.cron import CronExpression
 
 class AgentManager:
     """
     Manages all agents in the system, handles scheduling and execution
     """
     
-    def __init__(self):
+    # What to do when an agent becomes due while a previous run is still going
+    OVERLAP_POLICIES = ("skip", "queue")
+    
+    # fixed_rate: runs are spaced from their scheduled times (no drift);
+    # fixed_delay: the next run is counted from the end of the previous one
+    SCHEDULE_MODES = ("fixed_rate", "fixed_delay")
+    
+    def __init__(self, db_pool: Optional[DatabasePool] = None, max_workers: int = 4,
+                 clock: Optional[SystemClock] = None):
         self.agents: Dict[str, BaseAgent] = {}
         self.schedules: Dict[str, Dict[str, Any]] = {}
         self.running = False
         self.scheduler_thread = None
         self.logger = self._setup_logger()
         
+        # Timer heap of (next_run, seq, agent_name, version); entries whose
+        # version no longer matches the schedule are stale and dropped
+        self.clock = clock or SystemClock()
+        self._timers: List[Any] = []
+        self._timer_seq = itertools.count()
+        self._schedule_cond = threading.Condition()
+        
+        # Scheduled runs are dispatched onto a bounded executor so a slow
+        # agent does not delay the others
+        self.max_workers = max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._dispatch_lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._pending: Dict[str, bool] = {}
+        
+        # One connection pool for every agent (and lib/db), so agents can
+        # run in parallel without exhausting Postgres connections
+        self.db_pool = db_pool or DatabasePool.from_env()
+        set_default_pool(self.db_pool)
+        
         # Register default agents
         self._register_default_agents()
     
@@ -46,20 +81,32 @@ class AgentManager:
         self.register_agent(news_agent)
         self.schedule_agent("NewsScraperAgent", interval_hours=1)
         
-        # Wallet Similarity Agent - runs every 6 hours
+        # Wallet Similarity Agent - incremental update every 5 minutes,
+        # full rebuild every 6 hours (see full_rebuild_hours)
         similarity_agent = WalletSimilarityAgent()
         self.register_agent(similarity_agent)
-        self.schedule_agent("WalletSimilarityAgent", interval_hours=6)
+        self.schedule_agent("WalletSimilarityAgent", cron="*/5 * * * *")
         
         # Brapi Cache Agent - runs every hour
         asset_cache_agent = AssetCacheAgent()
         self.register_agent(asset_cache_agent)
         self.schedule_agent("AssetCacheAgent", interval_hours=1)
+        
+        # Quote Refresh Agent - prices of held/favourited tickers every 5 minutes
+        quote_refresh_agent = QuoteRefreshAgent()
+        self.register_agent(quote_refresh_agent)
+        self.schedule_agent("QuoteRefreshAgent", cron="*/5 * * * *")
+        
+        # Ticker Backfill Agent - nightly; a no-op until the extraction rules change
+        ticker_backfill_agent = TickerBackfillAgent()
+        self.register_agent(ticker_backfill_agent)
+        self.schedule_agent("TickerBackfillAgent", cron="30 3 * * *")
 
     def register_agent(self, agent: BaseAgent):
         """
         Register a new agent with the manager
         """
+        agent.set_db_pool(self.db_pool)
         self.agents[agent.name] = agent
         self.logger.info(f"Registered agent: {agent.name}")
     
@@ -69,32 +116,65 @@ class AgentManager:
         """
         if agent_name in self.agents:
             del self.agents[agent_name]
-            if agent_name in self.schedules:
-                del self.schedules[agent_name]
+            with self._schedule_cond:
+                self.schedules.pop(agent_name, None)
+                self._schedule_cond.notify()
             self.logger.info(f"Unregistered agent: {agent_name}")
         else:
             self.logger.warning(f"Agent not found: {agent_name}")
     
     def schedule_agent(self, agent_name: str, interval_hours: float = 1, 
-                      start_delay_minutes: int = 0, max_executions: Optional[int] = None):
+                      start_delay_minutes: int = 0, max_executions: Optional[int] = None,
+                      overlap_policy: str = "skip", cron: Optional[str] = None,
+                      mode: str = "fixed_rate"):
         """
-        Schedule an agent to run at regular intervals
+        Schedule an agent to run at regular intervals, or on a cron expression
+        when `cron` is given (e.g. "*/5 * * * *").
+        
+        overlap_policy decides what happens when the agent is due while still
+        running: "skip" drops that run, "queue" runs it once more as soon as the
+        current run finishes (several missed runs are coalesced into one).
+        
+        mode is "fixed_rate" (runs keep to their scheduled times) or
+        "fixed_delay" (each run starts interval_hours after the previous one ends).
         """
         if agent_name not in self.agents:
             raise ValueError(f"Agent {agent_name} not registered")
         
-        next_run = datetime.now() + timedelta(minutes=start_delay_minutes)
+        if overlap_policy not in self.OVERLAP_POLICIES:
+            raise ValueError(f"Unknown overlap policy: {overlap_policy}")
         
-        self.schedules[agent_name] = {
-            "interval_hours": interval_hours,
-            "next_run": next_run,
-            "max_executions": max_executions,
-            "execution_count": 0,
-            "enabled": True
-        }
+        if mode not in self.SCHEDULE_MODES:
+            raise ValueError(f"Unknown schedule mode: {mode}")
+        
+        cron_expression = CronExpression(cron) if cron else None
+        start_at = self.clock.now() + timedelta(minutes=start_delay_minutes)
+        if cron_expression:
+            next_run = cron_expression.next_after(start_at - timedelta(minutes=1))
+        else:
+            next_run = start_at
+        
+        with self._schedule_cond:
+            previous = self.schedules.get(agent_name)
+            self.schedules[agent_name] = {
+                "interval_hours": interval_hours,
+                "cron": cron_expression,
+                "mode": mode,
+                "next_run": next_run,
+                "max_executions": max_executions,
+                "execution_count": 0,
+                "overlap_policy": overlap_policy,
+                "enabled": True,
+                "version": previous["version"] + 1 if previous else 0
+            }
+            self._push_timer(agent_name)
         
+        if cron_expression:
+            description = f"on cron '{cron}'"
+        else:
+            description = f"every {interval_hours} hours ({mode})"
         self.logger.info(
-            f"Scheduled agent {agent_name} to run every {interval_hours} hours, "
+            f"Scheduled agent {agent_name} to run {description}, "
             f"starting at {next_run.strftime('%Y-%m-%d %H:%M:%S')}"
         )
     
@@ -102,21 +182,59 @@ class AgentManager:
         """
         Remove an agent from the schedule
         """
-        if agent_name in self.schedules:
-            del self.schedules[agent_name]
-            self.logger.info(f"Unscheduled agent: {agent_name}")
+        with self._schedule_cond:
+            if agent_name in self.schedules:
+                del self.schedules[agent_name]
+                self._schedule_cond.notify()
+                self.logger.info(f"Unscheduled agent: {agent_name}")
     
     def enable_agent_schedule(self, agent_name: str):
         """Enable scheduled execution for an agent"""
-        if agent_name in self.schedules:
-            self.schedules[agent_name]["enabled"] = True
-            self.logger.info(f"Enabled schedule for agent: {agent_name}")
+        with self._schedule_cond:
+            if agent_name in self.schedules:
+                self.schedules[agent_name]["enabled"] = True
+                if self.schedules[agent_name]["next_run"] is not None:
+                    self._push_timer(agent_name)
+                self.logger.info(f"Enabled schedule for agent: {agent_name}")
     
     def disable_agent_schedule(self, agent_name: str):
         """Disable scheduled execution for an agent"""
-        if agent_name in self.schedules:
-            self.schedules[agent_name]["enabled"] = False
-            self.logger.info(f"Disabled schedule for agent: {agent_name}")
+        with self._schedule_cond:
+            if agent_name in self.schedules:
+                self.schedules[agent_name]["enabled"] = False
+                self.schedules[agent_name]["version"] += 1
+                self._schedule_cond.notify()
+                self.logger.info(f"Disabled schedule for agent: {agent_name}")
+    
+    def _push_timer(self, agent_name: str):
+        """
+        Queue the agent's next_run on the timer heap and wake the scheduler.
+        Must be called with _schedule_cond held.
+        """
+        schedule_info = self.schedules[agent_name]
+        schedule_info["version"] += 1
+        heapq.heappush(self._timers, (
+            schedule_info["next_run"],
+            next(self._timer_seq),
+            agent_name,
+            schedule_info["version"]
+        ))
+        self._schedule_cond.notify()
+    
+    def _compute_next_run(self, schedule_info: Dict[str, Any], now: datetime) -> datetime:
+        """
+        Next fire time for a fixed-rate or cron schedule that has just become due
+        """
+        if schedule_info["cron"]:
+            return schedule_info["cron"].next_after(now)
+        
+        # Keep to the original grid; missed runs are coalesced into one
+        interval = timedelta(hours=schedule_info["interval_hours"])
+        next_run = schedule_info["next_run"] + interval
+        if next_run <= now:
+            missed = (now - next_run) // interval + 1
+            next_run += interval * missed
+        return next_run
     
     def execute_agent(self, agent_name: str) -> Dict[str, Any]:
         """
@@ -137,6 +255,67 @@ class AgentManager:
             results[agent_name] = self.execute_agent(agent_name)
         return results
     
+    def dispatch_agent(self, agent_name: str) -> Optional[Future]:
+        """
+        Run an agent on the executor, honouring its concurrency limit and
+        overlap policy. Returns None when the run was skipped or queued.
+        """
+        if agent_name not in self.agents:
+            raise ValueError(f"Agent {agent_name} not registered")
+        
+        agent = self.agents[agent_name]
+        policy = self.schedules.get(agent_name, {}).get("overlap_policy", "skip")
+        
+        with self._dispatch_lock:
+            if self.executor is None:
+                raise RuntimeError("Scheduler is not running")
+            
+            if self._in_flight.get(agent_name, 0) >= agent.max_concurrent_runs:
+                if policy == "queue":
+                    self._pending[agent_name] = True
+                    self.logger.info(f"Agent {agent_name} is still running, queued one more run")
+                else:
+                    self.logger.info(f"Agent {agent_name} is still running, skipping this run")
+                return None
+            
+            self._in_flight[agent_name] = self._in_flight.get(agent_name, 0) + 1
+            return self.executor.submit(self._run_dispatched, agent_name)
+    
+    def _run_dispatched(self, agent_name: str) -> Dict[str, Any]:
+        """
+        Executor task: run the agent, then start a queued run if there is one
+        """
+        try:
+            result = self.execute_agent(agent_name)
+            self.logger.info(f"Agent {agent_name} execution completed with status {result.get('status')}")
+            return result
+        finally:
+            with self._dispatch_lock:
+                self._in_flight[agent_name] -= 1
+                run_again = self._pending.pop(agent_name, False)
+            
+            if run_again and self.running:
+                self.logger.info(f"Starting queued run of agent {agent_name}")
+                try:
+                    self.dispatch_agent(agent_name)
+                except RuntimeError as e:
+                    self.logger.warning(f"Could not start queued run of agent {agent_name}: {str(e)}")
+            else:
+                self._schedule_after_run(agent_name)
+    
+    def _schedule_after_run(self, agent_name: str):
+        """Fixed-delay schedules start counting once the run has finished"""
+        with self._schedule_cond:
+            schedule_info = self.schedules.get(agent_name)
+            if not schedule_info or schedule_info["mode"] != "fixed_delay" or schedule_info["cron"]:
+                return
+            if schedule_info["next_run"] is not None:
+                return  # already waiting for its next run
+            
+            schedule_info["next_run"] = self.clock.now() + timedelta(hours=schedule_info["interval_hours"])
+            if schedule_info["enabled"]:
+                self._push_timer(agent_name)
+    
     def start_scheduler(self):
         """
         Start the agent scheduler in a separate thread
@@ -145,6 +324,14 @@ class AgentManager:
             self.logger.warning("Scheduler is already running")
             return
         
+        try:
+            self.db_pool.warm_up()
+        except Exception as e:
+            self.logger.warning(f"Could not pre-open database connections: {str(e)}")
+        
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="agent"
+        )
         self.running = True
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
@@ -154,51 +341,98 @@ class AgentManager:
         """
         Stop the agent scheduler
         """
-        self.running = False
+        with self._schedule_cond:
+            self.running = False
+            self._schedule_cond.notify_all()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
+        with self._dispatch_lock:
+            executor, self.executor = self.executor, None
+            self._pending.clear()
+        if executor:
+            # Running agents finish in the background; queued ones are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.db_pool.closeall()
         self.logger.info("Agent scheduler stopped")
     
     def _scheduler_loop(self):
         """
-        Main scheduler loop that runs in a separate thread
+        Main scheduler loop that runs in a separate thread.
+        Sleeps until the earliest timer is due, or until a schedule changes.
         """
         while self.running:
             try:
-                current_time = datetime.now()
+                due_agents = self._wait_for_due_agents()
                 
-                for agent_name, schedule_info in self.schedules.items():
-                    if not schedule_info["enabled"]:
-                        continue
+                for agent_name in due_agents:
+                    # Dispatch agent without blocking the scheduler thread
+                    self.logger.info(f"Dispatching scheduled agent: {agent_name}")
+                    future = self.dispatch_agent(agent_name)
                     
-                    if current_time >= schedule_info["next_run"]:
-                        # Check max executions limit
-                        if (schedule_info["max_executions"] is not None and 
-                            schedule_info["execution_count"] >= schedule_info["max_executions"]):
-                            self.logger.info(f"Agent {agent_name} reached max executions limit")
+                    with self._schedule_cond:
+                        schedule_info = self.schedules.get(agent_name)
+                        if not schedule_info:
                             continue
+                        if future is not None:
+                            schedule_info["execution_count"] += 1
+                        elif schedule_info["next_run"] is None and agent_name not in self._pending:
+                            # Skipped fixed-delay run: count the delay from now
+                            schedule_info["next_run"] = self.clock.now() + timedelta(
+                                hours=schedule_info["interval_hours"]
+                            )
+                            self._push_timer(agent_name)
                         
-                        # Execute agent
-                        self.logger.info(f"Executing scheduled agent: {agent_name}")
-                        result = self.execute_agent(agent_name)
-                        
-                        # Update schedule
-                        schedule_info["execution_count"] += 1
-                        schedule_info["next_run"] = current_time + timedelta(
-                            hours=schedule_info["interval_hours"]
-                        )
-                        
+                        next_run = schedule_info["next_run"]
                         self.logger.info(
-                            f"Agent {agent_name} execution completed. "
-                            f"Next run: {schedule_info['next_run'].strftime('%Y-%m-%d %H:%M:%S')}"
+                            f"Agent {agent_name} dispatched. Next run: "
+                            f"{next_run.strftime('%Y-%m-%d %H:%M:%S') if next_run else 'after this run finishes'}"
                         )
                 
-                # Sleep for 1 minute before checking again
-                time.sleep(60)
-                
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {str(e)}")
-                time.sleep(60)  # Wait before retrying
+                with self._schedule_cond:
+                    self.clock.wait(self._schedule_cond, 60)  # Wait before retrying
+    
+    def _wait_for_due_agents(self) -> List[str]:
+        """
+        Block until at least one agent is due (or the scheduler stops) and
+        return the due agents, re-arming their timers
+        """
+        with self._schedule_cond:
+            while self.running:
+                now = self.clock.now()
+                due_agents = []
+                
+                while self._timers and self._timers[0][0] <= now:
+                    _, _, agent_name, version = heapq.heappop(self._timers)
+                    schedule_info = self.schedules.get(agent_name)
+                    if not schedule_info or schedule_info["version"] != version:
+                        continue  # stale timer
+                    if not schedule_info["enabled"]:
+                        continue
+                    
+                    # Check max executions limit
+                    if (schedule_info["max_executions"] is not None and 
+                        schedule_info["execution_count"] >= schedule_info["max_executions"]):
+                        self.logger.info(f"Agent {agent_name} reached max executions limit")
+                        continue
+                    
+                    due_agents.append(agent_name)
+                    if schedule_info["mode"] == "fixed_delay" and not schedule_info["cron"]:
+                        schedule_info["next_run"] = None
+                    else:
+                        schedule_info["next_run"] = self._compute_next_run(schedule_info, now)
+                        self._push_timer(agent_name)
+                
+                if due_agents:
+                    return due_agents
+                
+                timeout = None
+                if self._timers:
+                    timeout = max((self._timers[0][0] - now).total_seconds(), 0)
+                self.clock.wait(self._schedule_cond, timeout)
+        
+        return []
     
     def get_agent_status(self, agent_name: str) -> Dict[str, Any]:
         """
@@ -216,9 +450,14 @@ class AgentManager:
             status["schedule"] = {
                 "enabled": schedule_info["enabled"],
                 "interval_hours": schedule_info["interval_hours"],
-                "next_run": schedule_info["next_run"].isoformat(),
+                "cron": str(schedule_info["cron"]) if schedule_info["cron"] else None,
+                "mode": schedule_info["mode"],
+                "next_run": schedule_info["next_run"].isoformat() if schedule_info["next_run"] else None,
                 "execution_count": schedule_info["execution_count"],
-                "max_executions": schedule_info["max_executions"]
+                "max_executions": schedule_info["max_executions"],
+                "overlap_policy": schedule_info["overlap_policy"],
+                "in_flight": self._in_flight.get(agent_name, 0),
+                "queued": self._pending.get(agent_name, False)
             }
         
         return status
@@ -240,5 +479,7 @@ class AgentManager:
             "scheduler_running": self.running,
             "total_agents": len(self.agents),
             "scheduled_agents": len(self.schedules),
+            "max_workers": self.max_workers,
+            "db_pool": self.db_pool.stats(),
             "agents": self.get_all_agents_status()
         }
\ No newline at end of file
@@ -1,11 +1,12 @@
-from typing import Dict, Any, List
-import uuid
-import requests
-import psycopg2
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from decimal import Decimal
+import hashlib
+from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from agents.base_agent import BaseAgent
+from lib.brapi import BRAPI_BASE_URL, BrapiClient, BrapiError
+from lib.bulk_load import copy_rows
 
 load_dotenv()
 
@@ -17,17 +18,39 @@ class AssetCacheAgent(BaseAgent):
     def __init__(self, config: Dict[str, Any] = None):
         default_config = {
             "brapi_token": os.getenv("BRAPI_TOKEN", "8rDscDtqiTXKAGB1kfbn42"),
+            "brapi_base_url": os.getenv("BRAPI_BASE_URL", BRAPI_BASE_URL),
+            "request_timeout": 60,
             "batch_size": 100,
             "asset_types": ["stock", "fund"],  # stock = STOCK, fund = FII
             "max_retries": 3,
-            "retry_delay": 5
+            "retry_delay": 5,
+            # Content hashes are kept in memory between runs and reloaded from
+            # the database after this long, in case rows were changed elsewhere
+            "content_hash_max_age_hours": 24
         }
         
         if config:
             default_config.update(config)
             
         super().__init__("AssetCacheAgent", default_config)
-        self.db_url = os.getenv("DATABASE_URL_BACK")
+        
+        self.brapi = BrapiClient(
+            self.config["brapi_token"],
+            base_url=self.config["brapi_base_url"],
+            timeout=self.config["request_timeout"],
+            max_retries=self.config["max_retries"],
+            retry_delay=self.config["retry_delay"],
+            logger=self.logger
+        )
+        
+        # ticker -> (content hash, type, isActive) of what asset_data holds
+        self._asset_hashes: Dict[str, Tuple[Optional[bytes], str, bool]] = {}
+        self._asset_hashes_loaded_at: Optional[datetime] = None
+    
+    STAGING_COLUMNS = (
+        "ticker", "name", "type", "sector", "logoUrl", "currentPrice", "change", "volume", "marketCap"
+    )
+    CHANGE_CATEGORIES = ("inserted", "changed", "unchanged", "deactivated")
     
     def _execute(self) -> Dict[str, Any]:
         """
@@ -39,35 +62,57 @@ class AssetCacheAgent(BaseAgent):
             total_assets = 0
             results = {}
             
-            for asset_type in self.config["asset_types"]:
-                self.logger.info(f"📊 Fetching {asset_type} data from Brapi...")
+            asset_types = self.config["asset_types"]
+            self.logger.info(f"📊 Fetching {', '.join(asset_types)} data from Brapi...")
+            fetched = self.brapi.list_assets_by_type(asset_types)
+            
+            for asset_type in asset_types:
+                assets = fetched[asset_type]
                 
-                assets = self._fetch_assets_from_brapi(asset_type)
+                if isinstance(assets, BrapiError):
+                    # Don't save or deactivate anything for a type we couldn't fetch
+                    self.logger.error(f"❌ Failed to fetch {asset_type} from Brapi: {str(assets)}")
+                    results[asset_type] = {
+                        "fetched": 0,
+                        **self._empty_counts(),
+                        "status": "error",
+                        "error": str(assets)
+                    }
+                    continue
+                
+                self.logger.info(f"📦 Received {len(assets)} {asset_type} assets from Brapi")
                 
                 if assets:
-                    saved_count = self._save_assets_to_database(assets, asset_type)
+                    counts = self._save_assets_to_database(assets, asset_type)
                     
                     results[asset_type] = {
                         "fetched": len(assets),
-                        "saved": saved_count,
+                        **counts,
                         "status": "success"
                     }
-                    total_assets += saved_count
+                    total_assets += counts["saved"]
                     
-                    self.logger.info(f"✅ Successfully cached {saved_count} {asset_type} assets")
+                    self.logger.info(f"✅ Successfully cached {counts['saved']} {asset_type} assets")
                 else:
                     results[asset_type] = {
                         "fetched": 0,
-                        "saved": 0,
+                        **self._empty_counts(),
                         "status": "no_data"
                     }
                     self.logger.warning(f"⚠️ No {asset_type} data retrieved from Brapi")
             
+            if all(result["status"] == "error" for result in results.values()):
+                raise BrapiError("Every asset type failed to fetch from Brapi")
+            
             # Update cache timestamp
             self._update_cache_timestamp()
             
             return {
                 "total_assets_cached": total_assets,
+                **{
+                    f"total_{category}": sum(result[category] for result in results.values())
+                    for category in self.CHANGE_CATEGORIES
+                },
                 "asset_types_results": results,
                 "cache_updated_at": datetime.now().isoformat(),
                 "success": True
@@ -77,202 +122,241 @@ class AssetCacheAgent(BaseAgent):
             self.logger.error(f"❌ Error in asset cache update: {str(e)}")
             raise
     
-    def _fetch_assets_from_brapi(self, asset_type: str) -> List[Dict[str, Any]]:
-        """
-        Fetch assets from Brapi API
-        """
-        try:
-            url = f"https://brapi.dev/api/quote/list?type={asset_type}"
-            
-            headers = {
-                'Authorization': f'Bearer {self.config["brapi_token"]}',
-                'Content-Type': 'application/json',
-            }
-            
-            self.logger.info(f"🌐 Making request to Brapi: {url}")
-            response = requests.get(url, headers=headers, timeout=60)
-            
-            if not response.ok:
-                self.logger.error(f"❌ Brapi API error: {response.status_code} - {response.text}")
-                return []
-            
-            data = response.json()
-            assets = data.get('stocks', [])
-            
-            self.logger.info(f"📦 Received {len(assets)} {asset_type} assets from Brapi")
-            
-            # Log some examples
-            if assets:
-                examples = assets[:3]
-                for i, asset in enumerate(examples):
-                    self.logger.debug(f"  Example {i+1}: {asset.get('stock', 'N/A')} - {asset.get('name', 'N/A')}")
-                
-                # Log total count for verification
-                self.logger.info(f"🎯 Successfully fetched ALL {len(assets)} {asset_type} assets from Brapi")
-            
-            return assets
-            
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"❌ Network error fetching {asset_type} from Brapi: {str(e)}")
-            return []
-        except Exception as e:
-            self.logger.error(f"❌ Unexpected error fetching {asset_type} from Brapi: {str(e)}")
-            return []
-    
-    def _save_assets_to_database(self, assets: List[Dict[str, Any]], asset_type: str) -> int:
+    def _save_assets_to_database(self, assets: List[Dict[str, Any]], asset_type: str) -> Dict[str, int]:
         """
-        Save assets to local database
+        Save assets to local database, writing only new, changed and deactivated rows
+        
+        Returns:
+            Counts of the listing: "saved" (valid assets received) and the
+            CHANGE_CATEGORIES ("inserted", "changed", "unchanged", "deactivated")
         """
         if not assets:
-            return 0
+            return self._empty_counts()
         
         self.logger.info(f"💾 Saving {len(assets)} {asset_type} assets to database...")
         
-        conn = psycopg2.connect(self.db_url)
-        cur = conn.cursor()
-        
-        try:
-            # Create table if not exists
-            self.logger.debug("🏗️ Ensuring asset_data table exists...")
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS asset_data (
-                    id TEXT PRIMARY KEY DEFAULT gen_random_uuid(),
-                    ticker VARCHAR(10) UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    type VARCHAR(10) NOT NULL,
-                    sector TEXT,
-                    "logoUrl" TEXT,
-                    "currentPrice" DECIMAL(10,2),
-                    change DECIMAL(5,2),
-                    volume BIGINT,
-                    "marketCap" BIGINT,
-                    "isActive" BOOLEAN DEFAULT true,
-                    "lastUpdated" TIMESTAMP DEFAULT NOW(),
-                    "createdAt" TIMESTAMP DEFAULT NOW(),
-                    "updatedAt" TIMESTAMP DEFAULT NOW()
-                );
-                
-                CREATE INDEX IF NOT EXISTS idx_asset_data_type ON asset_data(type);
-                CREATE INDEX IF NOT EXISTS idx_asset_data_ticker ON asset_data(ticker);
-                CREATE INDEX IF NOT EXISTS idx_asset_data_name ON asset_data(name);
-            """)
-            
-            # Map asset_type to our enum
-            db_asset_type = "STOCK" if asset_type == "stock" else "FII"
-            
-            # Prepare batch insert
-            insert_query = """
-                INSERT INTO asset_data (
-                    id, ticker, name, type, sector, "logoUrl", "currentPrice", 
-                    change, volume, "marketCap", "isActive", "lastUpdated", "updatedAt"
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (ticker) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    sector = EXCLUDED.sector,
-                    "logoUrl" = EXCLUDED."logoUrl",
-                    "currentPrice" = EXCLUDED."currentPrice",
-                    change = EXCLUDED.change,
-                    volume = EXCLUDED.volume,
-                    "marketCap" = EXCLUDED."marketCap",
-                    "isActive" = EXCLUDED."isActive",
-                    "lastUpdated" = EXCLUDED."lastUpdated",
-                    "updatedAt" = EXCLUDED."updatedAt"
-            """
+        with self._db_connection() as conn:
+            cur = conn.cursor()
             
-            current_time = datetime.now()
-            saved_count = 0
-            batch_size = self.config["batch_size"]
-            
-            for i in range(0, len(assets), batch_size):
-                batch = assets[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (len(assets) + batch_size - 1) // batch_size
+            try:
+                # Create table if not exists
+                self.logger.debug("🏗️ Ensuring asset_data table exists...")
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS asset_data (
+                        id TEXT PRIMARY KEY DEFAULT gen_random_uuid(),
+                        ticker VARCHAR(10) UNIQUE NOT NULL,
+                        name TEXT NOT NULL,
+                        type VARCHAR(10) NOT NULL,
+                        sector TEXT,
+                        "logoUrl" TEXT,
+                        "currentPrice" DECIMAL(10,2),
+                        change DECIMAL(5,2),
+                        volume BIGINT,
+                        "marketCap" BIGINT,
+                        "isActive" BOOLEAN DEFAULT true,
+                        "lastUpdated" TIMESTAMP DEFAULT NOW(),
+                        "createdAt" TIMESTAMP DEFAULT NOW(),
+                        "updatedAt" TIMESTAMP DEFAULT NOW()
+                    );
+                    
+                    CREATE INDEX IF NOT EXISTS idx_asset_data_type ON asset_data(type);
+                    CREATE INDEX IF NOT EXISTS idx_asset_data_ticker ON asset_data(ticker);
+                    CREATE INDEX IF NOT EXISTS idx_asset_data_name ON asset_data(name);
+                """)
                 
-                self.logger.debug(f"💾 Saving batch {batch_num}/{total_batches} ({len(batch)} assets)...")
+                # Map asset_type to our enum
+                db_asset_type = "STOCK" if asset_type == "stock" else "FII"
                 
-                batch_data = []
-                for asset in batch:
-                    try:
-                        batch_data.append((
-                            str(uuid.uuid4()),               # id
-                            asset.get('stock', '').upper(),  # ticker
-                            asset.get('name', ''),           # name
-                            db_asset_type,                   # type
-                            asset.get('sector'),             # sector
-                            asset.get('logo'),               # logoUrl
-                            float(asset['close']) if asset.get('close') else None,  # currentPrice
-                            float(asset['change']) if asset.get('change') else None,  # change
-                            int(asset['volume']) if asset.get('volume') else None,    # volume
-                            int(asset['market_cap']) if asset.get('market_cap') else None,  # marketCap
-                            True,                            # isActive
-                            current_time,                    # lastUpdated
-                            current_time                     # updatedAt
-                        ))
-                    except (ValueError, TypeError) as e:
-                        self.logger.warning(f"⚠️ Skipping invalid asset data for {asset.get('stock', 'unknown')}: {str(e)}")
-                        continue
+                fetched = {}
+                for asset in assets:
+                    row = self._asset_row(asset, db_asset_type)
+                    if row:
+                        fetched[row[0]] = row  # one row per ticker, last one wins
                 
-                if batch_data:
-                    cur.executemany(insert_query, batch_data)
-                    saved_count += len(batch_data)
-                    self.logger.debug(f"✅ Batch {batch_num} saved successfully")
-            
-            # Mark assets not in current batch as inactive
-            if saved_count > 0:
-                current_tickers = [asset.get('stock', '').upper() for asset in assets if asset.get('stock')]
-                if current_tickers:
-                    placeholders = ','.join(['%s'] * len(current_tickers))
-                    cur.execute(f"""
-                        UPDATE asset_data 
-                        SET "isActive" = false, "updatedAt" = %s
-                        WHERE type = %s AND ticker NOT IN ({placeholders})
-                    """, [current_time, db_asset_type] + current_tickers)
+                if not fetched:
+                    self.logger.warning(f"⚠️ No valid {asset_type} assets to save")
+                    return self._empty_counts()
+                
+                # Diff the listing against the known content of every ticker
+                known = self._known_assets(cur)
+                hashes = {ticker: self._content_hash(row, True) for ticker, row in fetched.items()}
+                inserted = [ticker for ticker in fetched if ticker not in known]
+                changed = [
+                    ticker for ticker in fetched
+                    if ticker in known and known[ticker][0] != hashes[ticker]
+                ]
+                deactivated = [
+                    ticker for ticker, (_, known_type, is_active) in known.items()
+                    if known_type == db_asset_type and is_active and ticker not in fetched
+                ]
+                counts = {
+                    "saved": len(fetched),
+                    "inserted": len(inserted),
+                    "changed": len(changed),
+                    "unchanged": len(fetched) - len(inserted) - len(changed),
+                    "deactivated": len(deactivated)
+                }
+                self.logger.info(
+                    f"📝 {asset_type}: {counts['inserted']} new, {counts['changed']} changed, "
+                    f"{counts['unchanged']} unchanged, {counts['deactivated']} to deactivate"
+                )
+                
+                current_time = datetime.now()
+                
+                if inserted or changed:
+                    # Stage only new and changed rows with COPY; the temp table goes away on commit
+                    cur.execute("""
+                        CREATE TEMP TABLE asset_data_staging ON COMMIT DROP AS
+                        SELECT ticker, name, type, sector, "logoUrl", "currentPrice", change, volume, "marketCap"
+                        FROM asset_data
+                        WITH NO DATA
+                    """)
+                    copy_rows(cur, "asset_data_staging", self.STAGING_COLUMNS,
+                              (fetched[ticker] for ticker in inserted + changed))
                     
-                    inactive_count = cur.rowcount
-                    if inactive_count > 0:
-                        self.logger.info(f"📝 Marked {inactive_count} {asset_type} assets as inactive")
-            
-            conn.commit()
-            self.logger.info(f"✅ Successfully saved {saved_count} {asset_type} assets to database")
-            
-            return saved_count
-            
-        except Exception as e:
-            conn.rollback()
-            self.logger.error(f"❌ Error saving {asset_type} assets: {str(e)}")
-            raise
-        finally:
-            cur.close()
-            conn.close()
+                    # The IS DISTINCT FROM guard still protects against rows changed
+                    # behind the hash cache's back
+                    cur.execute("""
+                        INSERT INTO asset_data (
+                            id, ticker, name, type, sector, "logoUrl", "currentPrice",
+                            change, volume, "marketCap", "isActive", "lastUpdated", "updatedAt"
+                        )
+                        SELECT
+                            gen_random_uuid()::text, ticker, name, type, sector, "logoUrl", "currentPrice",
+                            change, volume, "marketCap", true, %(now)s, %(now)s
+                        FROM asset_data_staging
+                        ON CONFLICT (ticker) DO UPDATE SET
+                            name = EXCLUDED.name,
+                            sector = EXCLUDED.sector,
+                            "logoUrl" = EXCLUDED."logoUrl",
+                            "currentPrice" = EXCLUDED."currentPrice",
+                            change = EXCLUDED.change,
+                            volume = EXCLUDED.volume,
+                            "marketCap" = EXCLUDED."marketCap",
+                            "isActive" = EXCLUDED."isActive",
+                            "lastUpdated" = EXCLUDED."lastUpdated",
+                            "updatedAt" = EXCLUDED."updatedAt"
+                        WHERE (
+                            asset_data.name, asset_data.sector, asset_data."logoUrl", asset_data."currentPrice",
+                            asset_data.change, asset_data.volume, asset_data."marketCap", asset_data."isActive"
+                        ) IS DISTINCT FROM (
+                            EXCLUDED.name, EXCLUDED.sector, EXCLUDED."logoUrl", EXCLUDED."currentPrice",
+                            EXCLUDED.change, EXCLUDED.volume, EXCLUDED."marketCap", EXCLUDED."isActive"
+                        )
+                    """, {"now": current_time})
+                
+                # Mark assets missing from the listing as inactive
+                if deactivated:
+                    cur.execute("""
+                        UPDATE asset_data
+                        SET "isActive" = false, "updatedAt" = %s
+                        WHERE ticker = ANY(%s) AND "isActive"
+                    """, (current_time, deactivated))
+                    self.logger.info(f"📝 Marked {cur.rowcount} {asset_type} assets as inactive")
+                
+                conn.commit()
+                
+                # Only remember the new content once it is committed
+                for ticker in inserted + changed:
+                    known[ticker] = (hashes[ticker], db_asset_type, True)
+                for ticker in deactivated:
+                    known[ticker] = (None, db_asset_type, False)
+                
+                self.logger.info(f"✅ Successfully saved {counts['saved']} {asset_type} assets to database")
+                
+                return counts
+                
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"❌ Error saving {asset_type} assets: {str(e)}")
+                raise
+            finally:
+                cur.close()
+        
+    def _empty_counts(self) -> Dict[str, int]:
+        return {"saved": 0, **{category: 0 for category in self.CHANGE_CATEGORIES}}
     
-    def _update_cache_timestamp(self):
+    def _known_assets(self, cur) -> Dict[str, Tuple[Optional[bytes], str, bool]]:
         """
-        Update cache timestamp for tracking when data was last refreshed
+        Content hash of every ticker in asset_data, loaded from the database on
+        first use (and when stale) and kept up to date by the agent's own writes
         """
-        conn = psycopg2.connect(self.db_url)
-        cur = conn.cursor()
+        max_age = timedelta(hours=self.config["content_hash_max_age_hours"])
+        if self._asset_hashes_loaded_at and datetime.now() - self._asset_hashes_loaded_at < max_age:
+            return self._asset_hashes
+        
+        self.logger.info("🔑 Loading asset content hashes from database...")
+        cur.execute("""
+            SELECT ticker, name, type::text, sector, "logoUrl", "currentPrice", change, volume, "marketCap", "isActive"
+            FROM asset_data
+        """)
+        self._asset_hashes = {
+            row[0]: (self._content_hash(row[:9], row[9]), row[2], row[9])
+            for row in cur.fetchall()
+        }
+        self._asset_hashes_loaded_at = datetime.now()
+        self.logger.info(f"🔑 Loaded {len(self._asset_hashes)} asset content hashes")
+        return self._asset_hashes
+    
+    def _content_hash(self, row: Sequence[Any], is_active: bool) -> bytes:
+        """
+        Hash of a staging row's values (STAGING_COLUMNS order) plus its active flag
+        """
+        values = [float(value) if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool) else value
+                  for value in row]
+        return hashlib.blake2b(repr((values, is_active)).encode(), digest_size=16).digest()
+    
+    def _asset_row(self, asset: Dict[str, Any], db_asset_type: str) -> Optional[tuple]:
+        """
+        Staging row (STAGING_COLUMNS order) for a Brapi asset, or None if invalid
+        """
+        ticker = asset.get('stock', '').upper()
+        if not ticker:
+            return None
         
         try:
-            # Create or update cache metadata table
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS cache_metadata (
-                    key VARCHAR(50) PRIMARY KEY,
-                    value TEXT,
-                    "updatedAt" TIMESTAMP DEFAULT NOW()
-                );
-                
-                INSERT INTO cache_metadata (key, value, "updatedAt")
-                VALUES ('asset_cache_last_update', %s, %s)
-                ON CONFLICT (key) DO UPDATE SET
-                    value = EXCLUDED.value,
-                    "updatedAt" = EXCLUDED."updatedAt"
-            """, [datetime.now().isoformat(), datetime.now()])
-            
-            conn.commit()
-            self.logger.info("📅 Updated cache timestamp")
+            return (
+                ticker,                          # ticker
+                asset.get('name', ''),           # name
+                db_asset_type,                   # type
+                asset.get('sector'),             # sector
+                asset.get('logo'),               # logoUrl
+                float(asset['close']) if asset.get('close') else None,  # currentPrice
+                float(asset['change']) if asset.get('change') else None,  # change
+                int(asset['volume']) if asset.get('volume') else None,    # volume
+                int(asset['market_cap']) if asset.get('market_cap') else None  # marketCap
+            )
+        except (ValueError, TypeError) as e:
+            self.logger.warning(f"⚠️ Skipping invalid asset data for {ticker}: {str(e)}")
+            return None
+    
+    def _update_cache_timestamp(self):
+        """
+        Update cache timestamp for tracking when data was last refreshed
+        """
+        with self._db_connection() as conn:
+            cur = conn.cursor()
             
-        except Exception as e:
-            self.logger.error(f"❌ Error updating cache timestamp: {str(e)}")
-        finally:
-            cur.close()
-            conn.close()
\ No newline at end of file
+            try:
+                # Create or update cache metadata table
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_metadata (
+                        key VARCHAR(50) PRIMARY KEY,
+                        value TEXT,
+                        "updatedAt" TIMESTAMP DEFAULT NOW()
+                    );
+                    
+                    INSERT INTO cache_metadata (key, value, "updatedAt")
+                    VALUES ('asset_cache_last_update', %s, %s)
+                    ON CONFLICT (key) DO UPDATE SET
+                        value = EXCLUDED.value,
+                        "updatedAt" = EXCLUDED."updatedAt"
+                """, [datetime.now().isoformat(), datetime.now()])
+                
+                conn.commit()
+                self.logger.info("📅 Updated cache timestamp")
+                
+            except Exception as e:
+                self.logger.error(f"❌ Error updating cache timestamp: {str(e)}")
+            finally:
+                cur.close()
\ No newline at end of file
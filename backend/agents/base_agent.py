@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 import logging
+import threading
 from datetime import datetime
 import traceback
+from lib.db_pool import DatabasePool, get_default_pool
 
 class BaseAgent(ABC):
     """
@@ -10,13 +12,18 @@ class BaseAgent(ABC):
     Provides common functionality and enforces agent structure.
     """
     
-    def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, name: str, config: Optional[Dict[str, Any]] = None,
+                 max_concurrent_runs: int = 1):
         self.name = name
         self.config = config or {}
         self.logger = self._setup_logger()
-        self.is_running = False
+        self.max_concurrent_runs = max_concurrent_runs
+        self._run_slots = threading.BoundedSemaphore(max_concurrent_runs)
+        self._active_runs = 0
+        self._state_lock = threading.Lock()
         self.last_execution = None
         self.execution_count = 0
+        self.db_pool: Optional[DatabasePool] = None
         
     def _setup_logger(self) -> logging.Logger:
         """Setup logger for the agent"""
@@ -37,11 +44,12 @@ class BaseAgent(ABC):
         """
         Execute the agent with error handling and logging
         """
-        if self.is_running:
+        if not self._run_slots.acquire(blocking=False):
             self.logger.warning(f"Agent {self.name} is already running, skipping execution")
             return {"status": "skipped", "reason": "already_running"}
         
-        self.is_running = True
+        with self._state_lock:
+            self._active_runs += 1
         start_time = datetime.now()
         
         try:
@@ -57,8 +65,9 @@ class BaseAgent(ABC):
             self._post_execute(result)
             
             execution_time = (datetime.now() - start_time).total_seconds()
-            self.execution_count += 1
-            self.last_execution = datetime.now()
+            with self._state_lock:
+                self.execution_count += 1
+                self.last_execution = datetime.now()
             
             self.logger.info(
                 f"Agent {self.name} completed successfully in {execution_time:.2f}s"
@@ -85,7 +94,14 @@ class BaseAgent(ABC):
             }
             
         finally:
-            self.is_running = False
+            with self._state_lock:
+                self._active_runs -= 1
+            self._run_slots.release()
+    
+    @property
+    def is_running(self) -> bool:
+        """Whether at least one execution is in progress"""
+        return self._active_runs > 0
     
     def _pre_execute(self):
         """Hook called before main execution"""
@@ -112,6 +128,16 @@ class BaseAgent(ABC):
             "config": self.config
         }
     
+    def set_db_pool(self, db_pool: DatabasePool):
+        """Inject the connection pool shared by all agents"""
+        self.db_pool = db_pool
+    
+    def _db_connection(self):
+        """
+        Borrow a pooled connection; commits on success, rolls back on error
+        """
+        return (self.db_pool or get_default_pool()).connection()
+    
     def update_config(self, new_config: Dict[str, Any]):
         """Update agent configuration"""
         self.config.update(new_config)
@@ -4,6 +4,11 @@ from websites.infomoney import InfoMoney
 from websites.moneytimes import MoneyTimes
 from websites.investidor10 import Investidor10
 from lib.db import salvar_noticias_no_postgres
+from lib.near_duplicates import NearDuplicateIndex
+from lib.seen_urls import SeenUrlIndex
+from lib.ticker_extractor import TickerExtractor
+from lib.ticker_universe import TickerUniverse
+from lib.llm_cache import llm_cache
 
 class NewsScraperAgent(BaseAgent):
     """
@@ -15,7 +20,13 @@ class NewsScraperAgent(BaseAgent):
             "sources": ["infomoney", "moneytimes", "investidor10"],
             "max_retries": 3,
             "retry_delay": 5,  # seconds
-            "batch_size": 50
+            "batch_size": 50,
+            "llm_mode": "combined",  # "combined" (one LLM call per article) or "separate"
+            "ticker_mode": "dictionary",  # "dictionary" (listed tickers only) or "regex"
+            "match_company_names": False,
+            "near_duplicate_mode": "skip",  # "skip", "mark" (saved with duplicateOf) or "off"
+            "near_duplicate_max_distance": 12,  # max differing SimHash bits (of 64)
+            "near_duplicate_days": 3  # how far back stored news are compared
         }
         
         if config:
@@ -29,15 +40,39 @@ class NewsScraperAgent(BaseAgent):
             "moneytimes": MoneyTimes(),
             "investidor10": Investidor10()
         }
+
+        # URLs already stored, shared by every scraper
+        self.seen_urls = SeenUrlIndex()
+        
+        # SimHash fingerprints of recent news, shared by every scraper
+        self.near_duplicates = NearDuplicateIndex(
+            self.config["near_duplicate_max_distance"],
+            self.config["near_duplicate_days"]
+        )
+        
+        # Listed tickers from asset_data, shared by every scraper's extractor
+        self.ticker_universe = TickerUniverse()
+        self.ticker_extractor = TickerExtractor(
+            self.ticker_universe if self.config["ticker_mode"] == "dictionary" else None,
+            match_company_names=self.config["match_company_names"]
+        )
     
     def _execute(self) -> Dict[str, Any]:
         """
         Execute news scraping from all configured sources
         """
         total_news = 0
+        total_skipped = 0
+        total_duplicates = 0
         results = {}
         errors = []
         
+        self._refresh_seen_urls()
+        if self.config["ticker_mode"] == "dictionary":
+            self._refresh_ticker_universe()
+        if self.config["near_duplicate_mode"] != "off":
+            self._refresh_near_duplicates()
+        
         for source in self.config["sources"]:
             if source not in self.scrapers:
                 error_msg = f"Unknown news source: {source}"
@@ -49,25 +84,48 @@ class NewsScraperAgent(BaseAgent):
                 self.logger.info(f"Starting scraping from {source}")
                 
                 scraper = self.scrapers[source]
+                scraper.urls_vistas = self.seen_urls
+                scraper.modo_ia = self.config["llm_mode"]
+                scraper.ticker_extractor = self.ticker_extractor
+                scraper.indice_duplicatas = self.near_duplicates if self.config["near_duplicate_mode"] != "off" else None
+                scraper.modo_duplicatas = self.config["near_duplicate_mode"]
                 news_data = scraper.extract()
+                skipped = scraper.metricas["links_skipped"]
+                total_skipped += skipped
+                total_duplicates += scraper.metricas["duplicates_skipped"] + scraper.metricas["duplicates_marked"]
+                
+                # Skipped near-duplicates are not downloaded again in this process
+                self.seen_urls.add(scraper.urls_duplicadas)
                 
                 if news_data:
                     # Save to database in batches
-                    self._save_news_in_batches(news_data)
+                    saved = self._save_news_in_batches(news_data)
+                    self.seen_urls.add(news["sourceUrl"] for news in news_data)
                     
                     results[source] = {
                         "count": len(news_data),
+                        "inserted": saved["inserted"],
+                        "skipped": skipped,
+                        "duplicates_skipped": scraper.metricas["duplicates_skipped"],
+                        "duplicates_marked": scraper.metricas["duplicates_marked"],
                         "status": "success"
                     }
                     total_news += len(news_data)
                     
-                    self.logger.info(f"Successfully scraped {len(news_data)} news from {source}")
+                    self.logger.info(
+                        f"Successfully scraped {len(news_data)} news from {source} "
+                        f"({skipped} already stored links skipped)"
+                    )
                 else:
                     results[source] = {
                         "count": 0,
+                        "skipped": skipped,
                         "status": "no_data"
                     }
-                    self.logger.warning(f"No news data retrieved from {source}")
+                    self.logger.warning(
+                        f"No new news data retrieved from {source} "
+                        f"({skipped} already stored links skipped)"
+                    )
                     
             except Exception as e:
                 error_msg = f"Error scraping from {source}: {str(e)}"
@@ -81,25 +139,86 @@ class NewsScraperAgent(BaseAgent):
         
         return {
             "total_news_scraped": total_news,
+            "total_links_skipped": total_skipped,
+            "total_near_duplicates": total_duplicates,
             "sources_results": results,
             "errors": errors,
             "success_rate": len([r for r in results.values() if r["status"] == "success"]) / len(results) if results else 0
         }
     
-    def _save_news_in_batches(self, news_data: List[Dict[str, Any]]):
+    def _refresh_seen_urls(self):
         """
-        Save news data to database in batches to avoid memory issues
+        Load the stored news URLs (all of them on the first run, only the new
+        ones afterwards) so scrapers can skip links we already have
+        """
+        try:
+            first_load = not self.seen_urls.loaded
+            added = self.seen_urls.refresh()
+            self.logger.info(
+                f"{'Loaded' if first_load else 'Refreshed'} seen URL index: "
+                f"{added} new, {len(self.seen_urls)} total"
+            )
+        except Exception as e:
+            # Saving is still protected by ON CONFLICT, so keep scraping
+            self.logger.warning(f"Could not refresh seen URL index: {str(e)}")
+    
+    def _refresh_ticker_universe(self):
+        """
+        Reload the listed tickers when the asset cache changed since the last run
+        """
+        try:
+            if self.ticker_universe.refresh():
+                self.logger.info(f"Loaded ticker universe: {len(self.ticker_universe)} listed tickers")
+        except Exception as e:
+            # The extractor falls back to the regex heuristics until a load succeeds
+            self.logger.warning(f"Could not refresh ticker universe: {str(e)}")
+    
+    def _refresh_near_duplicates(self):
+        """
+        Reseed the near-duplicate index with the fingerprints of the last
+        near_duplicate_days days of stored news
+        """
+        max_distance = self.config["near_duplicate_max_distance"]
+        days = self.config["near_duplicate_days"]
+        if (self.near_duplicates.max_distance, self.near_duplicates.days) != (max_distance, days):
+            # The LSH bands depend on the threshold
+            self.near_duplicates = NearDuplicateIndex(max_distance, days)
+        
+        try:
+            loaded = self.near_duplicates.refresh()
+            self.logger.info(f"Loaded near-duplicate index: {loaded} fingerprints from the last {days} days")
+        except Exception as e:
+            # Duplicates within this run are still caught
+            self.logger.warning(f"Could not refresh near-duplicate index: {str(e)}")
+    
+    def _save_news_in_batches(self, news_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Save news data to database in batches, one multi-row insert per batch
         """
         batch_size = self.config["batch_size"]
+        totals = {"inserted": 0, "skipped": 0}
         
         for i in range(0, len(news_data), batch_size):
             batch = news_data[i:i + batch_size]
             try:
-                salvar_noticias_no_postgres(batch)
-                self.logger.debug(f"Saved batch of {len(batch)} news items")
+                counts = salvar_noticias_no_postgres(batch)
+                totals["inserted"] += counts["inserted"]
+                totals["skipped"] += counts["skipped"]
+                self.logger.info(
+                    f"Saved batch of {len(batch)} news items: "
+                    f"{counts['inserted']} inserted, {counts['skipped']} already stored"
+                )
             except Exception as e:
                 self.logger.error(f"Error saving batch: {str(e)}")
                 raise
+        
+        return totals
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Agent status including LLM cache hit/miss counters"""
+        status = super().get_status()
+        status["llm_cache"] = llm_cache.stats()
+        return status
     
     def add_scraper(self, name: str, scraper_instance):
         """
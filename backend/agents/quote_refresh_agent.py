@@ -0,0 +1,173 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import os
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from agents.base_agent import BaseAgent
+from lib.brapi import BRAPI_BASE_URL, BrapiClient
+
+load_dotenv()
+
+class QuoteRefreshAgent(BaseAgent):
+    """
+    Agent responsible for keeping quotes of the tickers users care about fresh
+    between full AssetCacheAgent refreshes. Only tickers held in wallets or
+    mentioned in favourited news are quoted, and only the price, change and
+    volume columns of asset_data are updated.
+    """
+    
+    def __init__(self, config: Dict[str, Any] = None):
+        default_config = {
+            "brapi_token": os.getenv("BRAPI_TOKEN", "8rDscDtqiTXKAGB1kfbn42"),
+            "brapi_base_url": os.getenv("BRAPI_BASE_URL", BRAPI_BASE_URL),
+            "request_timeout": 30,
+            "max_retries": 2,
+            "retry_delay": 2,
+            "quote_batch_size": 20,  # tickers per multi-ticker Brapi request
+            "max_concurrent_requests": 4,
+            "include_favorite_news_tickers": True
+        }
+        
+        if config:
+            default_config.update(config)
+        
+        super().__init__("QuoteRefreshAgent", default_config)
+        
+        self.brapi = BrapiClient(
+            self.config["brapi_token"],
+            base_url=self.config["brapi_base_url"],
+            timeout=self.config["request_timeout"],
+            max_retries=self.config["max_retries"],
+            retry_delay=self.config["retry_delay"],
+            pool_size=self.config["max_concurrent_requests"],
+            logger=self.logger
+        )
+    
+    def _execute(self) -> Dict[str, Any]:
+        """
+        Refresh quotes of held and favourited tickers
+        """
+        try:
+            self.logger.info("🚀 Starting quote refresh for tracked tickers...")
+            
+            tickers = self._get_tracked_tickers()
+            if not tickers:
+                self.logger.info("✅ No tracked tickers to refresh")
+                return {
+                    "tickers_tracked": 0,
+                    "quotes_fetched": 0,
+                    "assets_updated": 0
+                }
+            
+            self.logger.info(f"📊 Fetching quotes for {len(tickers)} tickers in batches of {self.config['quote_batch_size']}...")
+            fetched = self.brapi.quotes_batched(
+                tickers,
+                batch_size=self.config["quote_batch_size"],
+                max_workers=self.config["max_concurrent_requests"]
+            )
+            
+            if fetched["not_found"]:
+                self.logger.warning(f"⚠️ Brapi has no quote for: {', '.join(fetched['not_found'][:20])}")
+            for error in fetched["errors"]:
+                self.logger.error(f"❌ Quote batch failed: {error}")
+            if fetched["errors"] and not fetched["quotes"]:
+                raise RuntimeError(f"Every quote batch failed: {fetched['errors'][0]}")
+            
+            updated_count = self._save_quotes(fetched["quotes"])
+            self.logger.info(f"✅ Updated quotes of {updated_count} assets")
+            
+            return {
+                "tickers_tracked": len(tickers),
+                "quotes_fetched": len(fetched["quotes"]),
+                "tickers_not_found": len(fetched["not_found"]),
+                "failed_batches": len(fetched["errors"]),
+                "assets_updated": updated_count,
+                "refreshed_at": datetime.now().isoformat()
+            }
+        
+        except Exception as e:
+            self.logger.error(f"❌ Error in quote refresh: {str(e)}")
+            raise
+    
+    def _get_tracked_tickers(self) -> List[str]:
+        """
+        Distinct tickers held in any wallet, plus tickers of favourited news
+        """
+        query = """
+            SELECT DISTINCT ticker FROM assets WHERE quantity > 0
+        """
+        if self.config["include_favorite_news_tickers"]:
+            query += """
+                UNION
+                SELECT DISTINCT unnest(n.tickers)
+                FROM favorites f
+                JOIN news n ON n.id = f."newsId"
+            """
+        
+        with self._db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                return sorted(row[0].upper() for row in cur.fetchall() if row[0])
+    
+    def _save_quotes(self, quotes: List[Dict[str, Any]]) -> int:
+        """
+        Update price, change and volume of the quoted assets, skipping rows
+        whose values didn't change
+        """
+        rows = []
+        for quote in quotes:
+            row = self._quote_row(quote)
+            if row:
+                rows.append(row)
+        
+        if not rows:
+            return 0
+        
+        with self._db_connection() as conn:
+            cur = conn.cursor()
+            
+            try:
+                updated = execute_values(cur, """
+                    UPDATE asset_data a SET
+                        "currentPrice" = q.price,
+                        change = q.change,
+                        volume = q.volume,
+                        "lastUpdated" = q.updated_at,
+                        "updatedAt" = q.updated_at
+                    FROM (VALUES %s) AS q(ticker, price, change, volume, updated_at)
+                    WHERE a.ticker = q.ticker
+                      AND (a."currentPrice", a.change, a.volume) IS DISTINCT FROM (q.price, q.change, q.volume)
+                    RETURNING a.ticker
+                """, rows,
+                    template="(%s, %s::double precision, %s::double precision, %s::bigint, %s::timestamp)",
+                    page_size=len(rows), fetch=True)
+                
+                conn.commit()
+                return len(updated)
+            
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"❌ Error saving quotes: {str(e)}")
+                raise
+            finally:
+                cur.close()
+    
+    def _quote_row(self, quote: Dict[str, Any]) -> Optional[tuple]:
+        """
+        (ticker, price, change, volume, updated_at) for a Brapi quote, or None if unusable
+        """
+        ticker = (quote.get("symbol") or "").upper()
+        if not ticker or quote.get("regularMarketPrice") is None:
+            return None
+        
+        try:
+            return (
+                ticker,
+                float(quote["regularMarketPrice"]),
+                float(quote["regularMarketChangePercent"]) if quote.get("regularMarketChangePercent") is not None else None,
+                int(quote["regularMarketVolume"]) if quote.get("regularMarketVolume") is not None else None,
+                datetime.now()
+            )
+        except (ValueError, TypeError) as e:
+            self.logger.warning(f"⚠️ Skipping invalid quote for {ticker}: {str(e)}")
+            return None
@@ -0,0 +1,254 @@
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime
+import json
+import os
+from psycopg2.extras import execute_values
+from agents.base_agent import BaseAgent
+from lib.db import indexar_tickers_das_noticias
+from lib.ticker_extractor import RULES_VERSION, TickerExtractor
+from lib.ticker_universe import TickerUniverse
+
+class TickerBackfillAgent(BaseAgent):
+    """
+    Agent responsible for re-tagging stored news when the ticker extraction
+    rules change. News is streamed in id order, re-extracted over a process
+    pool and only rows whose ticker set changed are written back. Progress is
+    checkpointed in cache_metadata, so an interrupted backfill resumes where
+    it stopped and a finished one is not repeated until the rules change.
+    """
+    
+    CHECKPOINT_KEY = "ticker_backfill_checkpoint"
+    
+    def __init__(self, config: Dict[str, Any] = None):
+        default_config = {
+            "page_size": 2000,  # news rows per keyset page
+            "fetch_size": 500,  # rows per round trip of the server-side cursor
+            "update_batch_size": 500,  # re-extracted rows per UPDATE and checkpoint
+            "processes": os.cpu_count() or 1,
+            "chunk_size": 200,  # documents sent to a worker process at a time
+            "ticker_mode": "dictionary",  # "dictionary" (listed tickers only) or "regex"
+            "match_company_names": False
+        }
+        
+        if config:
+            default_config.update(config)
+        
+        super().__init__("TickerBackfillAgent", default_config)
+        
+        self.ticker_universe = TickerUniverse()
+        self._progress: Dict[str, Any] = {}
+    
+    def _execute(self) -> Dict[str, Any]:
+        """
+        Re-tag every news row not yet covered by the current rules version
+        """
+        try:
+            rules_version = self._rules_version()
+            checkpoint = self._load_checkpoint()
+            
+            if checkpoint.get("rules_version") == rules_version and checkpoint.get("completed"):
+                self.logger.info(f"✅ News tickers already tagged with rules {rules_version}")
+                self._set_progress(checkpoint)
+                return {"rules_version": rules_version, "status": "up_to_date"}
+            
+            if checkpoint.get("rules_version") != rules_version:
+                checkpoint = {
+                    "rules_version": rules_version,
+                    "last_id": None,
+                    "scanned": 0,
+                    "updated": 0,
+                    "completed": False,
+                    "started_at": datetime.now().isoformat()
+                }
+                self.logger.info(f"🚀 Starting ticker backfill with rules {rules_version}...")
+            else:
+                self.logger.info(f"🔄 Resuming ticker backfill after news {checkpoint['last_id']}...")
+            
+            checkpoint["total"] = checkpoint["scanned"] + self._count_remaining(checkpoint["last_id"])
+            self._set_progress(checkpoint)
+            
+            extractor = self._build_extractor()
+            previous: Dict[str, List[str]] = {}
+            batch: List[Tuple[str, List[str]]] = []
+            batch_changes: List[Tuple[str, List[str]]] = []
+            
+            documents = self._stream_news(checkpoint["last_id"], previous)
+            for news_id, tickers in extractor.extract_batch(
+                documents,
+                processes=self.config["processes"],
+                chunk_size=self.config["chunk_size"]
+            ):
+                batch.append((news_id, tickers))
+                if sorted(set(previous.pop(news_id))) != tickers:
+                    batch_changes.append((news_id, tickers))
+                
+                if len(batch) >= self.config["update_batch_size"]:
+                    self._write_batch(checkpoint, batch, batch_changes)
+                    batch, batch_changes = [], []
+            
+            checkpoint["completed"] = True
+            checkpoint["completed_at"] = datetime.now().isoformat()
+            self._write_batch(checkpoint, batch, batch_changes)
+            
+            self.logger.info(
+                f"✅ Ticker backfill finished: {checkpoint['scanned']} news scanned, "
+                f"{checkpoint['updated']} re-tagged"
+            )
+            
+            return {
+                "rules_version": rules_version,
+                "news_scanned": checkpoint["scanned"],
+                "news_updated": checkpoint["updated"],
+                "status": "completed"
+            }
+        
+        except Exception as e:
+            self.logger.error(f"❌ Error in ticker backfill: {str(e)}")
+            raise
+    
+    def _rules_version(self) -> str:
+        """
+        Extraction rules in effect: the rules version plus the options that change the output
+        """
+        version = f"{RULES_VERSION}:{self.config['ticker_mode']}"
+        if self.config["match_company_names"]:
+            version += ":names"
+        return version
+    
+    def _build_extractor(self) -> TickerExtractor:
+        if self.config["ticker_mode"] != "dictionary":
+            return TickerExtractor()
+        
+        self.ticker_universe.refresh()
+        if not self.ticker_universe.loaded:
+            # The regex fallback would tag news with the wrong rules under this version
+            raise RuntimeError("Ticker universe is empty, run AssetCacheAgent first")
+        
+        self.logger.info(f"📊 Loaded ticker universe: {len(self.ticker_universe)} listed tickers")
+        return TickerExtractor(self.ticker_universe, match_company_names=self.config["match_company_names"])
+    
+    def _stream_news(self, after_id: Optional[str], previous: Dict[str, List[str]]
+                     ) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yield (id, title, content) of the news after `after_id` in id order.
+        Each keyset page is read through a server-side cursor in its own short
+        transaction, and the stored tickers are kept in `previous` until the
+        row's new tickers come back.
+        """
+        while True:
+            with self._db_connection() as conn:
+                with conn.cursor(name="ticker_backfill_news") as cur:
+                    cur.itersize = self.config["fetch_size"]
+                    cur.execute("""
+                        SELECT id, title, content, tickers
+                        FROM news
+                        WHERE %s::text IS NULL OR id > %s
+                        ORDER BY id
+                        LIMIT %s
+                    """, (after_id, after_id, self.config["page_size"]))
+                    
+                    rows = 0
+                    for news_id, title, content, tickers in cur:
+                        previous[news_id] = tickers or []
+                        rows += 1
+                        after_id = news_id
+                        yield news_id, title, content
+            
+            if rows < self.config["page_size"]:
+                return
+    
+    def _write_batch(self, checkpoint: Dict[str, Any], batch: List[Tuple[str, List[str]]],
+                     changes: List[Tuple[str, List[str]]]):
+        """
+        Write the changed ticker arrays and advance the checkpoint in one transaction
+        """
+        if batch:
+            checkpoint["last_id"] = batch[-1][0]
+            checkpoint["scanned"] += len(batch)
+        
+        with self._db_connection() as conn:
+            cur = conn.cursor()
+            
+            try:
+                updated_ids = []
+                if changes:
+                    updated_ids = [row[0] for row in execute_values(cur, """
+                        UPDATE news n SET
+                            tickers = v.tickers,
+                            "updatedAt" = NOW()
+                        FROM (VALUES %s) AS v(id, tickers)
+                        WHERE n.id = v.id
+                          AND n.tickers IS DISTINCT FROM v.tickers
+                        RETURNING n.id
+                    """, changes, template="(%s, %s::text[])", page_size=len(changes), fetch=True)]
+                    
+                    # Keep the ticker -> news index in step with the new arrays
+                    indexar_tickers_das_noticias(cur, updated_ids)
+                
+                checkpoint["updated"] += len(updated_ids)
+                self._save_checkpoint(cur, checkpoint)
+                conn.commit()
+            
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"❌ Error writing backfill batch: {str(e)}")
+                raise
+            finally:
+                cur.close()
+        
+        self._set_progress(checkpoint)
+        self.logger.info(
+            f"📝 Backfill progress: {checkpoint['scanned']}/{checkpoint['total']} scanned, "
+            f"{checkpoint['updated']} re-tagged"
+        )
+    
+    def _count_remaining(self, after_id: Optional[str]) -> int:
+        with self._db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT COUNT(*) FROM news WHERE %s::text IS NULL OR id > %s",
+                    (after_id, after_id)
+                )
+                return cur.fetchone()[0]
+    
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        with self._db_connection() as conn:
+            with conn.cursor() as cur:
+                self._ensure_metadata_table(cur)
+                cur.execute("SELECT value FROM cache_metadata WHERE key = %s", (self.CHECKPOINT_KEY,))
+                row = cur.fetchone()
+                return json.loads(row[0]) if row and row[0] else {}
+    
+    def _save_checkpoint(self, cur, checkpoint: Dict[str, Any]):
+        cur.execute("""
+            INSERT INTO cache_metadata (key, value, "updatedAt")
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (key) DO UPDATE SET
+                value = EXCLUDED.value,
+                "updatedAt" = EXCLUDED."updatedAt"
+        """, (self.CHECKPOINT_KEY, json.dumps(checkpoint)))
+    
+    def _ensure_metadata_table(self, cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS cache_metadata (
+                key VARCHAR(50) PRIMARY KEY,
+                value TEXT,
+                "updatedAt" TIMESTAMP DEFAULT NOW()
+            )
+        """)
+    
+    def _set_progress(self, checkpoint: Dict[str, Any]):
+        with self._state_lock:
+            self._progress = dict(checkpoint)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Agent status plus the progress of the current (or last) backfill"""
+        status = super().get_status()
+        with self._state_lock:
+            progress = dict(self._progress)
+        
+        if progress:
+            total = progress.get("total") or 0
+            progress["percent"] = round(100 * progress["scanned"] / total, 1) if total else 100.0
+        status["progress"] = progress
+        return status
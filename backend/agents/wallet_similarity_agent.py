@@ -1,12 +1,22 @@
-from typing import Dict, Any, List, Tuple
-import psycopg2
-from collections import defaultdict, Counter
-import os
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+from array import array
+from collections import Counter
+from contextlib import ExitStack
+import heapq
+import json
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+import threading
+import time
 import uuid
-from dotenv import load_dotenv
+import psycopg2.errors
+from psycopg2.extras import execute_values
 from agents.base_agent import BaseAgent
-
-load_dotenv()
+from lib.bulk_load import array_literal, copy_rows
+from lib.cooccurrence import APPROXIMATE_ENGINES, COOCCURRENCE_ENGINES, CooccurrenceResult, TickerInterner, changed_tickers, pair_metrics, wallet_delta
+from lib.similarity_state import SimilarityStateStore, SnapshotWriter
+from lib.user_recommendations import group_by_base, rank_for_user
 
 class WalletSimilarityAgent(BaseAgent):
     """
@@ -18,67 +28,140 @@ class WalletSimilarityAgent(BaseAgent):
             "min_similarity_threshold": 0.1,  # 10% minimum similarity
             "min_users_for_recommendation": 5,  # Minimum users needed for a recommendation
             "max_recommendations_per_asset": 10,
+            "max_recommendations_per_user": 50,  # precomputed personalised list size, the API's max limit
             "similarity_algorithms": ["jaccard", "cosine"],
-            "batch_size": 1000
+            "batch_size": 1000,
+            # "sparse" (NumPy/SciPy), "python", "parallel" (process pool) or "minhash" (approximate)
+            "cooccurrence_engine": "sparse",
+            "cooccurrence_workers": None,  # processes of the parallel engine, None = one per CPU
+            "minhash_num_perm": 128,  # signature length of the minhash engine
+            "minhash_bands": None,  # LSH bands, None = derived from min_similarity_threshold
+            "minhash_min_recall": 0.95,  # candidate probability of a pair at the threshold
+            "stream_itersize": 10000,  # rows fetched per round trip by the wallet reader
+            # "incremental" applies wallet changes since the last run to the
+            # persisted counts; "full" recomputes everything on every run
+            "update_mode": "incremental",
+            "full_rebuild_hours": 6,
+            # Swapping a freshly loaded table in needs a brief exclusive lock
+            "swap_lock_timeout_ms": 2000,
+            "swap_max_attempts": 5,
+            "swap_retry_delay_seconds": 5
         }
         
         if config:
             default_config.update(config)
             
+        if default_config["swap_max_attempts"] < 1:
+            raise ValueError(f"swap_max_attempts must be at least 1, got {default_config['swap_max_attempts']}")
+            
         super().__init__("WalletSimilarityAgent", default_config)
-        self.db_url = os.getenv("DATABASE_URL_BACK")
+        self.state_store = SimilarityStateStore()
     
     def _execute(self) -> Dict[str, Any]:
         """
-        Execute wallet similarity analysis
+        Execute wallet similarity analysis, incrementally when possible
+        """
+        if self._incremental_enabled():
+            if self._full_rebuild_due():
+                self.logger.info("🔁 Full rebuild due, recomputing everything...")
+            else:
+                return self._execute_incremental()
+        
+        return self._execute_full()
+    
+    def _incremental_enabled(self) -> bool:
+        """
+        Incremental state holds exact counts, so approximate engines always run in full
+        """
+        return (
+            self.config["update_mode"] == "incremental" and
+            self.config["cooccurrence_engine"] not in APPROXIMATE_ENGINES
+        )
+    
+    def _full_rebuild_due(self) -> bool:
+        """
+        Whether incremental state is missing or older than full_rebuild_hours
+        """
+        with self._db_connection() as conn:
+            with conn.cursor() as cur:
+                if not self.state_store.is_initialized(cur):
+                    return True
+                last_full_run = self.state_store.last_full_run(cur)
+        
+        return datetime.now() - last_full_run >= timedelta(hours=self.config["full_rebuild_hours"])
+    
+    def _execute_full(self) -> Dict[str, Any]:
+        """
+        Recompute similarities from every wallet in the database
         """
         try:
             self.logger.info("🚀 Starting wallet similarity analysis...")
             
-            # Get all wallets data
-            self.logger.info("📊 Fetching wallets data from database...")
-            wallets_data = self._get_wallets_data()
-            
-            if not wallets_data:
-                self.logger.warning("⚠️ No wallet data found in database")
-                return {
-                    "message": "No wallet data found",
-                    "similarities_generated": 0,
-                    "recommendations_generated": 0
-                }
-            
-            self.logger.info(f"✅ Found {len(wallets_data)} wallets to analyze")
-            
-            # Log wallet details
-            total_assets = sum(len(wallet["assets"]) for wallet in wallets_data)
-            unique_assets = set()
-            for wallet in wallets_data:
-                for asset in wallet["assets"]:
-                    unique_assets.add(asset["ticker"])
-            
-            self.logger.info(f"📈 Total assets across all wallets: {total_assets}")
-            self.logger.info(f"🎯 Unique assets found: {len(unique_assets)} - {sorted(list(unique_assets))[:10]}{'...' if len(unique_assets) > 10 else ''}")
-            
-            # Generate asset co-occurrence matrix
-            self.logger.info("🔄 Calculating asset co-occurrence matrix...")
-            asset_cooccurrence = self._calculate_asset_cooccurrence(wallets_data)
-            self.logger.info(f"📊 Generated {len(asset_cooccurrence)} asset pairs for analysis")
-            
-            # Generate similarity recommendations
-            self.logger.info("🧠 Generating similarity recommendations...")
-            recommendations = self._generate_recommendations(asset_cooccurrence, wallets_data)
-            self.logger.info(f"💡 Generated {len(recommendations)} recommendations")
-            
-            # Save recommendations to database
-            self.logger.info("💾 Saving recommendations to database...")
-            saved_count = self._save_recommendations(recommendations)
-            self.logger.info(f"✅ Successfully saved {saved_count} recommendations")
+            with ExitStack() as stack:
+                # Make sure wallet changes are logged from now on, and remember
+                # which logged changes this snapshot already covers
+                change_cutoff = None
+                snapshot_writer = None
+                if self._incremental_enabled():
+                    change_cutoff = self._prepare_incremental_state()
+                    # The new state is written in one transaction held for the
+                    # run: wallet snapshots as they stream past, counts at the end
+                    state_conn = stack.enter_context(self._db_connection())
+                    state_cur = stack.enter_context(state_conn.cursor())
+                    self.state_store.begin_replace(state_cur)
+                    snapshot_writer = SnapshotWriter(state_cur)
+                
+                # Stream wallets straight into the co-occurrence engine; only
+                # compact ticker-id arrays are kept
+                self.logger.info("📊 Streaming wallets data from database...")
+                interner = TickerInterner()
+                stream_stats = {"wallets": 0, "assets": 0}
+                wallets = self._stream_wallet_tickers(interner, stream_stats, snapshot_writer)
+                
+                # Generate asset co-occurrence matrix
+                self.logger.info("🔄 Calculating asset co-occurrence matrix...")
+                cooccurrence = self._calculate_asset_cooccurrence(wallets, interner)
+                
+                if not cooccurrence.total_wallets:
+                    self.logger.warning("⚠️ No wallet data found in database")
+                    if change_cutoff is not None:
+                        # Keep the previous state rather than an empty one
+                        state_conn.rollback()
+                    return {
+                        "message": "No wallet data found",
+                        "similarities_generated": 0,
+                        "recommendations_generated": 0
+                    }
+                
+                self.logger.info(f"✅ Analyzed {stream_stats['wallets']} wallets")
+                self.logger.info(f"📈 Total assets across all wallets: {stream_stats['assets']}")
+                self.logger.info(f"🎯 Unique assets found: {len(interner)} - {sorted(interner.names)[:10]}{'...' if len(interner) > 10 else ''}")
+                
+                asset_cooccurrence = cooccurrence.pairs
+                self.logger.info(f"📊 Generated {len(asset_cooccurrence)} asset pairs for analysis")
+                
+                # Generate similarity recommendations
+                self.logger.info("🧠 Generating similarity recommendations...")
+                recommendations = self._generate_recommendations(asset_cooccurrence)
+                self.logger.info(f"💡 Generated {len(recommendations)} recommendations")
+                
+                # Save recommendations to database
+                self.logger.info("💾 Saving recommendations to database...")
+                saved_count = self._save_recommendations(recommendations)
+                self.logger.info(f"✅ Successfully saved {saved_count} recommendations")
+                
+                users_saved = self._save_user_recommendations(recommendations)
+                
+                if change_cutoff is not None:
+                    self._persist_incremental_state(state_cur, cooccurrence, change_cutoff)
             
             return {
-                "wallets_analyzed": len(wallets_data),
+                "mode": "full",
+                "wallets_analyzed": cooccurrence.total_wallets,
                 "asset_pairs_analyzed": len(asset_cooccurrence),
                 "recommendations_generated": len(recommendations),
                 "recommendations_saved": saved_count,
+                "user_recommendations_saved": users_saved,
                 "top_recommendations": self._get_top_recommendations(recommendations, 10)
             }
             
@@ -86,142 +169,283 @@ class WalletSimilarityAgent(BaseAgent):
             self.logger.error(f"❌ Error in wallet similarity analysis: {str(e)}")
             raise
     
-    def _get_wallets_data(self) -> List[Dict[str, Any]]:
+    def _stream_wallet_tickers(self, interner: TickerInterner, stats: Dict[str, int],
+                               snapshot_writer: Optional[SnapshotWriter] = None) -> Iterator[array]:
+        """
+        Yield each wallet's held tickers as a compact array of interned ticker ids.
+        Rows are read through a named (server-side) cursor, itersize rows at a
+        time, so the full wallets x assets join is never held in memory.
+        """
+        self.logger.info("🔍 Connecting to database to stream wallet data...")
+        with self._db_connection() as conn:
+            with conn.cursor(name="wallet_similarity_stream") as cur:
+                cur.itersize = self.config["stream_itersize"]
+                
+                # Assets are unique per (walletId, ticker) and the FK guarantees
+                # the wallet exists, so no join or extra columns are needed
+                self.logger.debug("📝 Executing wallet query...")
+                cur.execute("""
+                    SELECT "walletId", ticker
+                    FROM assets
+                    WHERE quantity > 0
+                    ORDER BY "walletId"
+                """)
+                
+                for wallet_id, rows in groupby(cur, key=itemgetter(0)):
+                    tickers = sorted({ticker for _, ticker in rows})
+                    ticker_ids = array("i", sorted(interner.intern(ticker) for ticker in tickers))
+                    stats["wallets"] += 1
+                    stats["assets"] += len(ticker_ids)
+                    if snapshot_writer is not None:
+                        snapshot_writer.add(wallet_id, tickers)
+                    yield ticker_ids
+                
+                if snapshot_writer is not None:
+                    snapshot_writer.flush()
+                self.logger.info(f"🏦 Streamed {stats['assets']} asset records from {stats['wallets']} wallets")
+    
+    def _prepare_incremental_state(self) -> int:
+        """
+        Create the state tables and change-log trigger, returning the id of the
+        latest logged change (changes up to it are covered by the coming snapshot)
+        """
+        with self._db_connection() as conn:
+            with conn.cursor() as cur:
+                self.state_store.ensure_schema(cur)
+                return self.state_store.change_cutoff(cur)
+    
+    def _persist_incremental_state(self, cur, cooccurrence: CooccurrenceResult, change_cutoff: int):
+        """
+        Store the counts of a full run so later runs can apply deltas to them;
+        the wallet snapshot was already written while the wallets streamed
+        """
+        self.logger.info("💾 Persisting co-occurrence state for incremental updates...")
+        self.state_store.replace_counts(
+            cur,
+            cooccurrence.holders,
+            (
+                (ticker1, ticker2, metrics["users_with_both"])
+                for (ticker1, ticker2), metrics in cooccurrence.pairs.items()
+            ),
+            cooccurrence.total_wallets,
+            datetime.now()
+        )
+        self.state_store.clear_changes(cur, change_cutoff)
+    
+    def _execute_incremental(self) -> Dict[str, Any]:
         """
-        Retrieve all wallets and their assets from database
+        Apply wallet changes logged since the last run to the persisted counts
+        and upsert only the recommendation rows whose metrics changed
         """
-        self.logger.info("🔍 Connecting to database to fetch wallet data...")
-        conn = psycopg2.connect(self.db_url)
-        cur = conn.cursor()
+        self.logger.info("⚡ Starting incremental wallet similarity update...")
+        store = self.state_store
         
-        try:
-            query = """
-                SELECT 
-                    w.id as wallet_id,
-                    w."userId" as user_id,
-                    a.ticker,
-                    a.type,
-                    a.quantity,
-                    a."averagePrice"
-                FROM wallets w
-                JOIN assets a ON w.id = a."walletId"
-                WHERE a.quantity > 0
-                ORDER BY w.id
-            """
-            
-            self.logger.debug("📝 Executing wallet query...")
-            cur.execute(query)
-            rows = cur.fetchall()
-            self.logger.info(f"📊 Retrieved {len(rows)} asset records from database")
-            
-            # Group by wallet
-            wallets = defaultdict(lambda: {"user_id": None, "assets": []})
+        with self._db_connection() as conn:
+            cur = conn.cursor()
             
-            for row in rows:
-                wallet_id, user_id, ticker, asset_type, quantity, avg_price = row
-                
-                if wallets[wallet_id]["user_id"] is None:
-                    wallets[wallet_id]["user_id"] = user_id
-                
-                wallets[wallet_id]["assets"].append({
-                    "ticker": ticker,
-                    "type": asset_type,
-                    "quantity": quantity,
-                    "average_price": float(avg_price),
-                    "total_value": quantity * float(avg_price)
-                })
-            
-            self.logger.info(f"🏦 Processed {len(wallets)} unique wallets")
-            
-            # Log some wallet examples
-            for i, (wallet_id, data) in enumerate(list(wallets.items())[:3]):
-                tickers = [asset["ticker"] for asset in data["assets"]]
-                self.logger.debug(f"  Wallet {i+1} (ID: {wallet_id}): {len(tickers)} assets - {tickers}")
-            
-            if len(wallets) > 3:
-                self.logger.debug(f"  ... and {len(wallets) - 3} more wallets")
-            
-            return [
-                {
-                    "wallet_id": wallet_id,
-                    "user_id": data["user_id"],
-                    "assets": data["assets"]
+            try:
+                change_cutoff = store.change_cutoff(cur)
+                wallet_ids = store.changed_wallets(cur, change_cutoff)
+                
+                if not wallet_ids:
+                    self.logger.info("✅ No wallet changes since last run")
+                    return {
+                        "mode": "incremental",
+                        "wallets_changed": 0,
+                        "recommendations_upserted": 0,
+                        "recommendations_deleted": 0,
+                        "user_recommendations_updated": 0
+                    }
+                
+                old_tickers = store.snapshot_tickers(cur, wallet_ids)
+                new_tickers = store.current_tickers(cur, wallet_ids)
+                
+                holder_delta, pair_delta = Counter(), Counter()
+                wallets_delta = 0
+                snapshot_updates = {}
+                for wallet_id in wallet_ids:
+                    old = old_tickers.get(wallet_id, [])
+                    new = new_tickers.get(wallet_id, [])
+                    if set(old) == set(new):
+                        continue
+                    
+                    wallet_holders, wallet_pairs = wallet_delta(old, new)
+                    holder_delta.update(wallet_holders)
+                    pair_delta.update(wallet_pairs)
+                    wallets_delta += bool(new) - bool(old)
+                    snapshot_updates[wallet_id] = new
+                
+                self.logger.info(
+                    f"📊 {len(wallet_ids)} wallets logged as changed, "
+                    f"{len(snapshot_updates)} with different holdings"
+                )
+                
+                upserted, deleted, users_updated = 0, 0, 0
+                if snapshot_updates:
+                    store.apply_deltas(cur, snapshot_updates, holder_delta, pair_delta, wallets_delta)
+                    
+                    # A new wallet total changes every pair's support, otherwise
+                    # only base assets with a changed pair need re-ranking
+                    base_assets = None
+                    if not wallets_delta:
+                        base_assets = self._affected_base_assets(
+                            cur, changed_tickers(holder_delta, pair_delta)
+                        )
+                    total_wallets = store.total_wallets(cur)
+                    pair_counts, holders = store.load_counts(cur, base_assets)
+                    
+                    asset_cooccurrence = {
+                        (ticker1, ticker2): pair_metrics(both, holders[ticker1], holders[ticker2], total_wallets)
+                        for (ticker1, ticker2), both in pair_counts.items()
+                    }
+                    recommendations = self._generate_recommendations(asset_cooccurrence, base_assets)
+                    upserted, deleted = self._upsert_recommendations(cur, recommendations, base_assets)
+                    users_updated = self._refresh_user_recommendations(cur, list(snapshot_updates), base_assets)
+                
+                store.clear_changes(cur, change_cutoff)
+                
+                self.logger.info(
+                    f"✅ Incremental update done: {upserted} recommendations upserted, {deleted} deleted, "
+                    f"{users_updated} user lists updated"
+                )
+                return {
+                    "mode": "incremental",
+                    "wallets_changed": len(snapshot_updates),
+                    "recommendations_upserted": upserted,
+                    "recommendations_deleted": deleted,
+                    "user_recommendations_updated": users_updated
                 }
-                for wallet_id, data in wallets.items()
-            ]
-            
-        finally:
-            self.logger.debug("🔒 Closing database connection")
-            cur.close()
-            conn.close()
+                
+            finally:
+                self.logger.debug("🔒 Releasing database connection")
+                cur.close()
     
-    def _calculate_asset_cooccurrence(self, wallets_data: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    def _affected_base_assets(self, cur, tickers: List[str]) -> List[str]:
+        """
+        Base assets whose top-K list may change: every changed ticker (holder
+        count or pair count), every ticker paired with one, and every base
+        currently recommending one (its pair may have dropped to zero)
+        """
+        pair_counts, _ = self.state_store.load_counts(cur, tickers)
+        base_assets = set(tickers)
+        base_assets.update(ticker for pair in pair_counts for ticker in pair)
+        
+        cur.execute("""
+            SELECT DISTINCT "baseAsset" FROM asset_recommendations
+            WHERE "recommendedAsset" = ANY(%s)
+        """, (tickers,))
+        base_assets.update(row[0] for row in cur.fetchall())
+        
+        return sorted(base_assets)
+    
+    def _upsert_recommendations(self, cur, recommendations: List[Dict[str, Any]],
+                                base_assets: Optional[List[str]]) -> Tuple[int, int]:
+        """
+        Upsert recommendations whose metrics changed and delete rows of the
+        re-ranked base assets that no longer qualify. base_assets=None means all rows.
+        """
+        current_time = datetime.now()
+        rows = [
+            (
+                str(uuid.uuid4()),
+                rec["base_asset"],
+                rec["recommended_asset"],
+                rec["similarity_score"],
+                rec["support"],
+                rec["confidence"],
+                rec["users_with_both"],
+                rec["users_with_base"],
+                rec["percentage_also_invest"],
+                rec["recommendation_strength"],
+                current_time,
+                current_time
+            )
+            for rec in recommendations
+        ]
+        
+        upserted = 0
+        if rows:
+            changed = execute_values(cur, """
+                INSERT INTO asset_recommendations (
+                    id, "baseAsset", "recommendedAsset", "similarityScore", support, confidence,
+                    "usersWithBoth", "usersWithBase", "percentageAlsoInvest", "recommendationStrength",
+                    "createdAt", "updatedAt"
+                ) VALUES %s
+                ON CONFLICT ("baseAsset", "recommendedAsset") DO UPDATE SET
+                    "similarityScore" = EXCLUDED."similarityScore",
+                    support = EXCLUDED.support,
+                    confidence = EXCLUDED.confidence,
+                    "usersWithBoth" = EXCLUDED."usersWithBoth",
+                    "usersWithBase" = EXCLUDED."usersWithBase",
+                    "percentageAlsoInvest" = EXCLUDED."percentageAlsoInvest",
+                    "recommendationStrength" = EXCLUDED."recommendationStrength",
+                    "updatedAt" = EXCLUDED."updatedAt"
+                WHERE (
+                    asset_recommendations."similarityScore", asset_recommendations.support,
+                    asset_recommendations.confidence, asset_recommendations."usersWithBoth",
+                    asset_recommendations."usersWithBase", asset_recommendations."percentageAlsoInvest",
+                    asset_recommendations."recommendationStrength"
+                ) IS DISTINCT FROM (
+                    EXCLUDED."similarityScore", EXCLUDED.support, EXCLUDED.confidence,
+                    EXCLUDED."usersWithBoth", EXCLUDED."usersWithBase",
+                    EXCLUDED."percentageAlsoInvest", EXCLUDED."recommendationStrength"
+                )
+                RETURNING 1
+            """, rows, page_size=self.config["batch_size"], fetch=True)
+            upserted = len(changed)
+        
+        if base_assets is None:
+            cur.execute('SELECT "baseAsset", "recommendedAsset" FROM asset_recommendations')
+        else:
+            cur.execute("""
+                SELECT "baseAsset", "recommendedAsset" FROM asset_recommendations
+                WHERE "baseAsset" = ANY(%s)
+            """, (base_assets,))
+        
+        new_keys = {(rec["base_asset"], rec["recommended_asset"]) for rec in recommendations}
+        stale_keys = [key for key in cur.fetchall() if tuple(key) not in new_keys]
+        if stale_keys:
+            execute_values(cur, """
+                DELETE FROM asset_recommendations r
+                USING (VALUES %s) AS stale(base, recommended)
+                WHERE r."baseAsset" = stale.base AND r."recommendedAsset" = stale.recommended
+            """, stale_keys, page_size=self.config["batch_size"])
+        
+        return upserted, len(stale_keys)
+    
+    def _calculate_asset_cooccurrence(self, wallets: Iterable[Sequence[int]],
+                                      interner: TickerInterner) -> CooccurrenceResult:
         """
         Calculate how often assets appear together in wallets
         """
-        self.logger.info("🔢 Starting asset co-occurrence calculation...")
+        engine_name = self.config["cooccurrence_engine"]
+        if engine_name not in COOCCURRENCE_ENGINES:
+            raise ValueError(f"Unknown co-occurrence engine: {engine_name}")
         
-        # Track individual asset occurrences
-        asset_users = defaultdict(set)  # asset -> set of user_ids
-        asset_cooccurrence = defaultdict(lambda: {
-            "users_with_both": set()
-        })
+        self.logger.info(f"🔢 Starting asset co-occurrence calculation ({engine_name} engine)...")
         
-        self.logger.info("📊 First pass: collecting asset-user relationships...")
-        # First pass: collect all asset-user relationships
-        for wallet in wallets_data:
-            user_id = wallet["user_id"]
-            tickers = [asset["ticker"] for asset in wallet["assets"]]
-            
-            # Track which users have each asset
-            for ticker in tickers:
-                asset_users[ticker].add(user_id)
-            
-            # Track co-occurrences (users who have both assets)
-            for i, ticker1 in enumerate(tickers):
-                for ticker2 in tickers[i+1:]:
-                    # Ensure consistent ordering
-                    pair = tuple(sorted([ticker1, ticker2]))
-                    asset_cooccurrence[pair]["users_with_both"].add(user_id)
-        
-        self.logger.info(f"📈 Found {len(asset_users)} unique assets")
+        engine_options = {}
+        if engine_name == "minhash":
+            engine_options = {
+                "num_perm": self.config["minhash_num_perm"],
+                "bands": self.config["minhash_bands"],
+                "min_similarity": self.config["min_similarity_threshold"],
+                "min_recall": self.config["minhash_min_recall"]
+            }
+        elif engine_name == "parallel":
+            engine_options = {"workers": self.config["cooccurrence_workers"]}
+        
+        result = COOCCURRENCE_ENGINES[engine_name](wallets, interner, **engine_options)
+        asset_cooccurrence = result.pairs
+        
+        self.logger.info(f"📈 Found {len(result.holders)} unique assets")
         self.logger.info(f"🔗 Found {len(asset_cooccurrence)} asset pairs")
         
         # Log top assets by user count
-        top_assets = sorted(asset_users.items(), key=lambda x: len(x[1]), reverse=True)[:10]
+        top_assets = sorted(result.holders.items(), key=lambda x: x[1], reverse=True)[:10]
         self.logger.info("🏆 Top 10 most held assets:")
         for i, (asset, users) in enumerate(top_assets):
-            self.logger.info(f"  {i+1}. {asset}: {len(users)} users")
-        
-        self.logger.info("🧮 Second pass: calculating similarity metrics...")
-        # Second pass: calculate metrics for each pair
-        processed_pairs = 0
-        for pair, data in asset_cooccurrence.items():
-            ticker1, ticker2 = pair
-            
-            users_with_first = asset_users[ticker1]
-            users_with_second = asset_users[ticker2]
-            users_with_both = data["users_with_both"]
-            
-            data["users_with_first"] = users_with_first
-            data["users_with_second"] = users_with_second
-            data["total_wallets_with_first"] = len(users_with_first)
-            data["total_wallets_with_second"] = len(users_with_second)
-            
-            # Calculate similarity metrics
-            data["jaccard_similarity"] = self._calculate_jaccard_similarity(
-                users_with_both,
-                users_with_first,
-                users_with_second
-            )
-            
-            data["support"] = len(users_with_both) / len(wallets_data)
-            data["confidence_first_to_second"] = len(users_with_both) / len(users_with_first) if users_with_first else 0
-            data["confidence_second_to_first"] = len(users_with_both) / len(users_with_second) if users_with_second else 0
-            
-            processed_pairs += 1
-            if processed_pairs % 100 == 0:
-                self.logger.debug(f"  Processed {processed_pairs}/{len(asset_cooccurrence)} pairs...")
+            self.logger.info(f"  {i+1}. {asset}: {users} users")
         
         # Log some interesting pairs
         interesting_pairs = sorted(
@@ -236,80 +460,85 @@ class WalletSimilarityAgent(BaseAgent):
             self.logger.info(
                 f"  {i+1}. {ticker1} ↔ {ticker2}: "
                 f"Jaccard={metrics['jaccard_similarity']:.3f}, "
-                f"Users with both={len(metrics['users_with_both'])}"
+                f"Users with both={metrics['users_with_both']}"
             )
         
-        return dict(asset_cooccurrence)
-    
-    def _calculate_jaccard_similarity(self, both: set, first: set, second: set) -> float:
-        """
-        Calculate Jaccard similarity coefficient
-        """
-        union_size = len(first.union(second))
-        if union_size == 0:
-            return 0.0
-        return len(both) / union_size
+        return result
     
-    def _generate_recommendations(self, asset_cooccurrence: Dict[Tuple[str, str], Dict[str, Any]], wallets_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _generate_recommendations(self, asset_cooccurrence: Dict[Tuple[str, str], Dict[str, Any]],
+                                  base_assets: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
         """
-        Generate asset recommendations based on similarity analysis
+        Generate asset recommendations based on similarity analysis, keeping only
+        the max_recommendations_per_asset strongest per base asset. Pairs are
+        streamed through one bounded min-heap per base asset, so memory and
+        output scale with assets x K instead of with the number of pairs.
+        base_assets restricts which base assets get recommendations.
         """
         self.logger.info("💡 Starting recommendation generation...")
         self.logger.info(f"🎯 Using thresholds: similarity >= {self.config['min_similarity_threshold']}, min_users >= {self.config['min_users_for_recommendation']}")
         
-        recommendations = []
+        max_per_asset = self.config["max_recommendations_per_asset"]
+        wanted_bases = set(base_assets) if base_assets is not None else None
+        
+        # base asset -> min-heap of (strength, recommended asset, recommendation)
+        top_k: Dict[str, List[Tuple[float, str, Dict[str, Any]]]] = {}
+        candidates = 0
         filtered_out = 0
         
         for pair, metrics in asset_cooccurrence.items():
             ticker1, ticker2 = pair
             
             # Filter by minimum thresholds
-            users_with_both_count = len(metrics["users_with_both"])
+            users_with_both_count = metrics["users_with_both"]
             
-            if (metrics["jaccard_similarity"] >= self.config["min_similarity_threshold"] and
-                users_with_both_count >= self.config["min_users_for_recommendation"]):
-                
-                self.logger.debug(f"✅ Processing pair {ticker1} ↔ {ticker2}: {users_with_both_count} users, similarity={metrics['jaccard_similarity']:.3f}")
-                
-                # Create bidirectional recommendations with proper confidence calculations
-                
-                # Recommendation 1: ticker1 -> ticker2
-                confidence_1_to_2 = metrics["confidence_first_to_second"]
-                if confidence_1_to_2 > 0:  # Only add if there's actual confidence
-                    self.logger.debug(f"  📈 {ticker1} → {ticker2}: {confidence_1_to_2*100:.1f}% confidence")
-                    recommendations.append({
-                        "base_asset": ticker1,
-                        "recommended_asset": ticker2,
-                        "similarity_score": metrics["jaccard_similarity"],
-                        "support": metrics["support"],
-                        "confidence": confidence_1_to_2,
-                        "users_with_both": users_with_both_count,
-                        "users_with_base": metrics["total_wallets_with_first"],
-                        "percentage_also_invest": round(confidence_1_to_2 * 100, 2),
-                        "recommendation_strength": self._calculate_recommendation_strength(metrics, confidence_1_to_2)
-                    })
-                
-                # Recommendation 2: ticker2 -> ticker1
-                confidence_2_to_1 = metrics["confidence_second_to_first"]
-                if confidence_2_to_1 > 0:  # Only add if there's actual confidence
-                    self.logger.debug(f"  📈 {ticker2} → {ticker1}: {confidence_2_to_1*100:.1f}% confidence")
-                    recommendations.append({
-                        "base_asset": ticker2,
-                        "recommended_asset": ticker1,
-                        "similarity_score": metrics["jaccard_similarity"],
-                        "support": metrics["support"],
-                        "confidence": confidence_2_to_1,
-                        "users_with_both": users_with_both_count,
-                        "users_with_base": metrics["total_wallets_with_second"],
-                        "percentage_also_invest": round(confidence_2_to_1 * 100, 2),
-                        "recommendation_strength": self._calculate_recommendation_strength(metrics, confidence_2_to_1)
-                    })
-            else:
+            if not (metrics["jaccard_similarity"] >= self.config["min_similarity_threshold"] and
+                    users_with_both_count >= self.config["min_users_for_recommendation"]):
                 filtered_out += 1
                 if filtered_out <= 5:  # Only log first few filtered pairs
                     self.logger.debug(f"❌ Filtered out {ticker1} ↔ {ticker2}: similarity={metrics['jaccard_similarity']:.3f}, users={users_with_both_count}")
+                continue
+            
+            # Bidirectional recommendations: ticker1 -> ticker2 and ticker2 -> ticker1
+            directions = (
+                (ticker1, ticker2, metrics["confidence_first_to_second"], metrics["total_wallets_with_first"]),
+                (ticker2, ticker1, metrics["confidence_second_to_first"], metrics["total_wallets_with_second"])
+            )
+            for base, recommended, confidence, users_with_base in directions:
+                if confidence <= 0:  # Only add if there's actual confidence
+                    continue
+                if wanted_bases is not None and base not in wanted_bases:
+                    continue
+                
+                candidates += 1
+                strength = self._calculate_recommendation_strength(metrics, confidence)
+                heap = top_k.setdefault(base, [])
+                entry = (strength, recommended)
+                
+                # Only build the row when it makes it into the base asset's top K
+                if max_per_asset and len(heap) >= max_per_asset and entry <= heap[0][:2]:
+                    continue
+                
+                recommendation = {
+                    "base_asset": base,
+                    "recommended_asset": recommended,
+                    "similarity_score": metrics["jaccard_similarity"],
+                    "support": metrics["support"],
+                    "confidence": confidence,
+                    "users_with_both": users_with_both_count,
+                    "users_with_base": users_with_base,
+                    "percentage_also_invest": round(confidence * 100, 2),
+                    "recommendation_strength": strength
+                }
+                if max_per_asset and len(heap) >= max_per_asset:
+                    heapq.heapreplace(heap, (strength, recommended, recommendation))
+                else:
+                    heapq.heappush(heap, (strength, recommended, recommendation))
         
-        self.logger.info(f"📊 Generated {len(recommendations)} recommendations, filtered out {filtered_out} pairs")
+        recommendations = [rec for heap in top_k.values() for _, _, rec in heap]
+        self.logger.info(
+            f"📊 Kept {len(recommendations)} of {candidates} candidate recommendations "
+            f"(top {max_per_asset} per asset across {len(top_k)} assets), filtered out {filtered_out} pairs"
+        )
         
         # Sort by recommendation strength
         recommendations.sort(key=lambda x: x["recommendation_strength"], reverse=True)
@@ -342,71 +571,66 @@ class WalletSimilarityAgent(BaseAgent):
             confidence * confidence_weight
         )
     
+    RECOMMENDATION_COLUMNS = (
+        "id", "baseAsset", "recommendedAsset", "similarityScore", "support", "confidence",
+        "usersWithBoth", "usersWithBase", "percentageAlsoInvest", "recommendationStrength",
+        "createdAt", "updatedAt"
+    )
+    USER_RECOMMENDATION_COLUMNS = ("userId", "assets", "recommendations", "updatedAt")
+    
+    # Tables rebuilt through a shadow copy: primary key column and unique
+    # indexes (name suffix -> columns) recreated on the shadow after loading
+    SHADOW_TABLE_SPECS = {
+        "asset_recommendations": {
+            "primary_key": "id",
+            "unique_indexes": {"baseAsset_recommendedAsset_key": ("baseAsset", "recommendedAsset")}
+        },
+        "user_recommendations": {
+            "primary_key": "userId",
+            "unique_indexes": {}
+        }
+    }
+    
     def _save_recommendations(self, recommendations: List[Dict[str, Any]]) -> int:
         """
-        Save recommendations to database and sync with Next.js API
+        Bulk-load recommendations into a shadow table and swap it in atomically,
+        so API readers never see a half-written or empty table
         """
         if not recommendations:
             self.logger.warning("⚠️ No recommendations to save")
             return 0
         
         self.logger.info("🔗 Connecting to database for saving recommendations...")
-        conn = psycopg2.connect(self.db_url)
-        cur = conn.cursor()
-        
-        try:
-            self.logger.info("🏗️ Creating asset_recommendations table if not exists...")
-            # Create table if not exists
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS asset_recommendations (
-                    id TEXT PRIMARY KEY,
-                    "baseAsset" VARCHAR(10) NOT NULL,
-                    "recommendedAsset" VARCHAR(10) NOT NULL,
-                    "similarityScore" DECIMAL(5,4) NOT NULL,
-                    support DECIMAL(5,4) NOT NULL,
-                    confidence DECIMAL(5,4) NOT NULL,
-                    "usersWithBoth" INTEGER NOT NULL,
-                    "usersWithBase" INTEGER NOT NULL,
-                    "percentageAlsoInvest" DECIMAL(5,2) NOT NULL,
-                    "recommendationStrength" DECIMAL(5,4) NOT NULL,
-                    "createdAt" TIMESTAMP NOT NULL,
-                    "updatedAt" TIMESTAMP NOT NULL,
-                    UNIQUE("baseAsset", "recommendedAsset")
-                );
-            """)
-            self.logger.debug("✅ Table creation/verification completed")
-            
-            # Clear old recommendations
-            self.logger.info("🗑️ Clearing old recommendations...")
-            cur.execute("DELETE FROM asset_recommendations")
-            deleted_count = cur.rowcount
-            self.logger.info(f"🗑️ Deleted {deleted_count} old recommendations")
-            
-            # Insert new recommendations
-            insert_query = """
-                INSERT INTO asset_recommendations (
-                    id, "baseAsset", "recommendedAsset", "similarityScore", support, confidence,
-                    "usersWithBoth", "usersWithBase", "percentageAlsoInvest", "recommendationStrength",
-                    "createdAt", "updatedAt"
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            batch_size = self.config["batch_size"]
-            saved_count = 0
-            total_batches = (len(recommendations) + batch_size - 1) // batch_size
-            self.logger.info(f"💾 Saving {len(recommendations)} recommendations in {total_batches} batches of {batch_size}...")
-            
-            from datetime import datetime
-            current_time = datetime.now()
-            
-            for i in range(0, len(recommendations), batch_size):
-                batch = recommendations[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                self.logger.debug(f"  💾 Saving batch {batch_num}/{total_batches} ({len(batch)} items)...")
+        with self._db_connection() as conn:
+            cur = conn.cursor()
+            
+            try:
+                self.logger.info("🏗️ Creating asset_recommendations table if not exists...")
+                # Create table if not exists
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS asset_recommendations (
+                        id TEXT PRIMARY KEY,
+                        "baseAsset" VARCHAR(10) NOT NULL,
+                        "recommendedAsset" VARCHAR(10) NOT NULL,
+                        "similarityScore" DECIMAL(5,4) NOT NULL,
+                        support DECIMAL(5,4) NOT NULL,
+                        confidence DECIMAL(5,4) NOT NULL,
+                        "usersWithBoth" INTEGER NOT NULL,
+                        "usersWithBase" INTEGER NOT NULL,
+                        "percentageAlsoInvest" DECIMAL(5,2) NOT NULL,
+                        "recommendationStrength" DECIMAL(5,4) NOT NULL,
+                        "createdAt" TIMESTAMP NOT NULL,
+                        "updatedAt" TIMESTAMP NOT NULL,
+                        UNIQUE("baseAsset", "recommendedAsset")
+                    );
+                """)
+                conn.commit()
+                self.logger.debug("✅ Table creation/verification completed")
                 
-                batch_data = [
+                current_time = datetime.now()
+                rows = (
                     (
-                        str(uuid.uuid4()),  # Generate UUID for id
+                        str(uuid.uuid4()),
                         rec["base_asset"],
                         rec["recommended_asset"],
                         rec["similarity_score"],
@@ -419,30 +643,277 @@ class WalletSimilarityAgent(BaseAgent):
                         current_time,  # createdAt
                         current_time   # updatedAt
                     )
-                    for rec in batch
-                ]
+                    for rec in recommendations
+                )
                 
-                cur.executemany(insert_query, batch_data)
-                saved_count += len(batch_data)
-                self.logger.debug(f"  ✅ Batch {batch_num} saved successfully")
-            
-            conn.commit()
-            self.logger.info(f"✅ Successfully saved {saved_count} recommendations to database")
-            
-            # Also sync with Next.js API for easier frontend access
-            self.logger.info("🔄 Syncing with Next.js API...")
-            self._sync_with_nextjs_api(recommendations)
-            
-            return saved_count
-            
+                # Load the shadow table outside of any lock readers could wait on
+                self.logger.info(f"📥 Loading {len(recommendations)} recommendations into shadow table...")
+                saved_count = self._load_shadow_table(cur, "asset_recommendations", self.RECOMMENDATION_COLUMNS, rows)
+                conn.commit()
+                self.logger.info(f"✅ Loaded {saved_count} recommendations into shadow table")
+                
+                retired_table = self._swap_in_shadow_table(conn, cur, "asset_recommendations")
+                self.logger.info(f"🔀 Swapped new recommendations in, previous table retired as {retired_table}")
+                
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"❌ Error saving recommendations: {str(e)}")
+                raise
+            finally:
+                self.logger.debug("🔒 Releasing database connection")
+                cur.close()
+        
+        self._start_retired_cleanup("asset_recommendations")
+        
+        # Also sync with Next.js API for easier frontend access
+        self.logger.info("🔄 Syncing with Next.js API...")
+        self._sync_with_nextjs_api(recommendations)
+        
+        return saved_count
+    
+    def _ensure_user_recommendations_table(self, cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS user_recommendations (
+                "userId" TEXT PRIMARY KEY,
+                assets TEXT[],
+                recommendations JSONB NOT NULL,
+                "updatedAt" TIMESTAMP(3) NOT NULL
+            );
+        """)
+    
+    def _save_user_recommendations(self, recommendations: List[Dict[str, Any]]) -> int:
+        """
+        Precompute every user's top-N recommended assets from the asset
+        recommendations and swap them in as user_recommendations, so the
+        personalised endpoint is a single primary-key lookup
+        """
+        recommendations_by_base = group_by_base(recommendations)
+        limit = self.config["max_recommendations_per_user"]
+        current_time = datetime.now()
+        
+        self.logger.info(f"👤 Precomputing top {limit} recommendations per user...")
+        # Users are streamed on one connection while COPY writes on another
+        with self._db_connection() as read_conn, self._db_connection() as conn:
+            cur = conn.cursor()
+            
+            try:
+                self._ensure_user_recommendations_table(cur)
+                conn.commit()
+                
+                with read_conn.cursor(name="wallet_similarity_users") as user_cur:
+                    user_cur.itersize = self.config["stream_itersize"]
+                    user_cur.execute("""
+                        SELECT w."userId", array_agg(a.ticker ORDER BY a.ticker)
+                        FROM wallets w
+                        JOIN assets a ON a."walletId" = w.id
+                        WHERE a.quantity > 0
+                        GROUP BY w."userId"
+                    """)
+                    rows = (
+                        (
+                            user_id,
+                            array_literal(tickers),
+                            json.dumps(rank_for_user(tickers, recommendations_by_base, limit)),
+                            current_time
+                        )
+                        for user_id, tickers in user_cur
+                    )
+                    saved_count = self._load_shadow_table(
+                        cur, "user_recommendations", self.USER_RECOMMENDATION_COLUMNS, rows
+                    )
+                conn.commit()
+                self.logger.info(f"✅ Loaded recommendations for {saved_count} users into shadow table")
+                
+                retired_table = self._swap_in_shadow_table(conn, cur, "user_recommendations")
+                self.logger.info(f"🔀 Swapped new user recommendations in, previous table retired as {retired_table}")
+                
+            except Exception as e:
+                conn.rollback()
+                self.logger.error(f"❌ Error saving user recommendations: {str(e)}")
+                raise
+            finally:
+                cur.close()
+        
+        self._start_retired_cleanup("user_recommendations")
+        return saved_count
+    
+    def _refresh_user_recommendations(self, cur, wallet_ids: List[str],
+                                      base_assets: Optional[List[str]]) -> int:
+        """
+        Recompute the lists of users whose wallets changed or who hold a
+        re-ranked base asset (every user when base_assets is None), writing
+        only the rows that differ
+        """
+        self._ensure_user_recommendations_table(cur)
+        
+        query = """
+            SELECT w."userId", array_agg(a.ticker ORDER BY a.ticker)
+            FROM wallets w
+            JOIN assets a ON a."walletId" = w.id
+            WHERE a.quantity > 0
+        """
+        params: Tuple = ()
+        if base_assets is not None:
+            query += """
+                AND (
+                    w.id = ANY(%s) OR
+                    w.id IN (SELECT "walletId" FROM assets WHERE ticker = ANY(%s) AND quantity > 0)
+                )
+            """
+            params = (wallet_ids, base_assets)
+        cur.execute(query + ' GROUP BY w."userId"', params)
+        users = cur.fetchall()
+        
+        held = sorted({ticker for _, tickers in users for ticker in tickers})
+        cur.execute("""
+            SELECT "baseAsset", "recommendedAsset", "similarityScore", support, confidence,
+                   "usersWithBoth", "usersWithBase", "percentageAlsoInvest", "recommendationStrength"
+            FROM asset_recommendations
+            WHERE "baseAsset" = ANY(%s)
+        """, (held,))
+        recommendations_by_base = group_by_base(
+            {
+                "base_asset": row[0],
+                "recommended_asset": row[1],
+                "similarity_score": float(row[2]),
+                "support": float(row[3]),
+                "confidence": float(row[4]),
+                "users_with_both": row[5],
+                "users_with_base": row[6],
+                "percentage_also_invest": float(row[7]),
+                "recommendation_strength": float(row[8])
+            }
+            for row in cur.fetchall()
+        )
+        
+        limit = self.config["max_recommendations_per_user"]
+        current_time = datetime.now()
+        rows = [
+            (
+                user_id,
+                tickers,
+                json.dumps(rank_for_user(tickers, recommendations_by_base, limit)),
+                current_time
+            )
+            for user_id, tickers in users
+        ]
+        
+        changed = []
+        if rows:
+            changed = execute_values(cur, """
+                INSERT INTO user_recommendations ("userId", assets, recommendations, "updatedAt")
+                VALUES %s
+                ON CONFLICT ("userId") DO UPDATE SET
+                    assets = EXCLUDED.assets,
+                    recommendations = EXCLUDED.recommendations,
+                    "updatedAt" = EXCLUDED."updatedAt"
+                WHERE (user_recommendations.assets, user_recommendations.recommendations)
+                    IS DISTINCT FROM (EXCLUDED.assets, EXCLUDED.recommendations)
+                RETURNING 1
+            """, rows, template="(%s, %s, %s::jsonb, %s)", page_size=self.config["batch_size"], fetch=True)
+        
+        # Users whose wallets no longer hold anything
+        cur.execute("""
+            DELETE FROM user_recommendations r
+            USING wallets w
+            WHERE r."userId" = w."userId" AND w.id = ANY(%s)
+              AND NOT EXISTS (SELECT 1 FROM assets a WHERE a."walletId" = w.id AND a.quantity > 0)
+        """, (wallet_ids,))
+        
+        return len(changed)
+    
+    def _load_shadow_table(self, cur, live: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Recreate the shadow of `live`, COPY the rows in and only then build its indexes
+        """
+        spec = self.SHADOW_TABLE_SPECS[live]
+        shadow = f"{live}_shadow"
+        
+        cur.execute(f"DROP TABLE IF EXISTS {shadow}")
+        cur.execute(f"CREATE TABLE {shadow} (LIKE {live} INCLUDING DEFAULTS)")
+        saved_count = copy_rows(cur, shadow, columns, rows)
+        
+        # Building indexes after the load is much cheaper than maintaining them row by row
+        cur.execute(f"""
+            ALTER TABLE {shadow}
+            ADD CONSTRAINT {shadow}_pkey PRIMARY KEY ("{spec['primary_key']}")
+        """)
+        for suffix, index_columns in spec["unique_indexes"].items():
+            column_list = ", ".join(f'"{column}"' for column in index_columns)
+            cur.execute(f'CREATE UNIQUE INDEX "{shadow}_{suffix}" ON {shadow} ({column_list})')
+        cur.execute(f"ANALYZE {shadow}")
+        return saved_count
+    
+    def _swap_in_shadow_table(self, conn, cur, live: str) -> str:
+        """
+        Rename the live table away and the shadow table into its place in one
+        short transaction. Index and constraint names are swapped too, so the
+        live table always carries the names the Prisma migrations expect.
+        """
+        shadow = f"{live}_shadow"
+        retired = f"{live}_retired_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        unique_indexes = self.SHADOW_TABLE_SPECS[live]["unique_indexes"]
+        
+        for attempt in range(1, self.config["swap_max_attempts"] + 1):
+            try:
+                # Renames need an exclusive lock; don't let a long-running reader
+                # make every other reader queue up behind us
+                cur.execute("SET LOCAL lock_timeout = %s", (f"{self.config['swap_lock_timeout_ms']}ms",))
+                cur.execute(f"LOCK TABLE {live}, {shadow} IN ACCESS EXCLUSIVE MODE")
+                
+                cur.execute(f"ALTER TABLE {live} RENAME TO {retired}")
+                cur.execute(f"ALTER TABLE {retired} RENAME CONSTRAINT {live}_pkey TO {retired}_pkey")
+                for n, suffix in enumerate(unique_indexes):
+                    cur.execute(f'ALTER INDEX "{live}_{suffix}" RENAME TO {retired}_key{n}')
+                
+                cur.execute(f"ALTER TABLE {shadow} RENAME TO {live}")
+                cur.execute(f"ALTER TABLE {live} RENAME CONSTRAINT {shadow}_pkey TO {live}_pkey")
+                for suffix in unique_indexes:
+                    cur.execute(f'ALTER INDEX "{shadow}_{suffix}" RENAME TO "{live}_{suffix}"')
+                conn.commit()
+                return retired
+                
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                if attempt == self.config["swap_max_attempts"]:
+                    raise
+                self.logger.warning(f"⏳ Readers still hold {live}, retrying swap ({attempt}/{self.config['swap_max_attempts']})...")
+                time.sleep(self.config["swap_retry_delay_seconds"])
+        
+        # Only reachable if swap_max_attempts was changed after construction
+        raise RuntimeError(f"Shadow table swap of {live} was never attempted (swap_max_attempts={self.config['swap_max_attempts']})")
+    
+    def _start_retired_cleanup(self, live: str):
+        # Dropping a retired table waits for readers still using it, so it
+        # happens off the agent's run
+        threading.Thread(target=self._drop_retired_tables, args=(live,), daemon=True).start()
+    
+    def _drop_retired_tables(self, live: str):
+        """
+        Drop tables retired by previous swaps of `live`. Tables still in use
+        by readers are left for the next run.
+        """
+        try:
+            with self._db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename LIKE %s",
+                        (f"{live}_retired_".replace("_", "\\_") + "%",)
+                    )
+                    retired_tables = [row[0] for row in cur.fetchall()]
+                    conn.commit()
+                    
+                    for table in retired_tables:
+                        try:
+                            cur.execute("SET LOCAL lock_timeout = %s", (f"{self.config['swap_lock_timeout_ms']}ms",))
+                            cur.execute(f"DROP TABLE IF EXISTS {table}")
+                            conn.commit()
+                            self.logger.info(f"🗑️ Dropped retired table {table}")
+                        except psycopg2.errors.LockNotAvailable:
+                            conn.rollback()
+                            self.logger.info(f"⏳ {table} still in use, will drop it on a later run")
         except Exception as e:
-            conn.rollback()
-            self.logger.error(f"❌ Error saving recommendations: {str(e)}")
-            raise
-        finally:
-            self.logger.debug("🔒 Closing database connection")
-            cur.close()
-            conn.close()
+            self.logger.warning(f"⚠️ Failed to drop retired {live} tables: {str(e)}")
     
     def _sync_with_nextjs_api(self, recommendations: List[Dict[str, Any]]):
         """
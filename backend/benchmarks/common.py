@@ -0,0 +1,108 @@
+"""
+Helpers shared by the benchmark scripts. Run the scripts from backend/, e.g.
+
+    python -m benchmarks.cooccurrence_engines --wallets 10000 100000
+
+The database benchmarks take a --dsn and never touch the tables the DSN
+normally points at: they apply the Prisma migrations to a scratch schema and
+run against that (see scratch_schema).
+"""
+import glob
+import os
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extensions import make_dsn
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "prisma", "migrations")
+
+
+def measure(fn: Callable[[], Any], trace_memory: bool = False) -> Tuple[Any, float, Optional[float]]:
+    """
+    Run fn once, returning (result, seconds, peak traced MB). Tracing memory
+    slows Python-heavy code several times over, so it is opt-in and the
+    timings of traced runs are not comparable with untraced ones.
+    """
+    if not trace_memory:
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start, None
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def synthetic_wallets(count: int, universe: int = 1500, mean_size: int = 8, seed: int = 1) -> List[List[str]]:
+    """
+    Wallets with Zipf-like ticker popularity (a few blue chips held by most
+    wallets, a long tail held by few), like the production assets table
+    """
+    rng = random.Random(seed)
+    tickers = [f"T{i:04d}3" for i in range(universe)]
+    cumulative = []
+    total = 0.0
+    for rank in range(universe):
+        total += 1 / (rank + 1)
+        cumulative.append(total)
+
+    wallets = []
+    for _ in range(count):
+        size = max(1, int(rng.expovariate(1 / mean_size)))
+        wallets.append(sorted(set(rng.choices(tickers, cum_weights=cumulative, k=size))))
+    return wallets
+
+
+@contextmanager
+def scratch_schema(dsn: str, schema: str, ddl: str = "", keep: bool = False) -> Iterator[str]:
+    """
+    Create `schema` with every Prisma migration (plus `ddl`) applied and yield
+    a DSN whose search_path points at it, so the code under test reads and
+    writes scratch tables under their production names. The schema is
+    dropped on exit unless keep is set.
+    """
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+            cur.execute(f'CREATE SCHEMA "{schema}"')
+            cur.execute(f'SET search_path TO "{schema}", public')
+            for migration in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*", "migration.sql"))):
+                with open(migration, encoding="utf-8") as f:
+                    cur.execute(f.read())
+            if ddl:
+                cur.execute(ddl)
+
+        yield make_dsn(dsn, options=f"-c search_path={schema},public")
+    finally:
+        if not keep:
+            with conn.cursor() as cur:
+                cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        conn.close()
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(_format(row[c])) for row in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(_format(row[c]).ljust(widths[c]) for c in columns))
+
+
+def _format(value: Any) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
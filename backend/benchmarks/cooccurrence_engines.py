@@ -0,0 +1,42 @@
+"""
+Time and peak memory of the co-occurrence engines on synthetic wallets.
+
+    python -m benchmarks.cooccurrence_engines --wallets 10000 100000 1000000 [--memory]
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, synthetic_wallets
+from lib.cooccurrence import COOCCURRENCE_ENGINES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wallets", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--engines", nargs="+", default=["python", "sparse", "parallel"],
+                        choices=sorted(COOCCURRENCE_ENGINES))
+    parser.add_argument("--universe", type=int, default=1500, help="distinct tickers")
+    parser.add_argument("--memory", action="store_true", help="also trace peak memory (slower)")
+    args = parser.parse_args()
+
+    rows = []
+    for count in args.wallets:
+        wallets = synthetic_wallets(count, args.universe)
+        for engine in args.engines:
+            result, seconds, peak_mb = measure(
+                lambda: COOCCURRENCE_ENGINES[engine](wallets), args.memory
+            )
+            rows.append({
+                "wallets": count,
+                "engine": engine,
+                "pairs": len(result.pairs),
+                "seconds": seconds,
+                "peak_mb": peak_mb
+            })
+            print(f"{count} wallets, {engine}: {seconds:.2f}s", flush=True)
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Accuracy, time and memory of the approximate MinHash/LSH engine against the
+exact (sparse) engine on Zipf-like synthetic wallets.
+
+    python -m benchmarks.minhash_accuracy --wallets 10000 100000 [--threshold 0.05] [--signatures 128 256 128:64] [--memory]
+
+Recall and precision are over the pairs whose Jaccard similarity is at least
+--threshold (min_similarity_threshold); the error is the mean absolute
+difference of the estimated Jaccard on the pairs both engines kept.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, synthetic_wallets
+from lib.cooccurrence import lsh_bands, minhash_cooccurrence, sparse_cooccurrence
+
+
+def above(pairs, threshold: float):
+    return {pair: metrics["jaccard_similarity"] for pair, metrics in pairs.items()
+            if metrics["jaccard_similarity"] >= threshold}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wallets", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--universe", type=int, default=1500, help="distinct tickers")
+    parser.add_argument("--threshold", type=float, default=0.05, help="min_similarity_threshold")
+    parser.add_argument("--signatures", nargs="+", default=["128", "256"],
+                        help="num_perm[:bands] settings of the minhash engine; bands default to the "
+                             "value derived from --threshold")
+    parser.add_argument("--memory", action="store_true", help="also trace peak memory (slower)")
+    args = parser.parse_args()
+
+    rows = []
+    for count in args.wallets:
+        wallets = synthetic_wallets(count, args.universe)
+        exact, seconds, peak_mb = measure(lambda: sparse_cooccurrence(wallets), args.memory)
+        expected = above(exact.pairs, args.threshold)
+        rows.append({
+            "wallets": count, "engine": "exact", "pairs": len(expected),
+            "recall": 1.0, "precision": 1.0, "mean_abs_error": 0.0,
+            "seconds": seconds, "peak_mb": peak_mb
+        })
+
+        for setting in args.signatures:
+            num_perm, _, bands = setting.partition(":")
+            num_perm, bands = int(num_perm), int(bands) if bands else lsh_bands(int(num_perm), args.threshold)
+            approximate, seconds, peak_mb = measure(
+                lambda: minhash_cooccurrence(wallets, num_perm=num_perm, bands=bands,
+                                             min_similarity=args.threshold), args.memory
+            )
+            found = above(approximate.pairs, args.threshold)
+            both = expected.keys() & found.keys()
+            rows.append({
+                "wallets": count,
+                "engine": f"minhash {num_perm}/{bands}",
+                "pairs": len(found),
+                "recall": len(both) / len(expected) if expected else 1.0,
+                "precision": len(both) / len(found) if found else 1.0,
+                "mean_abs_error": sum(abs(found[p] - expected[p]) for p in both) / len(both) if both else 0.0,
+                "seconds": seconds,
+                "peak_mb": peak_mb
+            })
+            print(f"{count} wallets, minhash {setting}: {seconds:.2f}s", flush=True)
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Rows per second of news ingestion: the old per-row INSERT on a fresh
+connection per batch vs salvar_noticias_no_postgres (pooled connection,
+one multi-row INSERT per batch, news_tickers and news_fingerprints included).
+
+    python -m benchmarks.news_ingest --dsn postgresql://localhost/bench [--articles 10000] [--batch-size 50]
+
+Runs in a scratch schema that is dropped at the end.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from benchmarks.common import measure, print_table, scratch_schema
+from lib.db import salvar_noticias_no_postgres
+from lib.db_pool import DatabasePool, set_default_pool
+
+TICKERS = ["PETR4", "VALE3", "ITUB4", "BBDC4", "WEGE3", "MGLU3", "HGLG11", "MXRF11", "KNRI11", "BBAS3"]
+
+
+def synthetic_news(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            "title": f"Notícia sintética {i}",
+            "summary": "Resumo " * 20,
+            "content": "Conteúdo da notícia. " * 150,
+            "imageUrl": f"https://example.com/img/{i}.jpg",
+            "source": rng.choice(["InfoMoney", "MoneyTimes", "Investidor10"]),
+            "sourceUrl": f"https://example.com/noticia/{i}",
+            "publishedAt": (start + timedelta(minutes=i)).isoformat(),
+            "category": rng.choice(["ACOES", "FII"]),
+            "tags": [],
+            "tickers": rng.sample(TICKERS, rng.randint(0, 3)),
+            "fingerprint": rng.randrange(-(1 << 63), 1 << 63)
+        }
+        for i in range(count)
+    ]
+
+
+def per_row_insert(dsn: str, noticias):
+    """The ingestion path before the bulk insert: one connection per batch, one INSERT per row"""
+    conn = psycopg2.connect(dsn)
+    cur = conn.cursor()
+    for noticia in noticias:
+        cur.execute("""
+            INSERT INTO news (
+                id, title, summary, content, "imageUrl", source, "sourceUrl",
+                "publishedAt", "createdAt", "updatedAt", category, tags, tickers
+            ) VALUES (
+                gen_random_uuid(), %s, %s, %s, %s, %s, %s,
+                %s, NOW(), NOW(), %s, %s, %s
+            )
+            ON CONFLICT ("sourceUrl") DO NOTHING
+        """, (
+            noticia["title"], noticia["summary"], noticia["content"], noticia["imageUrl"],
+            noticia["source"], noticia["sourceUrl"], noticia["publishedAt"], noticia["category"],
+            noticia["tags"], noticia["tickers"]
+        ))
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def in_batches(save, noticias, batch_size: int):
+    for i in range(0, len(noticias), batch_size):
+        save(noticias[i:i + batch_size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", required=True, help="PostgreSQL database to create the scratch schema in")
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=50, help="NewsScraperAgent batch_size")
+    parser.add_argument("--schema", default="benchmark_news_ingest")
+    args = parser.parse_args()
+
+    noticias = synthetic_news(args.articles)
+    runs = [
+        ("per-row insert", lambda dsn: lambda batch: per_row_insert(dsn, batch)),
+        ("bulk insert", lambda dsn: salvar_noticias_no_postgres),
+        # Second pass over the same articles: every row conflicts, as on a re-scrape
+        ("bulk insert, all skipped", lambda dsn: salvar_noticias_no_postgres),
+    ]
+
+    rows = []
+    with scratch_schema(args.dsn, args.schema) as dsn:
+        pool = DatabasePool(dsn, minconn=1, maxconn=4)
+        set_default_pool(pool)
+
+        with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+            for name, make_save in runs:
+                if name != "bulk insert, all skipped":
+                    cur.execute("TRUNCATE news CASCADE")
+                    conn.commit()
+
+                _, seconds, _ = measure(lambda: in_batches(make_save(dsn), noticias, args.batch_size))
+                cur.execute("SELECT COUNT(*) FROM news")
+                stored = cur.fetchone()[0]
+                conn.commit()
+                rows.append({
+                    "path": name,
+                    "articles": len(noticias),
+                    "stored": stored,
+                    "seconds": seconds,
+                    "rows_per_s": len(noticias) / seconds
+                })
+                print(f"{name}: {seconds:.2f}s", flush=True)
+
+        pool.closeall()
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Latency of "latest news for these tickers" on a synthetic news table:
+`tickers && ARRAY[...]` on news.tickers (the old hasSome filter) vs the
+news_tickers index table (the query Prisma issues for tickerIndex.some).
+
+    python -m benchmarks.news_ticker_lookup --dsn postgresql://localhost/bench [--rows 1000000] [--queries 200]
+
+Runs in a scratch schema that is dropped at the end unless --keep is given.
+"""
+import argparse
+import random
+import statistics
+import time
+
+import psycopg2
+
+from benchmarks.common import print_table, scratch_schema
+
+UNIVERSE = 1500
+
+# Popularity is skewed towards low ticker numbers, like real coverage
+LOAD_NEWS = """
+    INSERT INTO news (
+        id, title, summary, content, source, "sourceUrl",
+        "publishedAt", "createdAt", "updatedAt", category, tags, tickers
+    )
+    SELECT
+        gen_random_uuid()::text,
+        'Notícia sintética ' || g,
+        'Resumo',
+        repeat(md5(g::text), %(content_bytes)s / 32),
+        'Benchmark',
+        'https://example.com/noticia/' || g,
+        TIMESTAMP '2026-01-01' + g * INTERVAL '30 seconds',
+        NOW(), NOW(),
+        (CASE WHEN g %% 2 = 0 THEN 'ACOES' ELSE 'FII' END)::"Category",
+        '{}',
+        ARRAY(
+            SELECT DISTINCT 'T' || lpad(floor(%(universe)s * power(random(), 3))::int::text, 4, '0') || '3'
+            FROM generate_series(1, floor(random() * 4)::int + g * 0)
+        )
+    FROM generate_series(1, %(rows)s) AS g
+"""
+
+INDEX_TICKERS = """
+    INSERT INTO news_tickers (ticker, "newsId", "publishedAt")
+    SELECT DISTINCT t.ticker, n.id, n."publishedAt"
+    FROM news n CROSS JOIN LATERAL unnest(n.tickers) AS t(ticker)
+"""
+
+QUERIES = {
+    "array overlap": (
+        """SELECT id, title, "publishedAt" FROM news WHERE tickers && %(tickers)s
+           ORDER BY "publishedAt" DESC LIMIT 20""",
+        "SELECT COUNT(*) FROM news WHERE tickers && %(tickers)s"
+    ),
+    "news_tickers": (
+        """SELECT id, title, "publishedAt" FROM news
+           WHERE id IN (SELECT "newsId" FROM news_tickers WHERE ticker = ANY(%(tickers)s))
+           ORDER BY "publishedAt" DESC LIMIT 20""",
+        """SELECT COUNT(*) FROM news
+           WHERE id IN (SELECT "newsId" FROM news_tickers WHERE ticker = ANY(%(tickers)s))"""
+    ),
+}
+
+
+def ticker_sets(count: int, size: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        [f"T{int(UNIVERSE * rng.random() ** 3):04d}3" for _ in range(size)]
+        for _ in range(count)
+    ]
+
+
+def timed(cur, query: str, tickers):
+    start = time.perf_counter()
+    cur.execute(query, {"tickers": tickers})
+    rows = cur.fetchall()
+    return (time.perf_counter() - start) * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", required=True, help="PostgreSQL database to create the scratch schema in")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--content-bytes", type=int, default=1024, help="body size, to keep row width realistic")
+    parser.add_argument("--queries", type=int, default=200, help="ticker sets per wallet size")
+    parser.add_argument("--wallet-sizes", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--schema", default="benchmark_news_ticker_lookup")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema for inspection")
+    args = parser.parse_args()
+
+    rows = []
+    with scratch_schema(args.dsn, args.schema, keep=args.keep) as dsn:
+        conn = psycopg2.connect(dsn)
+        conn.autocommit = True
+        cur = conn.cursor()
+
+        start = time.perf_counter()
+        cur.execute(LOAD_NEWS, {"rows": args.rows, "universe": UNIVERSE, "content_bytes": args.content_bytes})
+        cur.execute(INDEX_TICKERS)
+        cur.execute("VACUUM ANALYZE news")
+        cur.execute("VACUUM ANALYZE news_tickers")
+        print(f"Loaded {args.rows} news in {time.perf_counter() - start:.0f}s", flush=True)
+
+        for size in args.wallet_sizes:
+            sets = ticker_sets(args.queries, size, seed=size)
+            for name, (page_query, count_query) in QUERIES.items():
+                latencies = []
+                for tickers in sets:
+                    page_ms, _ = timed(cur, page_query, tickers)
+                    count_ms, _ = timed(cur, count_query, tickers)
+                    latencies.append(page_ms + count_ms)
+                cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+                rows.append({
+                    "tickers": size,
+                    "query": name,
+                    "p50_ms": cuts[49],
+                    "p95_ms": cuts[94],
+                    "max_ms": max(latencies)
+                })
+                print(f"{size} tickers, {name}: p50 {cuts[49]:.1f} ms", flush=True)
+
+        conn.close()
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Runtime of the multi-process co-occurrence engine by worker count, against
+the single-process python engine it must match exactly.
+
+    python -m benchmarks.parallel_scaling --wallets 1000000 [--workers 1 2 4 8] [--shard-size 20000]
+"""
+import argparse
+import os
+
+from benchmarks.common import measure, print_table, synthetic_wallets
+from lib.cooccurrence import parallel_cooccurrence, python_cooccurrence
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wallets", type=int, default=1_000_000)
+    parser.add_argument("--universe", type=int, default=1500, help="distinct tickers")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--shard-size", type=int, default=20_000, help="wallets per worker task")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs", flush=True)
+    wallets = synthetic_wallets(args.wallets, args.universe)
+
+    baseline, baseline_seconds, _ = measure(lambda: python_cooccurrence(wallets))
+    rows = [{"engine": "python", "workers": 1, "seconds": baseline_seconds, "speedup": 1.0, "identical": True}]
+    print(f"python: {baseline_seconds:.2f}s", flush=True)
+
+    for workers in args.workers:
+        result, seconds, _ = measure(
+            lambda: parallel_cooccurrence(wallets, workers=workers, shard_size=args.shard_size)
+        )
+        rows.append({
+            "engine": "parallel",
+            "workers": workers,
+            "seconds": seconds,
+            "speedup": baseline_seconds / seconds,
+            "identical": result.pairs == baseline.pairs and result.holders == baseline.holders
+        })
+        print(f"parallel, {workers} workers: {seconds:.2f}s", flush=True)
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Latency of /api/recommendations reads while the recommendations are
+refreshed, with the old DELETE + reinsert transaction vs the shadow table
+swap of WalletSimilarityAgent._save_recommendations.
+
+    python -m benchmarks.recommendation_swap --dsn postgresql://localhost/bench [--assets 1500] [--per-asset 50] [--readers 8]
+
+Runs in a scratch schema that is dropped at the end.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import psycopg2
+
+from agents.wallet_similarity_agent import WalletSimilarityAgent
+from benchmarks.common import print_table, scratch_schema
+from lib.db_pool import DatabasePool
+
+# The query Prisma issues for GET /api/recommendations?baseAsset=...
+READ_QUERY = """
+    SELECT * FROM asset_recommendations
+    WHERE "baseAsset" = %s AND confidence >= 0.1
+    ORDER BY "recommendationStrength" DESC
+    LIMIT 10
+"""
+
+
+def synthetic_recommendations(assets: int, per_asset: int, seed: int):
+    rng = random.Random(seed)
+    tickers = [f"T{i:04d}3" for i in range(assets)]
+    recommendations = []
+    for base in tickers:
+        others = [ticker for ticker in rng.sample(tickers, per_asset + 1) if ticker != base]
+        for recommended in others[:per_asset]:
+            confidence = round(rng.random(), 4)
+            recommendations.append({
+                "base_asset": base,
+                "recommended_asset": recommended,
+                "similarity_score": round(rng.random(), 4),
+                "support": round(rng.random() / 10, 4),
+                "confidence": confidence,
+                "users_with_both": rng.randint(5, 500),
+                "users_with_base": rng.randint(500, 5000),
+                "percentage_also_invest": round(confidence * 100, 2),
+                "recommendation_strength": round(rng.random(), 4)
+            })
+    return tickers, recommendations
+
+
+def delete_and_reinsert(dsn: str, recommendations):
+    """The save path before the swap: one transaction deleting every row and reinserting in batches"""
+    now = datetime.now()
+    rows = [
+        (str(uuid.uuid4()), r["base_asset"], r["recommended_asset"], r["similarity_score"], r["support"],
+         r["confidence"], r["users_with_both"], r["users_with_base"], r["percentage_also_invest"],
+         r["recommendation_strength"], now, now)
+        for r in recommendations
+    ]
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM asset_recommendations")
+        for i in range(0, len(rows), 1000):
+            cur.executemany("""
+                INSERT INTO asset_recommendations (
+                    id, "baseAsset", "recommendedAsset", "similarityScore", support, confidence,
+                    "usersWithBoth", "usersWithBase", "percentageAlsoInvest", "recommendationStrength",
+                    "createdAt", "updatedAt"
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, rows[i:i + 1000])
+    conn.close()
+
+
+class Readers:
+    """Threads issuing the API query back to back, recording (finished at, seconds, failed)"""
+
+    def __init__(self, dsn: str, tickers, count: int):
+        self.samples = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, args=(dsn, tickers, seed), daemon=True) for seed in range(count)
+        ]
+
+    def __enter__(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def window(self, start: float, end: float):
+        with self._lock:
+            return [sample for sample in self.samples if start <= sample[0] <= end]
+
+    def _run(self, dsn, tickers, seed):
+        rng = random.Random(seed)
+        conn = psycopg2.connect(dsn)
+        conn.autocommit = True
+        cur = conn.cursor()
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            failed = False
+            try:
+                cur.execute(READ_QUERY, (rng.choice(tickers),))
+                cur.fetchall()
+            except psycopg2.Error:
+                # A reader caught mid-swap sees the retired table dropped under it
+                failed = True
+            end = time.perf_counter()
+            with self._lock:
+                self.samples.append((end, end - start, failed))
+        conn.close()
+
+
+def summarize(name: str, samples, seconds: float):
+    latencies = sorted(latency * 1000 for _, latency, _ in samples)
+    if not latencies:
+        return {"phase": name, "refresh_s": seconds, "reads": 0, "failed": 0,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "phase": name,
+        "refresh_s": seconds,
+        "reads": len(latencies),
+        "failed": sum(1 for *_, failed in samples if failed),
+        "p50_ms": cuts[49],
+        "p95_ms": cuts[94],
+        "p99_ms": cuts[98],
+        "max_ms": latencies[-1]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", required=True, help="PostgreSQL database to create the scratch schema in")
+    parser.add_argument("--assets", type=int, default=1500)
+    parser.add_argument("--per-asset", type=int, default=50, help="recommendations per base asset")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent API readers")
+    parser.add_argument("--refreshes", type=int, default=3, help="refreshes timed per save path")
+    parser.add_argument("--schema", default="benchmark_recommendation_swap")
+    args = parser.parse_args()
+
+    tickers, recommendations = synthetic_recommendations(args.assets, args.per_asset, seed=1)
+    print(f"{len(recommendations)} recommendations per refresh", flush=True)
+
+    rows = []
+    with scratch_schema(args.dsn, args.schema) as dsn:
+        pool = DatabasePool(dsn, minconn=1, maxconn=4)
+        agent = WalletSimilarityAgent()
+        agent.set_db_pool(pool)
+        agent._sync_with_nextjs_api = lambda recs: None
+
+        delete_and_reinsert(dsn, recommendations)
+        with Readers(dsn, tickers, args.readers) as readers:
+            start = time.perf_counter()
+            time.sleep(5)
+            rows.append(summarize("idle", readers.window(start, time.perf_counter()), 0.0))
+
+            for name, refresh in [
+                ("delete + reinsert", lambda: delete_and_reinsert(dsn, recommendations)),
+                ("shadow table swap", lambda: agent._save_recommendations(recommendations)),
+            ]:
+                samples, elapsed = [], 0.0
+                for _ in range(args.refreshes):
+                    start = time.perf_counter()
+                    refresh()
+                    end = time.perf_counter()
+                    elapsed += end - start
+                    samples.extend(readers.window(start, end))
+                    time.sleep(1)  # let the retired table cleanup finish outside the window
+                rows.append(summarize(name, samples, elapsed / args.refreshes))
+                print(f"{name}: {elapsed / args.refreshes:.2f}s per refresh", flush=True)
+
+        pool.closeall()
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Articles per second of the Website fetch-and-enrich pipeline against
+locally served InfoMoney-shaped HTML, with simulated network and LLM latency.
+
+    python -m benchmarks.scraper_pipeline [--articles 60] [--latency 0.15] [--llm-latency 0.4]
+
+The "sequential" row reproduces the pre-pipeline behaviour (one article at a
+time, three OpenAI calls each); the others use the thread pool with the
+per-host limit, with the separate and the combined enrichment call.
+"""
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The OpenAI calls are stubbed below; lib/openai only needs a key to import
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import abstract.website  # noqa: E402
+from benchmarks.common import measure, print_table  # noqa: E402
+from websites.infomoney import InfoMoney  # noqa: E402
+
+PARAGRAPH = (
+    "<p>A companhia informou ao mercado que o resultado do trimestre veio acima do "
+    "esperado, com crescimento de receita e melhora da margem operacional. PETR4 e "
+    "VALE3 seguem entre as ações mais negociadas do Ibovespa.</p>"
+)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, articles: int, latency: float):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.articles = articles
+        self.latency = latency
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if self.path.startswith("/cotacoes/b3/"):
+            body = self._listing(self.path.rstrip("/").rsplit("/", 1)[-1])
+        else:
+            body = self._article(self.path)
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _listing(self, kind: str) -> str:
+        cards = "".join(
+            f'<div class="article-card"><div class="article-card__asset">'
+            f'<a href="/mercados/{kind}-{i}/">{kind} {i}</a></div><img src="/img/{i}.jpg"></div>'
+            for i in range(self.server.articles // 2)
+        )
+        return f"<html><body>{cards}</body></html>"
+
+    def _article(self, path: str) -> str:
+        return (
+            f"<html><body><h1>Notícia {path}</h1><time>14/10/2026 10h30</time>"
+            f'<div class="im-article">{PARAGRAPH * 12}</div></body></html>'
+        )
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalInfoMoney(InfoMoney):
+    def __init__(self, base_url: str, max_workers: int, modo_ia: str):
+        super().__init__()
+        self.BASE_URL = base_url
+        self.LIST_URL = f"{base_url}/cotacoes/b3/"
+        self.max_workers = max_workers
+        self.modo_ia = modo_ia
+
+
+def stub_llm(latency: float):
+    """Replace the OpenAI calls used by the pipeline with fixed-latency stubs"""
+    def call(result):
+        def stub(*args):
+            time.sleep(latency)
+            return result(*args)
+        return stub
+
+    abstract.website.validar_conteudo_com_ia = call(lambda title, content: content)
+    abstract.website.gerar_resumo_com_ia = call(lambda content: content[:200])
+    abstract.website.capturar_tipo_por_conteudo = call(lambda content: "ACOES")
+    abstract.website.enriquecer_noticia_com_ia = call(lambda title, content: {
+        "content": content, "summary": content[:200], "category": "ACOES", "tickers": []
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=60, help="articles across the two listings")
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per HTTP response")
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="seconds per LLM call")
+    args = parser.parse_args()
+
+    stub_llm(args.llm_latency)
+    server = FixtureServer(args.articles, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rows = []
+    for name, workers, modo_ia in [
+        ("sequential", 1, "separate"),
+        ("pool, separate calls", LocalInfoMoney.max_workers, "separate"),
+        ("pool, combined call", LocalInfoMoney.max_workers, "combined"),
+    ]:
+        site = LocalInfoMoney(server.url, workers, modo_ia)
+        noticias, seconds, _ = measure(site.extract)
+        rows.append({
+            "pipeline": name,
+            "workers": workers,
+            "articles": len(noticias),
+            "seconds": seconds,
+            "articles_per_s": len(noticias) / seconds
+        })
+        print(f"{name}: {seconds:.1f}s", flush=True)
+
+    server.shutdown()
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
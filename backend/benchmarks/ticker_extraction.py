@@ -0,0 +1,106 @@
+"""
+Throughput of ticker extraction (MB of news body per second) for the regex
+heuristics, the listed-ticker dictionary and the dictionary plus company
+names.
+
+    python -m benchmarks.ticker_extraction [--dsn postgresql://localhost/app] [--documents 5000]
+
+With --dsn the corpus is the stored news bodies and the universe is
+asset_data (both only read); without it both are synthetic: 2,500 listings
+and 800-word bodies mentioning a few of them.
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, print_table
+from lib.ticker_extractor import TickerExtractor
+from lib.ticker_universe import TickerUniverse, build_index
+
+WORDS = (
+    "o a de do da em para com que por mercado ações fundo resultado trimestre lucro receita "
+    "dividendos investidores alta queda bolsa analistas companhia empresa bilhões milhões "
+    "segundo informou nesta semana ano crescimento margem dívida caixa projeção Ibovespa "
+    "dólar juros Selic inflação IPCA CVM CNPJ PIB"
+).split()
+
+
+def synthetic_universe(size: int, rng: random.Random):
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    assets = []
+    while len(assets) < size:
+        root = "".join(rng.choice(letters) for _ in range(4))
+        kind = rng.choice(["stock", "stock", "fund", "bdr"])
+        suffix = {"stock": rng.choice(["3", "4"]), "fund": "11", "bdr": "34"}[kind]
+        name = " ".join(rng.choice(["Banco", "Energia", "Participações", "Logística", "Renda"])
+                        for _ in range(2)) + f" {root.title()}"
+        assets.append((root + suffix, name, kind))
+    return assets
+
+
+def synthetic_corpus(count: int, assets, rng: random.Random):
+    documents = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(800)]
+        for position in rng.sample(range(800), 6):
+            ticker, name, _ = rng.choice(assets)
+            words[position] = rng.choice([ticker, name, f"({ticker})"])
+        # Ticker-shaped tokens that are not listed, which the regex mode accepts
+        words[rng.randrange(800)] = "ABCD12"
+        documents.append(" ".join(words))
+    return documents
+
+
+def stored_corpus(dsn: str, count: int):
+    from lib.db_pool import DatabasePool, set_default_pool
+
+    pool = DatabasePool(dsn, minconn=1, maxconn=2)
+    set_default_pool(pool)
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.execute('SELECT content FROM news ORDER BY "publishedAt" DESC LIMIT %s', (count,))
+        documents = [row[0] for row in cur.fetchall()]
+
+    universe = TickerUniverse()
+    universe.refresh()
+    return documents, universe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", help="read stored news and asset_data instead of synthetic data")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--universe", type=int, default=2500, help="synthetic listings")
+    args = parser.parse_args()
+
+    if args.dsn:
+        documents, universe = stored_corpus(args.dsn, args.documents)
+    else:
+        rng = random.Random(1)
+        assets = synthetic_universe(args.universe, rng)
+        documents = synthetic_corpus(args.documents, assets, rng)
+        universe = TickerUniverse()
+        universe._index = build_index(assets, "benchmark")
+
+    megabytes = sum(len(document.encode()) for document in documents) / 1e6
+    print(f"{len(documents)} documents, {megabytes:.1f} MB, {len(universe)} listed tickers", flush=True)
+
+    rows = []
+    for mode, extractor in [
+        ("regex", TickerExtractor()),
+        ("dictionary", TickerExtractor(universe)),
+        ("dictionary + names", TickerExtractor(universe, match_company_names=True)),
+    ]:
+        found, seconds, _ = measure(lambda: [extractor.extract_tickers(document) for document in documents])
+        rows.append({
+            "mode": mode,
+            "seconds": seconds,
+            "mb_per_s": megabytes / seconds,
+            "docs_per_s": len(documents) / seconds,
+            "tickers_per_doc": sum(map(len, found)) / len(documents)
+        })
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
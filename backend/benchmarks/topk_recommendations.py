@@ -0,0 +1,54 @@
+"""
+Recommendation rows produced (and so written) and generation time with and
+without the per-base-asset top-K cut of _generate_recommendations.
+
+    python -m benchmarks.topk_recommendations --wallets 100000 [--universe 1500] [--k 10] [--min-similarity 0.02] [--memory]
+"""
+import argparse
+import logging
+
+from agents.wallet_similarity_agent import WalletSimilarityAgent
+from benchmarks.common import measure, print_table, synthetic_wallets
+from lib.cooccurrence import COOCCURRENCE_ENGINES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wallets", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--universe", type=int, default=1500, help="distinct tickers")
+    parser.add_argument("--k", type=int, default=10, help="max_recommendations_per_asset")
+    parser.add_argument("--min-similarity", type=float, default=0.02,
+                        help="min_similarity_threshold (synthetic wallets are less correlated than real ones)")
+    parser.add_argument("--min-users", type=int, default=5, help="min_users_for_recommendation")
+    parser.add_argument("--memory", action="store_true", help="also trace peak memory (slower)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    rows = []
+    for count in args.wallets:
+        pairs = COOCCURRENCE_ENGINES["sparse"](synthetic_wallets(count, args.universe)).pairs
+        for label, k in [("all pairs", None), (f"top {args.k}", args.k)]:
+            agent = WalletSimilarityAgent({
+                "max_recommendations_per_asset": k,
+                "min_similarity_threshold": args.min_similarity,
+                "min_users_for_recommendation": args.min_users
+            })
+            recommendations, seconds, peak_mb = measure(lambda: agent._generate_recommendations(pairs), args.memory)
+            rows.append({
+                "wallets": count,
+                "pairs": len(pairs),
+                "kept": label,
+                "rows_written": len(recommendations),
+                "base_assets": len({rec["base_asset"] for rec in recommendations}),
+                "seconds": seconds,
+                "peak_mb": peak_mb
+            })
+            print(f"{count} wallets, {label}: {len(recommendations)} rows in {seconds:.2f}s", flush=True)
+
+    print()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
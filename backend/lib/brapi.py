@@ -0,0 +1,179 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BRAPI_BASE_URL = "https://brapi.dev"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BrapiError(Exception):
+    """Raised when Brapi could not be reached or answered with an error"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class BrapiClient:
+    """
+    Thread-safe Brapi client with a pooled keep-alive session, retries with
+    exponential backoff and jitter, and conditional requests (ETag /
+    Last-Modified) that reuse the previous payload on 304 Not Modified.
+    """
+
+    def __init__(self, token: str, base_url: str = BRAPI_BASE_URL, timeout: float = 60,
+                 max_retries: int = 3, retry_delay: float = 5, pool_size: int = 10,
+                 logger: Optional[logging.Logger] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        })
+
+        # url -> (validators, payload) of the last successful response
+        self._conditional_cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()
+
+    def list_assets(self, asset_type: str) -> List[Dict[str, Any]]:
+        """Every listed asset of a type ("stock", "fund", ...)"""
+        data = self.get_json("/api/quote/list", {"type": asset_type})
+        return data.get("stocks", [])
+
+    def list_assets_by_type(self, asset_types: Sequence[str]
+                            ) -> Dict[str, Union[List[Dict[str, Any]], BrapiError]]:
+        """
+        Fetch several asset types concurrently. A type that fails maps to its
+        BrapiError instead of failing the others.
+        """
+        def fetch(asset_type):
+            try:
+                return self.list_assets(asset_type)
+            except BrapiError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, len(asset_types))) as pool:
+            return dict(zip(asset_types, pool.map(fetch, asset_types)))
+
+    def quotes(self, tickers: Sequence[str]) -> List[Dict[str, Any]]:
+        """Current quotes of several tickers in one multi-ticker request"""
+        data = self.get_json(f"/api/quote/{','.join(tickers)}")
+        return data.get("results", [])
+
+    def quotes_batched(self, tickers: Sequence[str], batch_size: int = 20, max_workers: int = 4
+                       ) -> Dict[str, Any]:
+        """
+        Quotes of many tickers in concurrent multi-ticker batches. Brapi rejects
+        a whole batch when one ticker is unknown, so rejected batches are split
+        until the unknown tickers are isolated. Returns {"quotes": [...],
+        "not_found": [...], "errors": [...]}.
+        """
+        result = {"quotes": [], "not_found": [], "errors": []}
+        lock = threading.Lock()
+
+        def fetch(batch):
+            try:
+                quotes = self.quotes(batch)
+                with lock:
+                    result["quotes"].extend(quotes)
+            except BrapiError as e:
+                if e.status_code in (400, 404) and len(batch) > 1:
+                    middle = len(batch) // 2
+                    fetch(batch[:middle])
+                    fetch(batch[middle:])
+                    return
+                with lock:
+                    if e.status_code in (400, 404):
+                        result["not_found"].extend(batch)
+                    else:
+                        result["errors"].append(str(e))
+
+        batches = [list(tickers[i:i + batch_size]) for i in range(0, len(tickers), batch_size)]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(fetch, batches))
+        return result
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        url = self._url(path, params)
+        with self._cache_lock:
+            cached = self._conditional_cache.get(url)
+
+        headers = {}
+        if cached:
+            etag, last_modified = cached[0]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self._request(url, headers)
+
+        if response.status_code == 304 and cached:
+            self.logger.debug(f"Brapi {path}: not modified, reusing cached payload")
+            return cached[1]
+
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise BrapiError(f"Invalid JSON from {url}: {e}") from e
+
+        validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if any(validators):
+            with self._cache_lock:
+                self._conditional_cache[url] = (validators, payload)
+        return payload
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if not response.ok and response.status_code != 304:
+                        raise BrapiError(
+                            f"Brapi error {response.status_code} for {url}: {response.text[:200]}",
+                            response.status_code
+                        )
+                    return response
+                error = BrapiError(f"Brapi error {response.status_code} for {url}", response.status_code)
+                retry_after = response.headers.get("Retry-After")
+            except requests.exceptions.RequestException as e:
+                error = BrapiError(f"Network error for {url}: {e}")
+                retry_after = None
+
+            if attempt >= self.max_retries:
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            self.logger.warning(f"{error}; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        # "Full jitter": uniform in [0, retry_delay * 2^attempt], unless the server says when
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return random.uniform(0, self.retry_delay * (2 ** attempt))
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]]) -> str:
+        request = requests.Request("GET", f"{self.base_url}{path}", params=params).prepare()
+        return request.url
@@ -0,0 +1,44 @@
+import csv
+import io
+from typing import Any, Iterable, Sequence
+
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+              chunk_rows: int = 50000) -> int:
+    """
+    Bulk-load `rows` into `table` with COPY ... FROM STDIN (CSV), streaming in
+    chunks so large loads don't have to be rendered into memory at once.
+    None is written as NULL; returns the number of rows copied.
+    """
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    statement = f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    for row in rows:
+        writer.writerow(["\\N" if value is None else value for value in row])
+        pending += 1
+        if pending >= chunk_rows:
+            total += _flush(cur, statement, buffer)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            pending = 0
+
+    if pending:
+        total += _flush(cur, statement, buffer)
+    return total
+
+
+def _flush(cur, statement: str, buffer: io.StringIO) -> int:
+    buffer.seek(0)
+    cur.copy_expert(statement, buffer)
+    return cur.rowcount
+
+
+def array_literal(values: Iterable[Any]) -> str:
+    """PostgreSQL array literal ('{"a","b"}') for loading array columns with COPY"""
+    items = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'"{item}"' for item in items) + "}"
@@ -0,0 +1,19 @@
+import threading
+from datetime import datetime
+from typing import Optional
+
+
+class SystemClock:
+    """
+    Wall-clock time source used by the scheduler.
+
+    Tests can inject a fake implementing the same two methods to control
+    time and wake-ups deterministically.
+    """
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def wait(self, condition: threading.Condition, timeout: Optional[float]) -> bool:
+        """Wait on `condition` (already held) for at most `timeout` seconds"""
+        return condition.wait(timeout)
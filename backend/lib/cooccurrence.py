@@ -0,0 +1,442 @@
+from array import array
+from collections import Counter
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class CooccurrenceResult(NamedTuple):
+    pairs: Dict[Tuple[str, str], Dict[str, float]]  # (ticker1, ticker2), ticker1 < ticker2
+    holders: Dict[str, int]  # ticker -> number of wallets holding it
+    total_wallets: int
+
+
+class TickerInterner:
+    """
+    Maps ticker strings to dense integer ids, so wallets can be streamed as
+    compact id arrays instead of lists of strings
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, ticker: str) -> int:
+        ticker_id = self.ids.get(ticker)
+        if ticker_id is None:
+            ticker_id = self.ids[ticker] = len(self.names)
+            self.names.append(ticker)
+        return ticker_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def pair_metrics(both: int, first: int, second: int, total_wallets: int) -> Dict[str, float]:
+    """
+    Similarity metrics of a ticker pair from its holder counts
+    """
+    union = first + second - both
+    return {
+        "users_with_both": both,
+        "total_wallets_with_first": first,
+        "total_wallets_with_second": second,
+        "jaccard_similarity": both / union if union else 0.0,
+        "support": both / total_wallets,
+        "confidence_first_to_second": both / first if first else 0,
+        "confidence_second_to_first": both / second if second else 0
+    }
+
+
+def _interned(wallets: Iterable[Sequence], interner: Optional[TickerInterner]
+              ) -> Tuple[Iterable[Sequence[int]], TickerInterner]:
+    """
+    Wallets as ticker-id sequences. With an interner the wallets already hold
+    ids from it (its names may keep growing while the stream is consumed);
+    without one they hold ticker strings, which are interned here.
+    """
+    if interner is not None:
+        return wallets, interner
+    interner = TickerInterner()
+    return ([interner.intern(ticker) for ticker in tickers] for tickers in wallets), interner
+
+
+def python_cooccurrence(wallets: Iterable[Sequence], interner: Optional[TickerInterner] = None
+                        ) -> CooccurrenceResult:
+    """
+    Reference engine: counts holders and pairs wallet by wallet in pure Python
+    """
+    wallets, interner = _interned(wallets, interner)
+    holders = Counter()
+    pair_counts = Counter()
+    total_wallets = 0
+
+    for ticker_ids in wallets:
+        total_wallets += 1
+        ticker_ids = sorted(set(ticker_ids))
+        holders.update(ticker_ids)
+        for i, first in enumerate(ticker_ids):
+            for second in ticker_ids[i + 1:]:
+                pair_counts[(first, second)] += 1
+
+    names = interner.names
+    pairs = {}
+    for (first, second), both in pair_counts.items():
+        if names[second] < names[first]:
+            first, second = second, first
+        pairs[(names[first], names[second])] = pair_metrics(
+            both, holders[first], holders[second], total_wallets
+        )
+    holders = {names[ticker_id]: count for ticker_id, count in holders.items()}
+    return CooccurrenceResult(pairs, holders, total_wallets)
+
+
+def sparse_cooccurrence(wallets: Iterable[Sequence], interner: Optional[TickerInterner] = None
+                        ) -> CooccurrenceResult:
+    """
+    Vectorized engine: builds the wallet x ticker incidence matrix A and gets
+    every pair intersection count from A^T A in one sparse product.
+    Produces exactly the same metrics as python_cooccurrence.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    wallets, interner = _interned(wallets, interner)
+    rows, cols = array("i"), array("i")
+    total_wallets = 0
+
+    for ticker_ids in wallets:
+        for ticker_id in set(ticker_ids):
+            rows.append(total_wallets)
+            cols.append(ticker_id)
+        total_wallets += 1
+
+    if not len(interner):
+        return CooccurrenceResult({}, {}, total_wallets)
+
+    # Renumber columns in ticker order so that col i < col j <=> ticker_i < ticker_j
+    by_name = sorted(range(len(interner)), key=interner.names.__getitem__)
+    names = np.array([interner.names[ticker_id] for ticker_id in by_name], dtype=object)
+    order = np.empty(len(names), dtype=np.int64)
+    order[by_name] = np.arange(len(names))
+    cols = order[np.frombuffer(cols, dtype=np.int32)]
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (np.frombuffer(rows, dtype=np.int32), cols)),
+        shape=(total_wallets, len(names))
+    )
+    cooccurrence = (incidence.T @ incidence).tocoo()
+
+    holder_counts = cooccurrence.diagonal()
+    upper = cooccurrence.row < cooccurrence.col
+    first_idx = cooccurrence.row[upper]
+    second_idx = cooccurrence.col[upper]
+    both = cooccurrence.data[upper]
+    first = holder_counts[first_idx]
+    second = holder_counts[second_idx]
+
+    # Holder counts are always >= both > 0, so no division guards are needed
+    jaccard = both / (first + second - both)
+    support = both / total_wallets
+    confidence_first = both / first
+    confidence_second = both / second
+
+    pairs = {}
+    for k, (i, j) in enumerate(zip(first_idx.tolist(), second_idx.tolist())):
+        pairs[(names[i], names[j])] = {
+            "users_with_both": int(both[k]),
+            "total_wallets_with_first": int(first[k]),
+            "total_wallets_with_second": int(second[k]),
+            "jaccard_similarity": float(jaccard[k]),
+            "support": float(support[k]),
+            "confidence_first_to_second": float(confidence_first[k]),
+            "confidence_second_to_first": float(confidence_second[k])
+        }
+
+    holders = dict(zip(names.tolist(), holder_counts.tolist()))
+    return CooccurrenceResult(pairs, holders, total_wallets)
+
+
+def candidate_probability(similarity: float, bands: int, rows_per_band: int) -> float:
+    """Chance that a pair with this Jaccard similarity shares at least one LSH band"""
+    return 1 - (1 - similarity ** rows_per_band) ** bands
+
+
+def lsh_bands(num_perm: int, min_similarity: float, min_recall: float = 0.95) -> int:
+    """
+    Fewest bands (longest bands, so the fewest spurious candidates) whose
+    candidate probability at min_similarity is at least min_recall. Raises
+    ValueError when no banding of num_perm rows reaches it.
+    """
+    for bands in sorted(b for b in range(1, num_perm + 1) if num_perm % b == 0):
+        if candidate_probability(min_similarity, bands, num_perm // bands) >= min_recall:
+            return bands
+    raise ValueError(
+        f"{num_perm} MinHash rows cannot find pairs at similarity {min_similarity} "
+        f"with recall {min_recall}; use longer signatures"
+    )
+
+
+def minhash_cooccurrence(wallets: Iterable[Sequence], interner: Optional[TickerInterner] = None,
+                         num_perm: int = 128, bands: Optional[int] = None, min_similarity: float = 0.1,
+                         min_recall: float = 0.95, seed: int = 1,
+                         chunk_entries: int = 16384) -> CooccurrenceResult:
+    """
+    Approximate engine for very large user bases: keeps one MinHash signature
+    per ticker (updated as wallets stream by) instead of any holder sets,
+    finds candidate pairs with LSH banding and estimates their Jaccard
+    similarity from the signatures.
+
+    Holder counts and the wallet total are exact; users_with_both is derived
+    from the estimated Jaccard. The banding is derived from min_similarity so
+    that pairs at the threshold become candidates with probability
+    min_recall; an explicit `bands` that cannot reach it is rejected.
+    """
+    import numpy as np
+
+    if bands is None:
+        bands = lsh_bands(num_perm, min_similarity, min_recall)
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    rows_per_band = num_perm // bands
+    recall = candidate_probability(min_similarity, bands, rows_per_band)
+    if recall < min_recall:
+        raise ValueError(
+            f"{bands} LSH bands of {rows_per_band} rows find pairs at similarity {min_similarity} "
+            f"with probability {recall:.2f} < {min_recall}; use {lsh_bands(num_perm, min_similarity, min_recall)} bands"
+        )
+
+    wallets, interner = _interned(wallets, interner)
+    rng = np.random.default_rng(seed)
+    prime = np.int64(_MERSENNE_PRIME)
+    coef_a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+    coef_b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+
+    signatures = np.full((0, num_perm), _MERSENNE_PRIME, dtype=np.int64)
+    holder_counts = np.zeros(0, dtype=np.int64)
+    rows, cols = array("i"), array("i")
+    total_wallets = 0
+
+    def flush():
+        nonlocal signatures, holder_counts, rows, cols
+        if len(interner) > len(signatures):
+            grow = len(interner) - len(signatures)
+            signatures = np.vstack([signatures, np.full((grow, num_perm), _MERSENNE_PRIME, dtype=np.int64)])
+            holder_counts = np.concatenate([holder_counts, np.zeros(grow, dtype=np.int64)])
+        if rows:
+            wallet_idx = np.frombuffer(rows, dtype=np.int32).astype(np.int64)
+            ticker_idx = np.frombuffer(cols, dtype=np.int32)
+            # Universal hashing (a*x + b) mod p; a, x < 2^31 so nothing overflows int64
+            hashes = (wallet_idx[:, None] * coef_a[None, :] + coef_b[None, :]) % prime
+            np.minimum.at(signatures, ticker_idx, hashes)
+            holder_counts += np.bincount(ticker_idx, minlength=len(holder_counts))
+        rows, cols = array("i"), array("i")
+
+    for ticker_ids in wallets:
+        for ticker_id in set(ticker_ids):
+            rows.append(total_wallets)
+            cols.append(ticker_id)
+        total_wallets += 1
+        if len(rows) >= chunk_entries:
+            flush()
+    flush()
+
+    if not len(interner):
+        return CooccurrenceResult({}, {}, total_wallets)
+
+    # LSH: tickers whose signatures agree on every row of some band are candidates
+    candidates = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        band_rows = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        for ticker_id in range(len(band_rows)):
+            buckets.setdefault(band_rows[ticker_id].tobytes(), []).append(ticker_id)
+        for bucket in buckets.values():
+            for i, first in enumerate(bucket):
+                for second in bucket[i + 1:]:
+                    candidates.add((first, second))
+
+    names = interner.names
+    holders = holder_counts.tolist()
+    pairs = {}
+    for first, second in candidates:
+        jaccard = float(np.count_nonzero(signatures[first] == signatures[second])) / num_perm
+        # |A n B| = J * (|A| + |B|) / (1 + J), capped by the smaller holder set
+        both = min(round(jaccard * (holders[first] + holders[second]) / (1 + jaccard)),
+                   holders[first], holders[second])
+        if both < 1:
+            continue
+        if names[second] < names[first]:
+            first, second = second, first
+        pairs[(names[first], names[second])] = pair_metrics(
+            both, holders[first], holders[second], total_wallets
+        )
+
+    return CooccurrenceResult(pairs, dict(zip(names, holders)), total_wallets)
+
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def parallel_cooccurrence(wallets: Iterable[Sequence], interner: Optional[TickerInterner] = None,
+                          workers: Optional[int] = None, shard_size: int = 20000) -> CooccurrenceResult:
+    """
+    Multi-process engine: shards the wallet stream across a process pool. Each
+    worker counts its shard into compact (integer pair id -> count) arrays,
+    which are merged as shards complete. Counts are exact, so the metrics
+    are identical to python_cooccurrence.
+    """
+    import numpy as np
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    wallets, interner = _interned(wallets, interner)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+
+    pair_ids = np.zeros(0, dtype=np.int64)
+    pair_totals = np.zeros(0, dtype=np.int64)
+    holder_totals = np.zeros(0, dtype=np.int64)
+    total_wallets = 0
+
+    unmerged: List[Tuple] = []  # partial (pair ids, counts) not yet folded in
+
+    def reduce_pairs():
+        nonlocal pair_ids, pair_totals, unmerged
+        merged_ids, inverse = np.unique(
+            np.concatenate([pair_ids] + [ids for ids, _ in unmerged]), return_inverse=True
+        )
+        merged_counts = np.zeros(len(merged_ids), dtype=np.int64)
+        np.add.at(merged_counts, inverse, np.concatenate([pair_totals] + [counts for _, counts in unmerged]))
+        pair_ids, pair_totals, unmerged = merged_ids, merged_counts, []
+
+    def merge(done):
+        nonlocal holder_totals
+        for future in done:
+            shard_holders, shard_pair_ids, shard_pair_counts = future.result()
+            if len(shard_holders) > len(holder_totals):
+                holder_totals = np.pad(holder_totals, (0, len(shard_holders) - len(holder_totals)))
+            holder_totals[:len(shard_holders)] += shard_holders
+            unmerged.append((shard_pair_ids, shard_pair_counts))
+
+        # Fold partials in once they outweigh the merged table, so each pair
+        # id is re-merged O(log shards) times instead of once per shard
+        if sum(len(ids) for ids, _ in unmerged) >= len(pair_ids):
+            reduce_pairs()
+
+    # Spawned, not forked: the agent process runs scheduler and executor threads
+    # and holds pooled database sockets that a forked child would inherit
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = set()
+        shard: List[array] = []
+
+        for ticker_ids in wallets:
+            shard.append(array("i", ticker_ids))
+            total_wallets += 1
+            if len(shard) >= shard_size:
+                # Bound the shards held in memory while workers catch up
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    merge(done)
+                pending.add(pool.submit(_count_shard, shard))
+                shard = []
+
+        if shard:
+            pending.add(pool.submit(_count_shard, shard))
+        merge(pending)
+        reduce_pairs()
+
+    names = interner.names
+    holders = holder_totals.tolist()
+    pairs = {}
+    for pair_id, both in zip(pair_ids.tolist(), pair_totals.tolist()):
+        first, second = pair_id >> 32, pair_id & 0xFFFFFFFF
+        if names[second] < names[first]:
+            first, second = second, first
+        pairs[(names[first], names[second])] = pair_metrics(
+            both, holders[first], holders[second], total_wallets
+        )
+
+    holders = {names[ticker_id]: count for ticker_id, count in enumerate(holders) if count}
+    return CooccurrenceResult(pairs, holders, total_wallets)
+
+
+def _count_shard(shard: List[array]):
+    """
+    Worker side of parallel_cooccurrence: holder counts indexed by ticker id,
+    plus sorted pair ids ((low id << 32) | high id) with their counts
+    """
+    import numpy as np
+
+    holders = Counter()
+    pair_counts = Counter()
+    for ticker_ids in shard:
+        ticker_ids = sorted(set(ticker_ids))
+        holders.update(ticker_ids)
+        for i, first in enumerate(ticker_ids):
+            high = first << 32
+            for second in ticker_ids[i + 1:]:
+                pair_counts[high | second] += 1
+
+    holder_array = np.zeros(max(holders, default=-1) + 1, dtype=np.int64)
+    if holders:
+        holder_array[list(holders)] = list(holders.values())
+
+    pair_ids = np.fromiter(pair_counts.keys(), dtype=np.int64, count=len(pair_counts))
+    counts = np.fromiter(pair_counts.values(), dtype=np.int64, count=len(pair_counts))
+    order = np.argsort(pair_ids)
+    return holder_array, pair_ids[order], counts[order]
+
+
+COOCCURRENCE_ENGINES = {
+    "python": python_cooccurrence,
+    "sparse": sparse_cooccurrence,
+    "minhash": minhash_cooccurrence,
+    "parallel": parallel_cooccurrence
+}
+
+# Engines whose counts are estimates and must not seed incremental state
+APPROXIMATE_ENGINES = {"minhash"}
+
+
+def wallet_delta(old: Iterable[str], new: Iterable[str]) -> Tuple[Counter, Counter]:
+    """
+    Holder and pair count changes caused by a wallet going from `old` to `new` tickers
+    """
+    old, new = set(old), set(new)
+    holder_delta = Counter()
+    for ticker in new - old:
+        holder_delta[ticker] += 1
+    for ticker in old - new:
+        holder_delta[ticker] -= 1
+
+    old_pairs = _sorted_pairs(old)
+    new_pairs = _sorted_pairs(new)
+    pair_delta = Counter()
+    for pair in new_pairs - old_pairs:
+        pair_delta[pair] += 1
+    for pair in old_pairs - new_pairs:
+        pair_delta[pair] -= 1
+
+    return holder_delta, pair_delta
+
+
+def changed_tickers(holder_delta: Counter, pair_delta: Counter) -> List[str]:
+    """
+    Tickers whose holder count or any of whose pair counts changed. A ticker
+    added to one wallet and removed from another nets to zero holders while
+    its pairs still move, so both deltas are needed.
+    """
+    tickers = {ticker for ticker, delta in holder_delta.items() if delta}
+    for pair, delta in pair_delta.items():
+        if delta:
+            tickers.update(pair)
+    return sorted(tickers)
+
+
+def _sorted_pairs(tickers: set) -> set:
+    ordered = sorted(tickers)
+    return {
+        (ticker1, ticker2)
+        for i, ticker1 in enumerate(ordered)
+        for ticker2 in ordered[i + 1:]
+    }
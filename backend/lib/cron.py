@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from typing import Set
+
+
+class CronExpression:
+    """
+    Standard 5-field cron expression: minute hour day-of-month month day-of-week.
+
+    Each field accepts "*", single values, ranges ("1-5"), steps ("*/15",
+    "0-30/10") and comma-separated lists. Day-of-week uses 0-6 with 0 (or 7)
+    meaning Sunday. As in cron, when both day fields are restricted a day
+    matches if either of them does.
+    """
+
+    FIELDS = (
+        ("minute", 0, 59),
+        ("hour", 0, 23),
+        ("day", 1, 31),
+        ("month", 1, 12),
+        ("weekday", 0, 7)
+    )
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+
+        self.expression = expression
+        values = [
+            self._parse_field(part, name, low, high)
+            for part, (name, low, high) in zip(parts, self.FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        # Sunday may be written as 0 or 7
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self.day_restricted = parts[2] != "*"
+        self.weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, name: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in field.split(","):
+            step = 1
+            if "/" in item:
+                item, step_str = item.split("/", 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Invalid step in cron {name} field: {field!r}")
+
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start_str, end_str = item.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Value out of range in cron {name} field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        # Python: Monday=0 ... Sunday=6; cron: Sunday=0 ... Saturday=6
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Return the first matching minute strictly after `moment`"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Bounded search: leap-day schedules repeat at most every 8 years
+        limit = candidate + timedelta(days=366 * 8)
+
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def __str__(self) -> str:
+        return self.expression
@@ -1,43 +1,150 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from psycopg2.extras import execute_values
+from lib.db_pool import get_default_pool
 
-# Configurações
-load_dotenv()
+def conexao():
+    """
+    Empresta uma conexão do pool compartilhado do processo: confirma a
+    transação ao final do bloco, desfaz em caso de erro e a devolve ao pool.
+    """
+    return get_default_pool().connection()
 
-DATABASE_URL_BACK = os.getenv("DATABASE_URL_BACK")
+def salvar_noticias_no_postgres(noticias: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Insere as notícias com um único INSERT de várias linhas e indexa os
+    tickers das inseridas em news_tickers, na mesma transação. As que trazem
+    "fingerprint" (SimHash do corpo, já com sinal) e, opcionalmente,
+    "duplicateOf" (sourceUrl da notícia original) vão também para news_fingerprints.
+    Retorna quantas foram inseridas e quantas já existiam.
+    """
+    if not noticias:
+        return {"inserted": 0, "skipped": 0}
 
-def salvar_noticias_no_postgres(noticias):
-    conn = psycopg2.connect(DATABASE_URL_BACK)
-    cur = conn.cursor()
+    valores = [
+        (
+            noticia["title"],
+            noticia["summary"],
+            noticia["content"],
+            noticia["imageUrl"],
+            noticia["source"],
+            noticia["sourceUrl"],
+            noticia["publishedAt"],
+            noticia["category"],
+            noticia["tags"],
+            noticia["tickers"]
+        )
+        for noticia in noticias
+    ]
 
-    for noticia in noticias:
-        try:
-            cur.execute("""
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            # ON CONFLICT sem alvo cobre tanto "sourceUrl" quanto title
+            inseridas = execute_values(cur, """
                 INSERT INTO news (
                     id, title, summary, content, "imageUrl", source, "sourceUrl",
                     "publishedAt", "createdAt", "updatedAt", category, tags, tickers
-                ) VALUES (
-                    gen_random_uuid(), %s, %s, %s, %s, %s, %s,
-                    %s, NOW(), NOW(), %s, %s, %s
-                )
-                ON CONFLICT ("sourceUrl") DO NOTHING;
-            """, (
-                noticia["title"],
-                noticia["summary"],
-                noticia["content"],
-                noticia["imageUrl"],
-                noticia["source"],
-                noticia["sourceUrl"],
-                noticia["publishedAt"],
-                noticia["category"],
-                noticia["tags"],
-                noticia["tickers"]
-            ))
-            print(f"✅ Inserida: {noticia['title']}")
-        except Exception as e:
-            print(f"❌ Falha ao inserir: {noticia['title']} → {e}")
-
-    conn.commit()
-    cur.close()
-    conn.close()
\ No newline at end of file
+                ) VALUES %s
+                ON CONFLICT DO NOTHING
+                RETURNING id, "sourceUrl"
+            """, valores, template="""(
+                gen_random_uuid(), %s, %s, %s, %s, %s, %s,
+                %s, NOW(), NOW(), %s, %s, %s
+            )""", page_size=len(valores), fetch=True)
+
+            indexar_tickers_das_noticias(cur, [linha[0] for linha in inseridas])
+
+            ids_por_url = {url: id_noticia for id_noticia, url in inseridas}
+            impressoes = [
+                (ids_por_url[noticia["sourceUrl"]], noticia["fingerprint"], noticia.get("duplicateOf"))
+                for noticia in noticias
+                if noticia.get("fingerprint") is not None and noticia["sourceUrl"] in ids_por_url
+            ]
+            if impressoes:
+                execute_values(cur, """
+                    INSERT INTO news_fingerprints ("newsId", fingerprint, "publishedAt", "duplicateOf")
+                    SELECT v.id, v.fingerprint, n."publishedAt", o.id
+                    FROM (VALUES %s) AS v(id, fingerprint, duplicate_url)
+                    JOIN news n ON n.id = v.id
+                    LEFT JOIN news o ON o."sourceUrl" = v.duplicate_url
+                    ON CONFLICT ("newsId") DO NOTHING
+                """, impressoes, template="(%s, %s::bigint, %s::text)", page_size=len(impressoes))
+
+    return {
+        "inserted": len(inseridas),
+        "skipped": len(noticias) - len(inseridas)
+    }
+
+def indexar_tickers_das_noticias(cur, ids: List[str]):
+    """
+    Reescreve as linhas de news_tickers das notícias `ids` a partir de news.tickers.
+    Recebe o cursor para rodar na transação de quem alterou as notícias.
+    """
+    if not ids:
+        return
+
+    cur.execute('DELETE FROM news_tickers WHERE "newsId" = ANY(%s)', (ids,))
+    cur.execute("""
+        INSERT INTO news_tickers (ticker, "newsId", "publishedAt")
+        SELECT DISTINCT t.ticker, n.id, n."publishedAt"
+        FROM news n
+        CROSS JOIN LATERAL unnest(n.tickers) AS t(ticker)
+        WHERE n.id = ANY(%s) AND t.ticker IS NOT NULL
+    """, (ids,))
+
+def carregar_impressoes_digitais(desde: datetime) -> List[Tuple[str, int]]:
+    """
+    SimHash das notícias publicadas a partir de `desde`, como ("sourceUrl", fingerprint)
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT n."sourceUrl", f.fingerprint
+            FROM news_fingerprints f
+            JOIN news n ON n.id = f."newsId"
+            WHERE f."publishedAt" >= %s
+        """, (desde,))
+        return cur.fetchall()
+
+def carregar_urls_existentes(desde: Optional[datetime] = None) -> Tuple[Set[str], Optional[datetime]]:
+    """
+    Carrega em uma única consulta as URLs de notícias já salvas.
+    Com `desde`, traz apenas as inseridas a partir desse instante.
+    Retorna as URLs e o maior "createdAt" encontrado.
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        if desde is None:
+            cur.execute('SELECT "sourceUrl", "createdAt" FROM news')
+        else:
+            cur.execute(
+                'SELECT "sourceUrl", "createdAt" FROM news WHERE "createdAt" >= %s',
+                (desde,)
+            )
+
+        urls = set()
+        ultimo = desde
+        for source_url, created_at in cur:
+            urls.add(source_url)
+            if ultimo is None or created_at > ultimo:
+                ultimo = created_at
+
+        return urls, ultimo
+
+def carregar_versao_cache_ativos() -> Optional[str]:
+    """
+    Marca da última atualização do cache de ativos (cache_metadata.asset_cache_last_update)
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('cache_metadata') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute("SELECT value FROM cache_metadata WHERE key = 'asset_cache_last_update'")
+        linha = cur.fetchone()
+        return linha[0] if linha else None
+
+def carregar_ativos_listados() -> List[Tuple[str, str, str]]:
+    """
+    Ativos ativos em asset_data como (ticker, nome, tipo)
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute('SELECT ticker, name, type::text FROM asset_data WHERE "isActive"')
+        return cur.fetchall()
\ No newline at end of file
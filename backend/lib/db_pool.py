@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL_BACK = os.getenv("DATABASE_URL_BACK")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30"))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout"""
+
+
+class DatabasePool:
+    """
+    Process-wide, thread-safe PostgreSQL connection pool.
+
+    Checkouts block while the pool is at max size, connections idle for
+    longer than `health_check_interval` seconds are pinged before being
+    handed out, and wait/usage statistics are kept for the status endpoint.
+    """
+
+    def __init__(self, dsn: str, minconn: int = 1, maxconn: int = 10,
+                 health_check_interval: float = 30.0, checkout_timeout: float = 30.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool size: min={minconn}, max={maxconn}")
+
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[Any, float]] = []  # (connection, idle since)
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "failed_health_checks": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0
+        }
+
+    @classmethod
+    def from_env(cls) -> "DatabasePool":
+        return cls(
+            DATABASE_URL_BACK,
+            minconn=DB_POOL_MIN,
+            maxconn=DB_POOL_MAX,
+            health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+            checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT
+        )
+
+    def warm_up(self):
+        """Open connections until the pool holds at least `minconn`"""
+        conns = []
+        try:
+            while True:
+                with self._cond:
+                    if self._size >= self.minconn:
+                        break
+                conns.append(self.getconn())
+        finally:
+            for conn in conns:
+                self.putconn(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of the block: commit on success,
+        roll back on error and always return it to the pool
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.putconn(conn)
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.checkout_timeout}s"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    # Reserve the slot now, connect outside the lock
+                    conn, idle_since = None, None
+                    self._size += 1
+                self._in_use += 1
+
+            if conn is None:
+                try:
+                    conn = psycopg2.connect(self.dsn)
+                except Exception:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif not self._is_healthy(conn, idle_since):
+                with self._cond:
+                    self._stats["failed_health_checks"] += 1
+                self._discard(conn)
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._cond:
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                self._stats["total_wait_time"] += wait_time
+                self._stats["max_wait_time"] = max(self._stats["max_wait_time"], wait_time)
+            return conn
+
+    def putconn(self, conn):
+        if conn.closed or self._closed:
+            self._discard(conn)
+            return
+
+        try:
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._stats["closed"] += len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                **self._stats,
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "avg_wait_time": self._stats["total_wait_time"] / checkouts if checkouts else 0.0
+            }
+
+
+_default_pool: Optional[DatabasePool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> DatabasePool:
+    """Pool shared by the whole process, created from the environment on first use"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DatabasePool.from_env()
+        return _default_pool
+
+
+def set_default_pool(pool: DatabasePool):
+    """Make `pool` the process-wide pool (used by AgentManager at startup)"""
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
@@ -0,0 +1,157 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_cache.sqlite3")
+)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache for LLM results backed by SQLite.
+
+    Entries are keyed by a hash of the prompt template version, the model
+    and the input text, and evicted by age and by total entry count.
+    """
+
+    # Run the eviction sweep after this many writes
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, path: str, max_entries: int = 50000, max_age_days: float = 30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_eviction = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "errors": 0
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache(created_at)")
+            conn.commit()
+            self._conn = conn
+            self._evict(conn)
+        return self._conn
+
+    @staticmethod
+    def make_key(namespace: str, version: int, model: str, payload: Any) -> str:
+        raw = json.dumps([namespace, version, model, payload], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            try:
+                row = self._connection().execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                self._stats["errors"] += 1
+                return None
+
+            if row is None or time.time() - row[1] > self.max_age_seconds:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["hits"] += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), time.time())
+                )
+                conn.commit()
+                self._stats["writes"] += 1
+
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= self.EVICTION_INTERVAL:
+                    self._evict(conn)
+            except sqlite3.Error:
+                self._stats["errors"] += 1
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then the oldest ones above max_entries"""
+        self._writes_since_eviction = 0
+        cur = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?",
+            (time.time() - self.max_age_seconds,)
+        )
+        evicted = cur.rowcount
+        cur = conn.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        evicted += cur.rowcount
+        conn.commit()
+        self._stats["evictions"] += evicted
+
+    def cached(self, namespace: str, version: int, model: str) -> Callable:
+        """
+        Decorator caching a function's JSON-serialisable result by its arguments.
+        Bump `version` whenever the prompt template changes.
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not LLM_CACHE_ENABLED:
+                    return func(*args, **kwargs)
+
+                key = self.make_key(namespace, version, model, [args, kwargs])
+                value = self.get(key)
+                if value is not None:
+                    return value
+
+                value = func(*args, **kwargs)
+                self.set(key, value)
+                return value
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0,
+                "enabled": LLM_CACHE_ENABLED
+            }
+
+
+llm_cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_AGE_DAYS)
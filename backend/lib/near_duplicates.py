@@ -0,0 +1,170 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from lib.db import carregar_impressoes_digitais
+
+FINGERPRINT_BITS = 64
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Portuguese function words (accents stripped): shared by any two texts, they
+# only pull unrelated fingerprints together
+STOPWORDS = frozenset("""
+    a o e as os ao aos da de do das dos em na no nas nos num numa um uma uns umas
+    para pela pelo pelas pelos por com sem sob sobre entre ate apos que se ja mais
+    menos como ou mas nem seu sua seus suas ele ela eles elas isso esse essa este
+    esta nesta neste nessa nesse foi sao ser tem ter ha tambem segundo
+""".split())
+
+# Figures (prices, percentages, dates, tickers) are what tells two stories
+# built on the same template apart, and what a rewrite of one story keeps
+NUMBER_WEIGHT = 3
+
+
+def simhash(text: str, shingle_size: int = 1, min_words: int = 30) -> Optional[int]:
+    """
+    64-bit SimHash of the distinct word shingles of a text (accents, case and
+    function words ignored, shingles with digits weighted NUMBER_WEIGHT
+    times). Single words hold up best when another source rewrites part of
+    the story; longer shingles only match near-verbatim copies. Texts with
+    fewer than min_words words return None: their fingerprints are too
+    unstable to compare.
+    """
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    words = WORD_PATTERN.findall("".join(ch for ch in decomposed if not unicodedata.combining(ch)))
+    if len(words) < max(min_words, shingle_size):
+        return None
+
+    words = [word for word in words if word not in STOPWORDS]
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        weight = NUMBER_WEIGHT if any(ch.isdigit() for ch in shingle) else 1
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += weight if value >> bit & 1 else -weight
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def to_signed(fingerprint: int) -> int:
+    """Fingerprint as stored in a BIGINT column"""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    return value & ((1 << FINGERPRINT_BITS) - 1)
+
+
+class NearDuplicateIndex:
+    """
+    In-process LSH index of the SimHash fingerprints of recent news.
+
+    Fingerprints are split into max_distance + 1 bands: two fingerprints at
+    most max_distance bits apart share at least one band exactly, so only
+    the entries of matching bands are compared. The index is seeded with the
+    last `days` days of stored news and grows with the articles of the run.
+    """
+
+    def __init__(self, max_distance: int = 12, days: int = 3):
+        if not 0 <= max_distance < FINGERPRINT_BITS:
+            raise ValueError(f"Invalid max_distance: {max_distance}")
+
+        self.max_distance = max_distance
+        self.days = days
+
+        bands = max_distance + 1
+        width, extra = divmod(FINGERPRINT_BITS, bands)
+        self._bands: List[Tuple[int, int]] = []  # (shift, mask)
+        shift = 0
+        for band in range(bands):
+            bits = width + (1 if band < extra else 0)
+            self._bands.append((shift, (1 << bits) - 1))
+            shift += bits
+
+        self._fingerprints: Dict[str, int] = {}  # sourceUrl -> fingerprint
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in self._bands]
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        Reload the fingerprints of the last `days` days, returning how many were loaded
+        """
+        rows = carregar_impressoes_digitais(datetime.now() - timedelta(days=self.days))
+
+        with self._lock:
+            self._fingerprints = {}
+            self._buckets = [{} for _ in self._bands]
+            for url, value in rows:
+                self._add(url, to_unsigned(value))
+            self._loaded = True
+            return len(self._fingerprints)
+
+    def match(self, fingerprint: int) -> Optional[Tuple[str, int]]:
+        """
+        Closest indexed (sourceUrl, distance) within max_distance bits, if any
+        """
+        with self._lock:
+            return self._match(fingerprint)
+
+    def match_or_add(self, url: str, fingerprint: int) -> Optional[Tuple[str, int]]:
+        """
+        Atomically return the closest near-duplicate, or index the fingerprint
+        under `url` when there is none
+        """
+        with self._lock:
+            found = self._match(fingerprint)
+            if found is None:
+                self._add(url, fingerprint)
+            return found
+
+    def remove(self, url: str):
+        """Drop an article that was indexed but could not be saved"""
+        with self._lock:
+            fingerprint = self._fingerprints.pop(url, None)
+            if fingerprint is None:
+                return
+            for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+                bucket = buckets.get(key)
+                if bucket:
+                    bucket.discard(url)
+                    if not bucket:
+                        del buckets[key]
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _match(self, fingerprint: int) -> Optional[Tuple[str, int]]:
+        best = None
+        seen = set()
+        for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+            for url in buckets.get(key, ()):
+                if url in seen:
+                    continue
+                seen.add(url)
+                distance = hamming_distance(fingerprint, self._fingerprints[url])
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (url, distance)
+        return best
+
+    def _add(self, url: str, fingerprint: int):
+        self._fingerprints[url] = fingerprint
+        for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+            buckets.setdefault(key, set()).add(url)
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        return [fingerprint >> shift & mask for shift, mask in self._bands]
@@ -1,13 +1,22 @@
 from openai import OpenAI
+from typing import Any, Dict
+import json
 import os
 from dotenv import load_dotenv
+from lib.llm_cache import llm_cache
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+MODEL = "gpt-4.1-nano"
+
+CATEGORIAS = ("ACOES", "FII")
+
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# As versões entram na chave do cache: incremente ao alterar um prompt
+@llm_cache.cached("validar_conteudo", version=1, model=MODEL)
 def validar_conteudo_com_ia(title: str, content: str) -> str:
     prompt = f"""
 Você é um assistente que analisa notícias de investimentos.
@@ -19,13 +28,14 @@ Conteúdo:
 \"\"\"{content}\"\"\"
 """
     response = client.chat.completions.create(
-        model="gpt-4.1-nano",
+        model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
         max_tokens=512
     )
     return response.choices[0].message.content.strip()
 
+@llm_cache.cached("gerar_resumo", version=1, model=MODEL)
 def gerar_resumo_com_ia(content: str) -> str:
     prompt = f"""
 Resuma o texto abaixo em uma ou duas frases objetivas, mantendo o foco no conteúdo principal:
@@ -33,13 +43,14 @@ Resuma o texto abaixo em uma ou duas frases objetivas, mantendo o foco no conte
 \"\"\"{content}\"\"\"
 """
     response = client.chat.completions.create(
-        model="gpt-4.1-nano",
+        model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
         max_tokens=256
     )
     return response.choices[0].message.content.strip()
 
+@llm_cache.cached("capturar_tipo", version=1, model=MODEL)
 def capturar_tipo_por_conteudo(content: str) -> str:
     prompt = f"""
 
@@ -59,9 +70,81 @@ CONTEÚDO:
 RESPOSTA (apenas "ACOES" ou "FII"):
 """
     response = client.chat.completions.create(
-        model="gpt-4.1-nano",
+        model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
         max_tokens=512
     )
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+    return response.choices[0].message.content.strip()
+
+def enriquecer_noticia_com_ia(title: str, content: str) -> Dict[str, Any]:
+    """
+    Limpa o conteúdo, gera o resumo, classifica a categoria e sugere tickers
+    em uma única chamada. Se a resposta não respeitar o esquema esperado,
+    recorre às três chamadas individuais.
+    """
+    try:
+        return _enriquecer_em_uma_chamada(title, content)
+    except ValueError as e:
+        print(f"[AVISO] Resposta combinada inválida, usando chamadas individuais: {e}")
+
+    conteudo_limpo = validar_conteudo_com_ia(title, content)
+    return {
+        "content": conteudo_limpo,
+        "summary": gerar_resumo_com_ia(conteudo_limpo),
+        "category": capturar_tipo_por_conteudo(conteudo_limpo),
+        "tickers": []
+    }
+
+@llm_cache.cached("enriquecer_noticia", version=1, model=MODEL)
+def _enriquecer_em_uma_chamada(title: str, content: str) -> Dict[str, Any]:
+    prompt = f"""
+Você é um assistente que analisa notícias de investimentos.
+Responda apenas com um objeto JSON com exatamente as chaves abaixo:
+
+- "content": o conteúdo da notícia sem trechos genéricos e propagandas, apenas o conteúdo útil relacionado ao título
+- "summary": um resumo do conteúdo em uma ou duas frases objetivas
+- "category": "FII" se a notícia for sobre fundos imobiliários; "ACOES" para qualquer outro tipo de ativo, como ações, BDRs, ETFs ou empresas listadas
+- "tickers": lista com os códigos de negociação da B3 citados na notícia (ex.: "PETR4", "HGLG11"), ou lista vazia
+
+Título: "{title}"
+
+Conteúdo:
+\"\"\"{content}\"\"\"
+"""
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+        max_tokens=1024
+    )
+    try:
+        dados = json.loads(response.choices[0].message.content)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"JSON inválido: {e}")
+
+    return _validar_enriquecimento(dados)
+
+def _validar_enriquecimento(dados: Any) -> Dict[str, Any]:
+    if not isinstance(dados, dict):
+        raise ValueError("a resposta não é um objeto")
+
+    for campo in ("content", "summary"):
+        if not isinstance(dados.get(campo), str) or not dados[campo].strip():
+            raise ValueError(f'campo "{campo}" ausente ou vazio')
+
+    categoria = dados.get("category")
+    if not isinstance(categoria, str) or categoria.upper().replace(' ', '') not in CATEGORIAS:
+        raise ValueError(f"categoria inválida: {categoria!r}")
+
+    tickers = dados.get("tickers", [])
+    if not isinstance(tickers, list) or not all(isinstance(t, str) for t in tickers):
+        raise ValueError('campo "tickers" deve ser uma lista de textos')
+
+    return {
+        "content": dados["content"].strip(),
+        "summary": dados["summary"].strip(),
+        "category": categoria.upper().replace(' ', ''),
+        "tickers": [t.strip().upper() for t in tickers]
+    }
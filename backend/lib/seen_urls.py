@@ -0,0 +1,47 @@
+import threading
+from typing import Iterable
+
+from lib.db import carregar_urls_existentes
+
+
+class SeenUrlIndex:
+    """
+    In-process index of news URLs already stored in the database.
+
+    The first refresh loads every "sourceUrl" in one bulk query; later
+    refreshes only fetch rows created since the previous one.
+    """
+
+    def __init__(self):
+        self._urls = set()
+        self._last_created_at = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        Refresh the index from the database, returning how many URLs were added
+        """
+        urls, last_created_at = carregar_urls_existentes(self._last_created_at)
+
+        with self._lock:
+            before = len(self._urls)
+            self._urls.update(urls)
+            self._last_created_at = last_created_at
+            self._loaded = True
+            return len(self._urls) - before
+
+    def add(self, urls: Iterable[str]):
+        """Record URLs saved during the current run"""
+        with self._lock:
+            self._urls.update(urls)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
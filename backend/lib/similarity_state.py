@@ -0,0 +1,243 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+
+class SimilarityStateStore:
+    """
+    Persisted co-occurrence state used by incremental similarity updates:
+    the tickers of every wallet as of the last run, per-ticker holder counts,
+    per-pair co-occurrence counts, and a trigger-fed log of changed wallets.
+
+    All methods take a cursor so callers control the transaction.
+    """
+
+    TOTAL_WALLETS_KEY = "wallet_similarity_total_wallets"
+    LAST_FULL_RUN_KEY = "wallet_similarity_last_full_run"
+
+    def ensure_schema(self, cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS similarity_wallet_snapshot (
+                "walletId" TEXT PRIMARY KEY,
+                tickers TEXT[] NOT NULL
+            );
+            
+            CREATE TABLE IF NOT EXISTS similarity_holder_counts (
+                ticker VARCHAR(10) PRIMARY KEY,
+                holders INTEGER NOT NULL
+            );
+            
+            CREATE TABLE IF NOT EXISTS similarity_pair_counts (
+                ticker1 VARCHAR(10) NOT NULL,
+                ticker2 VARCHAR(10) NOT NULL,
+                both_count INTEGER NOT NULL,
+                PRIMARY KEY (ticker1, ticker2)
+            );
+            CREATE INDEX IF NOT EXISTS idx_similarity_pair_counts_ticker2 ON similarity_pair_counts(ticker2);
+            
+            CREATE TABLE IF NOT EXISTS wallet_asset_changes (
+                id BIGSERIAL PRIMARY KEY,
+                "walletId" TEXT NOT NULL,
+                "changedAt" TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            
+            CREATE TABLE IF NOT EXISTS cache_metadata (
+                key VARCHAR(50) PRIMARY KEY,
+                value TEXT,
+                "updatedAt" TIMESTAMP DEFAULT NOW()
+            );
+            
+            CREATE OR REPLACE FUNCTION log_wallet_asset_change() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    INSERT INTO wallet_asset_changes ("walletId") VALUES (OLD."walletId");
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO wallet_asset_changes ("walletId") VALUES (NEW."walletId");
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+
+        cur.execute("SELECT 1 FROM pg_trigger WHERE tgname = 'trg_assets_wallet_changes'")
+        if cur.fetchone() is None:
+            cur.execute("""
+                CREATE TRIGGER trg_assets_wallet_changes
+                AFTER INSERT OR UPDATE OR DELETE ON assets
+                FOR EACH ROW EXECUTE FUNCTION log_wallet_asset_change()
+            """)
+
+    def is_initialized(self, cur) -> bool:
+        cur.execute("SELECT to_regclass('similarity_pair_counts') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return False
+        return self.last_full_run(cur) is not None
+
+    def last_full_run(self, cur) -> Optional[datetime]:
+        cur.execute("SELECT value FROM cache_metadata WHERE key = %s", (self.LAST_FULL_RUN_KEY,))
+        row = cur.fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def total_wallets(self, cur) -> int:
+        cur.execute("SELECT value FROM cache_metadata WHERE key = %s", (self.TOTAL_WALLETS_KEY,))
+        row = cur.fetchone()
+        return int(row[0]) if row else 0
+
+    def change_cutoff(self, cur) -> int:
+        """Id of the latest logged change; changes up to it are covered by this run"""
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM wallet_asset_changes")
+        return cur.fetchone()[0]
+
+    def changed_wallets(self, cur, cutoff: int) -> List[str]:
+        cur.execute(
+            'SELECT DISTINCT "walletId" FROM wallet_asset_changes WHERE id <= %s',
+            (cutoff,)
+        )
+        return [row[0] for row in cur.fetchall()]
+
+    def clear_changes(self, cur, cutoff: int):
+        cur.execute("DELETE FROM wallet_asset_changes WHERE id <= %s", (cutoff,))
+
+    def snapshot_tickers(self, cur, wallet_ids: Sequence[str]) -> Dict[str, List[str]]:
+        cur.execute(
+            'SELECT "walletId", tickers FROM similarity_wallet_snapshot WHERE "walletId" = ANY(%s)',
+            (list(wallet_ids),)
+        )
+        return dict(cur.fetchall())
+
+    def current_tickers(self, cur, wallet_ids: Sequence[str]) -> Dict[str, List[str]]:
+        cur.execute("""
+            SELECT "walletId", array_agg(ticker ORDER BY ticker)
+            FROM assets
+            WHERE "walletId" = ANY(%s) AND quantity > 0
+            GROUP BY "walletId"
+        """, (list(wallet_ids),))
+        return dict(cur.fetchall())
+
+    def begin_replace(self, cur):
+        """
+        Empty the state ahead of a full recomputation. The caller refills it
+        in the same transaction: wallets through a SnapshotWriter as they are
+        read, then replace_counts once the counts are known.
+        """
+        cur.execute("TRUNCATE similarity_wallet_snapshot, similarity_holder_counts, similarity_pair_counts")
+
+    def replace_counts(self, cur, holders: Dict[str, int], pair_counts: Iterable[Tuple[str, str, int]],
+                       total_wallets: int, run_at: datetime):
+        """Store the counts of a full recomputation after begin_replace"""
+        execute_values(
+            cur,
+            "INSERT INTO similarity_holder_counts (ticker, holders) VALUES %s",
+            list(holders.items()),
+            page_size=1000
+        )
+        execute_values(
+            cur,
+            "INSERT INTO similarity_pair_counts (ticker1, ticker2, both_count) VALUES %s",
+            pair_counts,
+            page_size=1000
+        )
+        self._set_metadata(cur, self.TOTAL_WALLETS_KEY, str(total_wallets))
+        self._set_metadata(cur, self.LAST_FULL_RUN_KEY, run_at.isoformat())
+
+    def apply_deltas(self, cur, snapshot_updates: Dict[str, List[str]], holder_delta: Counter,
+                     pair_delta: Counter, wallet_delta: int):
+        """Add count deltas and store the new ticker lists of changed wallets"""
+        removed = [wallet_id for wallet_id, tickers in snapshot_updates.items() if not tickers]
+        kept = [(wallet_id, tickers) for wallet_id, tickers in snapshot_updates.items() if tickers]
+
+        if removed:
+            cur.execute(
+                'DELETE FROM similarity_wallet_snapshot WHERE "walletId" = ANY(%s)',
+                (removed,)
+            )
+        if kept:
+            execute_values(cur, """
+                INSERT INTO similarity_wallet_snapshot ("walletId", tickers) VALUES %s
+                ON CONFLICT ("walletId") DO UPDATE SET tickers = EXCLUDED.tickers
+            """, kept, page_size=1000)
+
+        holder_rows = [(ticker, delta) for ticker, delta in holder_delta.items() if delta]
+        if holder_rows:
+            execute_values(cur, """
+                INSERT INTO similarity_holder_counts (ticker, holders) VALUES %s
+                ON CONFLICT (ticker) DO UPDATE
+                SET holders = similarity_holder_counts.holders + EXCLUDED.holders
+            """, holder_rows, page_size=1000)
+            cur.execute("DELETE FROM similarity_holder_counts WHERE holders <= 0")
+
+        pair_rows = [(t1, t2, delta) for (t1, t2), delta in pair_delta.items() if delta]
+        if pair_rows:
+            execute_values(cur, """
+                INSERT INTO similarity_pair_counts (ticker1, ticker2, both_count) VALUES %s
+                ON CONFLICT (ticker1, ticker2) DO UPDATE
+                SET both_count = similarity_pair_counts.both_count + EXCLUDED.both_count
+            """, pair_rows, page_size=1000)
+            cur.execute("DELETE FROM similarity_pair_counts WHERE both_count <= 0")
+
+        if wallet_delta:
+            self._set_metadata(cur, self.TOTAL_WALLETS_KEY, str(self.total_wallets(cur) + wallet_delta))
+
+    def load_counts(self, cur, tickers: Optional[Sequence[str]] = None
+                    ) -> Tuple[Dict[Tuple[str, str], int], Dict[str, int]]:
+        """
+        Pair and holder counts for every pair touching `tickers` (all pairs when None)
+        """
+        if tickers is None:
+            cur.execute("SELECT ticker1, ticker2, both_count FROM similarity_pair_counts")
+        else:
+            cur.execute("""
+                SELECT ticker1, ticker2, both_count FROM similarity_pair_counts
+                WHERE ticker1 = ANY(%s) OR ticker2 = ANY(%s)
+            """, (list(tickers), list(tickers)))
+        pair_counts = {(t1, t2): both for t1, t2, both in cur.fetchall()}
+
+        involved = {ticker for pair in pair_counts for ticker in pair}
+        cur.execute(
+            "SELECT ticker, holders FROM similarity_holder_counts WHERE ticker = ANY(%s)",
+            (list(involved),)
+        )
+        return pair_counts, dict(cur.fetchall())
+
+    def _set_metadata(self, cur, key: str, value: str):
+        cur.execute("""
+            INSERT INTO cache_metadata (key, value, "updatedAt")
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (key) DO UPDATE SET
+                value = EXCLUDED.value,
+                "updatedAt" = EXCLUDED."updatedAt"
+        """, (key, value))
+
+
+class SnapshotWriter:
+    """
+    Writes wallet ticker lists into similarity_wallet_snapshot a page at a
+    time, so a full run can store its snapshot while wallets stream past
+    instead of holding every wallet until the end
+    """
+
+    def __init__(self, cur, page_size: int = 1000):
+        self.cur = cur
+        self.page_size = page_size
+        self.page: List[Tuple[str, List[str]]] = []
+        self.written = 0
+
+    def add(self, wallet_id: str, tickers: List[str]):
+        self.page.append((wallet_id, tickers))
+        if len(self.page) >= self.page_size:
+            self.flush()
+
+    def flush(self):
+        if not self.page:
+            return
+        execute_values(
+            self.cur,
+            'INSERT INTO similarity_wallet_snapshot ("walletId", tickers) VALUES %s',
+            self.page,
+            page_size=self.page_size
+        )
+        self.written += len(self.page)
+        self.page = []
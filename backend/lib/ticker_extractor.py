@@ -1,28 +1,48 @@
+import multiprocessing
 import re
-from typing import List, Set
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+from lib.ticker_universe import TOKEN_PATTERN, TickerUniverse, match_names, match_tickers, normalize
+
+# Bump when the extraction rules change, so TickerBackfillAgent re-tags stored news
+RULES_VERSION = "2"
+
+# Brazilian stock patterns (4 letters + 1-2 digits); FIIs (4 letters + 11) are a subset
+STOCK_PATTERN = re.compile(r'\b[A-Z]{4}[0-9]{1,2}\b')
+
+# Brazilian FII patterns (ends with 11)
+FII_PATTERN = re.compile(r'\b[A-Z]{4}11\b')
+
+# Common false positives to exclude
+EXCLUDED_WORDS = frozenset({
+    'HTML', 'HTTP', 'HTTPS', 'JSON', 'XML', 'CSS', 'JS',
+    'API', 'URL', 'URI', 'PDF', 'DOC', 'XLS', 'PPT',
+    'CNPJ', 'CPF', 'CEP', 'RG', 'IE', 'INSS',
+    'FGTS', 'PIS', 'COFINS', 'ICMS', 'IPI', 'ISS',
+    'IPTU', 'IPVA', 'ITR', 'IRPF', 'IRPJ',
+    'CVM', 'BACEN', 'ANBIMA', 'FEBRABAN',
+    'NYSE', 'NASDAQ', 'S&P', 'DOW'
+})
 
 class TickerExtractor:
     """
-    Utility class for extracting Brazilian stock and FII tickers from text content
+    Utility class for extracting Brazilian stock and FII tickers from text content.
+    
+    With a loaded TickerUniverse, text is tokenized once and every token is
+    looked up among the listed tickers (and, optionally, company names are
+    matched to their tickers). Without one, the regex heuristics below are used.
     """
     
-    def __init__(self):
-        # Brazilian stock patterns (4 letters + number)
-        self.stock_pattern = re.compile(r'\b[A-Z]{4}[0-9]{1,2}\b')
-        
-        # Brazilian FII patterns (ends with 11)
-        self.fii_pattern = re.compile(r'\b[A-Z]{4}11\b')
-        
-        # Common false positives to exclude
-        self.exclude_patterns = {
-            'HTML', 'HTTP', 'HTTPS', 'JSON', 'XML', 'CSS', 'JS',
-            'API', 'URL', 'URI', 'PDF', 'DOC', 'XLS', 'PPT',
-            'CNPJ', 'CPF', 'CEP', 'RG', 'IE', 'INSS',
-            'FGTS', 'PIS', 'COFINS', 'ICMS', 'IPI', 'ISS',
-            'IPTU', 'IPVA', 'ITR', 'IRPF', 'IRPJ',
-            'CVM', 'BACEN', 'ANBIMA', 'FEBRABAN',
-            'NYSE', 'NASDAQ', 'S&P', 'DOW'
-        }
+    def __init__(self, universe: Optional[TickerUniverse] = None, match_company_names: bool = False):
+        self.universe = universe
+        self.match_company_names = match_company_names
+        
+        # Patterns are compiled once per process and shared by every instance
+        self.stock_pattern = STOCK_PATTERN
+        self.fii_pattern = FII_PATTERN
+        self.exclude_patterns = EXCLUDED_WORDS
     
     def extract_tickers(self, text: str) -> List[str]:
         """
@@ -37,28 +57,84 @@ class TickerExtractor:
         if not text:
             return []
         
-        # Convert to uppercase for pattern matching
-        text_upper = text.upper()
+        return sorted(self._ticker_set(text))
+    
+    def extract_document(self, *texts: str) -> List[str]:
+        """
+        Extract tickers from several parts of one document (title, body, ...)
+        in a single pass
+        
+        Args:
+            texts: The parts of the document; empty parts are ignored
+            
+        Returns:
+            Sorted list of unique tickers found in any part
+        """
+        text = "\n".join(t for t in texts if t)
+        if not text:
+            return []
         
-        # Find all potential tickers
-        all_matches = set()
+        return sorted(self._ticker_set(text))
+    
+    def extract_batch(self, documents: Iterable[Tuple[Any, str, str]], processes: int = 0,
+                      chunk_size: int = 500) -> Iterator[Tuple[Any, List[str]]]:
+        """
+        Extract tickers from many documents
         
-        # Extract stocks (4 letters + 1-2 digits)
-        stock_matches = self.stock_pattern.findall(text_upper)
-        all_matches.update(stock_matches)
+        Args:
+            documents: (doc_id, title, body) tuples, consumed lazily
+            processes: Worker processes for large backfills; 0 or 1 runs inline
+            chunk_size: Documents sent to a worker process at a time
+            
+        Returns:
+            Iterator of (doc_id, tickers) in the order of the input
+        """
+        if processes <= 1:
+            for doc_id, title, body in documents:
+                yield doc_id, self.extract_document(title, body)
+            return
+        
+        # Each worker receives a copy of this extractor (and its ticker index) once.
+        # At most two chunks per worker are in flight, so the input is never fully buffered.
+        # Workers are spawned, not forked: callers such as TickerBackfillAgent hold a
+        # server-side cursor on a pooled connection and run beside the scheduler threads.
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(self,),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending = deque()
+            for chunk in _chunks(documents, chunk_size):
+                pending.append(pool.submit(_extract_chunk, chunk))
+                if len(pending) >= processes * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    
+    def _ticker_set(self, text: str) -> Set[str]:
+        """
+        Unique tickers of the text, unsorted
+        """
+        if self.universe is not None and self.universe.loaded:
+            return self._extract_listed(text)
         
-        # Extract FIIs (4 letters + 11)
-        fii_matches = self.fii_pattern.findall(text_upper)
-        all_matches.update(fii_matches)
+        # FIIs (4 letters + 11) also match the stock pattern, so one scan finds both
+        return {
+            ticker for ticker in self.stock_pattern.findall(text.upper())
+            if self._is_valid_ticker(ticker)
+        }
+    
+    def _extract_listed(self, text: str) -> Set[str]:
+        """
+        Single pass over the tokens of the text, keeping listed tickers only
+        """
+        index = self.universe.index
         
-        # Filter out false positives
-        valid_tickers = []
-        for ticker in all_matches:
-            if self._is_valid_ticker(ticker):
-                valid_tickers.append(ticker)
+        if self.match_company_names:
+            # Accents are stripped so "Itaú Unibanco" matches the indexed name
+            tokens = TOKEN_PATTERN.findall(normalize(text))
+            found = set(match_tickers(index, tokens))
+            found.update(match_names(index, tokens))
+            return found
         
-        # Remove duplicates and sort
-        return sorted(list(set(valid_tickers)))
+        return set(match_tickers(index, TOKEN_PATTERN.findall(text.upper())))
     
     def _is_valid_ticker(self, ticker: str) -> bool:
         """
@@ -112,11 +188,43 @@ class TickerExtractor:
         """
         all_tickers = self.extract_tickers(text)
         
-        stocks = [t for t in all_tickers if not t.endswith('11')]
-        fiis = [t for t in all_tickers if t.endswith('11')]
+        if self.universe is not None and self.universe.loaded:
+            # Listed tickers carry their asset type, units also end with 11
+            types = self.universe.index.tickers
+            fiis = [t for t in all_tickers if types.get(t) == 'FII']
+        else:
+            fiis = [t for t in all_tickers if t.endswith('11')]
+        stocks = [t for t in all_tickers if t not in fiis]
         
         return {
             'stocks': stocks,
             'fiis': fiis,
             'all': all_tickers
-        }
\ No newline at end of file
+        }
+
+
+# Shared instance for callers without a ticker universe (regex heuristics)
+shared_extractor = TickerExtractor()
+
+# Extractor of the current worker process, set by _init_worker
+_worker_extractor: Optional[TickerExtractor] = None
+
+
+def _init_worker(extractor: TickerExtractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _extract_chunk(chunk: List[Tuple[Any, str, str]]) -> List[Tuple[Any, List[str]]]:
+    return [(doc_id, _worker_extractor.extract_document(title, body)) for doc_id, title, body in chunk]
+
+
+def _chunks(documents: Iterable[Tuple[Any, str, str]], size: int) -> Iterator[List[Tuple[Any, str, str]]]:
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
\ No newline at end of file
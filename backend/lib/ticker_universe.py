@@ -0,0 +1,133 @@
+import re
+import threading
+import unicodedata
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from lib.db import carregar_ativos_listados, carregar_versao_cache_ativos
+
+# Ticker-shaped tokens: letters and digits between any other characters
+TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+
+# Share-class and corporate suffixes stripped from the end of company names
+NAME_SUFFIXES = {
+    "ON", "PN", "PNA", "PNB", "PNC", "UNT", "UNIT", "N1", "N2", "NM", "MA", "MB",
+    "DR1", "DR2", "DR3", "DRN", "DRE", "CI", "ED", "EJ", "EDJ", "S", "A", "SA", "CIA",
+    "HOLDING", "HOLDINGS", "PARTICIPACOES", "PARTICIP", "PART", "INC", "CORP", "CO", "LTD", "LTDA"
+}
+
+_NAME_END = ""  # trie key marking the end of a company name
+
+
+class TickerIndex(NamedTuple):
+    """Immutable snapshot of the listed ticker universe"""
+    version: Optional[str]
+    tickers: Dict[str, str]  # ticker -> asset type
+    names: Dict[str, dict]  # token trie of company names, leaves hold ticker sets
+
+
+def normalize(text: str) -> str:
+    """Upper-case text with accents removed, as company names are indexed"""
+    decomposed = unicodedata.normalize("NFKD", text.upper())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    tokens = TOKEN_PATTERN.findall(normalize(name))
+    while tokens and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return tuple(tokens)
+
+
+def build_index(assets: List[Tuple[str, str, str]], version: Optional[str] = None,
+                min_name_length: int = 5) -> TickerIndex:
+    """
+    Index (ticker, name, type) listings: a ticker lookup table plus a
+    token-level trie of company names (names shorter than min_name_length
+    characters are skipped, they collide too often with ordinary words)
+    """
+    tickers: Dict[str, str] = {}
+    names_to_tickers: Dict[Tuple[str, ...], set] = {}
+
+    for ticker, name, asset_type in assets:
+        ticker = ticker.upper()
+        tickers[ticker] = asset_type
+        tokens = name_tokens(name or "")
+        if len("".join(tokens)) >= min_name_length:
+            names_to_tickers.setdefault(tokens, set()).add(ticker)
+
+    trie: Dict[str, dict] = {}
+    for tokens, name_tickers in names_to_tickers.items():
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_NAME_END] = frozenset(name_tickers)
+
+    return TickerIndex(version, tickers, trie)
+
+
+def match_tickers(index: TickerIndex, tokens: List[str]) -> List[str]:
+    """Tokens that are listed tickers"""
+    return [token for token in tokens if token in index.tickers]
+
+
+def match_names(index: TickerIndex, tokens: List[str]) -> FrozenSet[str]:
+    """Tickers of every company name found in the (normalized) token stream"""
+    found = set()
+    trie = index.names
+    for start in range(len(tokens)):
+        node = trie.get(tokens[start])
+        position = start + 1
+        while node is not None:
+            if _NAME_END in node:
+                found.update(node[_NAME_END])
+            if position == len(tokens):
+                break
+            node = node.get(tokens[position])
+            position += 1
+    return frozenset(found)
+
+
+class TickerUniverse:
+    """
+    Active tickers (and company names) listed in asset_data, shared by the
+    extractors of a process. The index is rebuilt only when the asset cache
+    timestamp (cache_metadata.asset_cache_last_update) changes.
+    """
+
+    def __init__(self, min_name_length: int = 5):
+        self.min_name_length = min_name_length
+        self._index = TickerIndex(None, {}, {})
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the index if the asset cache changed, returning whether it did
+        """
+        version = carregar_versao_cache_ativos()
+        with self._lock:
+            if version is not None and version == self._index.version:
+                return False
+
+            index = build_index(carregar_ativos_listados(), version, self.min_name_length)
+            # Readers keep using the previous snapshot until this assignment
+            self._index = index
+            return True
+
+    def __getstate__(self):
+        # Sent to worker processes by TickerExtractor.extract_batch; locks don't pickle
+        return {"min_name_length": self.min_name_length, "_index": self._index}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> TickerIndex:
+        return self._index
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._index.tickers)
+
+    def __len__(self) -> int:
+        return len(self._index.tickers)
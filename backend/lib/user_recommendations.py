@@ -0,0 +1,56 @@
+import heapq
+from typing import Any, Dict, Iterable, List, Sequence
+
+
+def group_by_base(recommendations: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Asset recommendations indexed by base asset
+    """
+    by_base: Dict[str, List[Dict[str, Any]]] = {}
+    for rec in recommendations:
+        by_base.setdefault(rec["base_asset"], []).append(rec)
+    return by_base
+
+
+def rank_for_user(held: Sequence[str], recommendations_by_base: Dict[str, List[Dict[str, Any]]],
+                  limit: int) -> List[Dict[str, Any]]:
+    """
+    Top `limit` assets for a user holding `held`: each candidate scores the sum
+    of the recommendation strengths from every held asset recommending it, and
+    assets already held are never suggested. Entries carry the metrics of the
+    strongest contributing recommendation, in the API's camelCase shape.
+    """
+    held = set(held)
+    candidates: Dict[str, List[Any]] = {}  # asset -> [score, strongest rec, based on]
+
+    for base in held:
+        for rec in recommendations_by_base.get(base, ()):
+            target = rec["recommended_asset"]
+            if target in held:
+                continue
+
+            entry = candidates.get(target)
+            if entry is None:
+                entry = candidates[target] = [0.0, rec, []]
+            entry[0] += rec["recommendation_strength"]
+            entry[2].append(base)
+            if rec["recommendation_strength"] > entry[1]["recommendation_strength"]:
+                entry[1] = rec
+
+    top = heapq.nlargest(limit, candidates.items(), key=lambda item: (item[1][0], item[0]))
+    return [
+        {
+            "recommendedAsset": target,
+            "score": round(score, 6),
+            "basedOn": sorted(based_on),
+            "baseAsset": best["base_asset"],
+            "similarityScore": best["similarity_score"],
+            "support": best["support"],
+            "confidence": best["confidence"],
+            "usersWithBoth": best["users_with_both"],
+            "usersWithBase": best["users_with_base"],
+            "percentageAlsoInvest": best["percentage_also_invest"],
+            "recommendationStrength": best["recommendation_strength"]
+        }
+        for target, (score, best, based_on) in top
+    ]
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the backend packages (lib, agents, abstract) the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# lib/openai builds its client at import time; tests never reach the API
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
@@ -0,0 +1,138 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import lib.brapi
+from lib.brapi import BrapiClient, BrapiError
+
+
+class StubBrapi(ThreadingHTTPServer):
+    """
+    Local HTTP server answering each GET with the next scripted
+    (status, headers, body) and recording the request headers
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.script = []
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        status, headers, body = self.server.script.pop(0)
+        data = json.dumps(body).encode() if body is not None else b""
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    stub = StubBrapi()
+    thread = threading.Thread(target=stub.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(lib.brapi.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def client(server):
+    brapi = BrapiClient("token", base_url=server.url, timeout=5, max_retries=3, retry_delay=1)
+    yield brapi
+    brapi.close()
+
+
+STOCKS = {"stocks": [{"stock": "PETR4"}, {"stock": "VALE3"}]}
+
+
+def test_retries_503_with_exponential_backoff(server, client, sleeps, monkeypatch):
+    # Upper bound of the jitter window, so the delays show the exponential growth
+    monkeypatch.setattr(lib.brapi.random, "uniform", lambda low, high: high)
+    server.script = [(503, {}, None), (503, {}, None), (200, {}, STOCKS)]
+
+    assert client.list_assets("stock") == STOCKS["stocks"]
+    assert sleeps == [1, 2]
+    assert len(server.requests) == 3
+
+
+def test_retries_429_honoring_retry_after(server, client, sleeps):
+    server.script = [(429, {"Retry-After": "7"}, None), (200, {}, STOCKS)]
+
+    assert client.list_assets("stock") == STOCKS["stocks"]
+    assert sleeps == [7.0]
+
+
+def test_backoff_jitter_stays_within_window(client):
+    for attempt in range(4):
+        for _ in range(50):
+            assert 0 <= client._backoff(attempt, None) <= client.retry_delay * 2 ** attempt
+
+
+def test_raises_brapi_error_when_retries_are_exhausted(server, client, sleeps):
+    server.script = [(503, {}, None)] * 4
+
+    with pytest.raises(BrapiError) as excinfo:
+        client.list_assets("stock")
+
+    assert excinfo.value.status_code == 503
+    assert len(server.requests) == 4
+    assert len(sleeps) == 3
+
+
+def test_client_errors_are_not_retried(server, client, sleeps):
+    server.script = [(401, {}, {"error": "unauthorized"})]
+
+    with pytest.raises(BrapiError) as excinfo:
+        client.list_assets("stock")
+
+    assert excinfo.value.status_code == 401
+    assert sleeps == []
+
+
+def test_etag_304_returns_cached_payload(server, client, sleeps):
+    server.script = [
+        (200, {"ETag": '"v1"', "Last-Modified": "Wed, 14 Oct 2026 10:00:00 GMT"}, STOCKS),
+        (304, {"ETag": '"v1"'}, None)
+    ]
+
+    first = client.list_assets("stock")
+    second = client.list_assets("stock")
+
+    assert second == first == STOCKS["stocks"]
+    assert "If-None-Match" not in server.requests[0][1]
+    assert server.requests[1][1]["If-None-Match"] == '"v1"'
+    assert server.requests[1][1]["If-Modified-Since"] == "Wed, 14 Oct 2026 10:00:00 GMT"
+    assert sleeps == []
+
+
+def test_changed_payload_replaces_cached_one(server, client):
+    updated = {"stocks": [{"stock": "PETR4"}]}
+    server.script = [(200, {"ETag": '"v1"'}, STOCKS), (200, {"ETag": '"v2"'}, updated), (304, {}, None)]
+
+    client.list_assets("stock")
+    assert client.list_assets("stock") == updated["stocks"]
+    assert client.list_assets("stock") == updated["stocks"]
+    assert server.requests[2][1]["If-None-Match"] == '"v2"'
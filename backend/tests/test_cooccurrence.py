@@ -0,0 +1,137 @@
+import random
+from collections import Counter
+
+import pytest
+
+from agents.wallet_similarity_agent import WalletSimilarityAgent
+from lib.cooccurrence import (
+    TickerInterner, candidate_probability, changed_tickers, lsh_bands, minhash_cooccurrence,
+    parallel_cooccurrence, python_cooccurrence, sparse_cooccurrence, wallet_delta
+)
+
+
+def _deltas(changes):
+    holder_delta, pair_delta = Counter(), Counter()
+    for old, new in changes:
+        holders, pairs = wallet_delta(old, new)
+        holder_delta.update(holders)
+        pair_delta.update(pairs)
+    return holder_delta, pair_delta
+
+
+def test_wallet_delta_counts_added_and_removed_pairs():
+    holder_delta, pair_delta = wallet_delta(["A", "B"], ["B", "C"])
+
+    assert holder_delta == Counter({"C": 1, "A": -1})
+    assert pair_delta == Counter({("B", "C"): 1, ("A", "B"): -1})
+
+
+def test_changed_tickers_includes_tickers_with_net_zero_holders():
+    # X moves from a wallet holding C to a wallet holding B: its holder count
+    # nets to zero but its pairs with B and C both change
+    holder_delta, pair_delta = _deltas([(["B"], ["B", "X"]), (["C", "X"], ["C"])])
+
+    assert not holder_delta["X"]
+    assert +pair_delta == Counter({("B", "X"): 1})
+    assert -pair_delta == Counter({("C", "X"): 1})
+    assert changed_tickers(holder_delta, pair_delta) == ["B", "C", "X"]
+
+
+def test_changed_tickers_ignores_deltas_that_cancel_out():
+    holder_delta, pair_delta = _deltas([(["A"], ["A", "B"]), (["A", "B"], ["A"])])
+
+    assert changed_tickers(holder_delta, pair_delta) == []
+
+def _random_wallets(count, universe=60, seed=7):
+    rng = random.Random(seed)
+    tickers = [f"T{i:03d}" for i in range(universe)]
+    # Skewed popularity, like real holdings: low-index tickers are much more common
+    weights = [1 / (rank + 1) for rank in range(universe)]
+    return [
+        sorted(set(rng.choices(tickers, weights, k=rng.randint(0, 12))))
+        for _ in range(count)
+    ]
+
+
+EXACT_ENGINES = {
+    "python": python_cooccurrence,
+    "sparse": sparse_cooccurrence,
+    "parallel": lambda wallets, interner=None: parallel_cooccurrence(
+        wallets, interner, workers=2, shard_size=97
+    ),
+}
+
+
+@pytest.mark.parametrize("engine", ["sparse", "parallel"])
+def test_exact_engines_match_python_engine(engine):
+    wallets = _random_wallets(2000)
+    expected = python_cooccurrence(wallets)
+    result = EXACT_ENGINES[engine](wallets)
+
+    assert result.total_wallets == expected.total_wallets
+    assert result.holders == expected.holders
+    assert result.pairs == expected.pairs
+
+
+@pytest.mark.parametrize("engine", ["python", "sparse", "parallel"])
+def test_exact_engines_accept_interned_wallets(engine):
+    wallets = _random_wallets(500, seed=11)
+    interner = TickerInterner()
+    interned = [[interner.intern(ticker) for ticker in tickers] for tickers in wallets]
+
+    assert EXACT_ENGINES[engine](interned, interner).pairs == python_cooccurrence(wallets).pairs
+
+
+def test_exact_engines_produce_identical_rankings():
+    wallets = _random_wallets(3000, seed=3)
+    agent = WalletSimilarityAgent({"min_users_for_recommendation": 3, "min_similarity_threshold": 0.02})
+
+    rankings = {}
+    for name, engine in EXACT_ENGINES.items():
+        recommendations = agent._generate_recommendations(engine(wallets).pairs)
+        rankings[name] = [
+            (rec["base_asset"], rec["recommended_asset"], rec["recommendation_strength"])
+            for rec in recommendations
+        ]
+
+    assert rankings["python"]
+    assert rankings["sparse"] == rankings["python"]
+    assert rankings["parallel"] == rankings["python"]
+
+
+def test_engines_handle_empty_input():
+    for engine in EXACT_ENGINES.values():
+        result = engine([])
+        assert (result.pairs, result.holders, result.total_wallets) == ({}, {}, 0)
+
+
+def _pair_at_similarity(both: int, only_first: int, only_second: int):
+    """Wallets holding A and B with Jaccard both / (both + only_first + only_second)"""
+    return [[0, 1]] * both + [[0]] * only_first + [[1]] * only_second
+
+
+@pytest.mark.parametrize("threshold", [0.05, 0.1, 0.2, 0.3])
+def test_derived_lsh_banding_reaches_the_threshold(threshold):
+    bands = lsh_bands(128, threshold)
+
+    assert candidate_probability(threshold, bands, 128 // bands) >= 0.95
+
+
+def test_minhash_finds_pairs_at_the_threshold():
+    # Jaccard exactly 0.1, the agent's default min_similarity_threshold
+    wallets = _pair_at_similarity(20, 90, 90)
+    interner = TickerInterner()
+    interner.intern("A")
+    interner.intern("B")
+
+    found = sum(
+        ("A", "B") in minhash_cooccurrence(wallets, interner, min_similarity=0.1, seed=seed).pairs
+        for seed in range(100)
+    )
+    assert found >= 90
+
+
+def test_minhash_rejects_banding_that_cannot_reach_the_threshold():
+    # 64 bands of 2 rows find a 0.1 pair with probability ~0.47
+    with pytest.raises(ValueError):
+        minhash_cooccurrence([[0, 1]], num_perm=128, bands=64, min_similarity=0.1)
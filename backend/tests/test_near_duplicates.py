@@ -0,0 +1,76 @@
+import json
+import os
+
+from agents.news_scraper_agent import NewsScraperAgent
+from lib.near_duplicates import NearDuplicateIndex, hamming_distance, simhash, to_signed, to_unsigned
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "near_duplicates.json")
+
+with open(FIXTURES, encoding="utf-8") as f:
+    PAIRS = json.load(f)["pairs"]
+
+
+def _detected(pair, max_distance):
+    index = NearDuplicateIndex(max_distance=max_distance)
+    index.match_or_add("a", simhash(pair["a"]))
+    return index.match(simhash(pair["b"])) is not None
+
+
+def _precision_recall(max_distance):
+    tp = fp = fn = 0
+    for pair in PAIRS:
+        detected = _detected(pair, max_distance)
+        tp += detected and pair["duplicate"]
+        fp += detected and not pair["duplicate"]
+        fn += not detected and pair["duplicate"]
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    return precision, tp / (tp + fn)
+
+
+def test_fixture_articles_are_long_enough_to_fingerprint():
+    assert all(simhash(pair["a"]) is not None and simhash(pair["b"]) is not None for pair in PAIRS)
+
+
+def test_shipped_default_catches_most_rewrites_without_false_positives():
+    max_distance = NewsScraperAgent().config["near_duplicate_max_distance"]
+    assert max_distance == NearDuplicateIndex().max_distance
+
+    precision, recall = _precision_recall(max_distance)
+
+    # Measured on the labelled fixture set: 12 of 14 same-story pairs, no distinct one
+    assert precision == 1.0
+    assert recall >= 12 / 14
+
+
+def test_distinct_stories_stay_well_outside_the_default():
+    max_distance = NearDuplicateIndex().max_distance
+    closest = min(
+        hamming_distance(simhash(pair["a"]), simhash(pair["b"])) for pair in PAIRS if not pair["duplicate"]
+    )
+    assert closest >= max_distance + 8
+
+
+def test_index_agrees_with_brute_force_distance():
+    for pair in PAIRS:
+        distance = hamming_distance(simhash(pair["a"]), simhash(pair["b"]))
+        assert _detected(pair, 12) == (distance <= 12)
+
+
+def test_short_texts_are_not_fingerprinted():
+    assert simhash("Petrobras sobe 2% no pregão") is None
+
+
+def test_signed_round_trip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        assert -(1 << 63) <= to_signed(value) < 1 << 63
+        assert to_unsigned(to_signed(value)) == value
+
+
+def test_removed_article_is_no_longer_matched():
+    fingerprint = simhash(PAIRS[0]["a"])
+    index = NearDuplicateIndex()
+    index.match_or_add("url", fingerprint)
+    index.remove("url")
+
+    assert index.match(fingerprint) is None
+    assert len(index) == 0
@@ -0,0 +1,108 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import lib.llm_cache
+import lib.openai as llm
+
+
+class StubClient:
+    """Stands in for OpenAI(): replays canned responses and records each request"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **request):
+        self.requests.append(request)
+        content = self.responses.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    @property
+    def combined_requests(self):
+        return [r for r in self.requests if r.get("response_format") == {"type": "json_object"}]
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(lib.llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(lib.llm_cache.llm_cache, "path", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(lib.llm_cache.llm_cache, "_conn", None)
+
+
+def _use(monkeypatch, *responses) -> StubClient:
+    stub = StubClient(*responses)
+    monkeypatch.setattr(llm, "client", stub)
+    return stub
+
+
+VALID = json.dumps({
+    "content": "  A Petrobras anunciou dividendos.  ",
+    "summary": "Petrobras paga dividendos.",
+    "category": "acoes",
+    "tickers": ["petr4", " PETR3 "]
+})
+
+FALLBACK = ("conteúdo limpo", "resumo curto", "FII")
+
+
+def test_valid_combined_json_is_used_in_one_call(monkeypatch):
+    stub = _use(monkeypatch, VALID)
+
+    result = llm.enriquecer_noticia_com_ia("Petrobras", "texto original")
+
+    assert result == {
+        "content": "A Petrobras anunciou dividendos.",
+        "summary": "Petrobras paga dividendos.",
+        "category": "ACOES",
+        "tickers": ["PETR4", "PETR3"]
+    }
+    assert len(stub.requests) == 1
+    assert stub.combined_requests == stub.requests
+
+
+def test_invalid_json_falls_back_to_separate_calls(monkeypatch):
+    stub = _use(monkeypatch, "isto não é JSON", *FALLBACK)
+
+    result = llm.enriquecer_noticia_com_ia("Fundo", "texto do fundo")
+
+    assert result == {"content": "conteúdo limpo", "summary": "resumo curto", "category": "FII", "tickers": []}
+    assert len(stub.requests) == 4
+    assert len(stub.combined_requests) == 1
+
+
+@pytest.mark.parametrize("payload", [
+    {"content": "texto", "summary": "resumo", "category": "CRIPTO", "tickers": []},
+    {"content": "texto", "summary": "", "category": "FII", "tickers": []},
+    {"content": "texto", "summary": "resumo", "category": "FII", "tickers": "HGLG11"},
+    ["não", "é", "objeto"],
+])
+def test_schema_violation_falls_back_to_separate_calls(monkeypatch, payload):
+    stub = _use(monkeypatch, json.dumps(payload), *FALLBACK)
+
+    result = llm.enriquecer_noticia_com_ia("Fundo", "texto do fundo")
+
+    assert result["category"] == "FII"
+    assert result["content"] == "conteúdo limpo"
+    assert len(stub.requests) == 4
+
+
+def test_cache_hit_skips_the_client(monkeypatch):
+    stub = _use(monkeypatch, VALID)
+    first = llm.enriquecer_noticia_com_ia("Petrobras", "texto original")
+
+    assert llm.enriquecer_noticia_com_ia("Petrobras", "texto original") == first
+    assert len(stub.requests) == 1
+
+
+def test_fallback_results_are_cached_but_invalid_combined_answers_are_not(monkeypatch):
+    stub = _use(monkeypatch, "{", *FALLBACK)
+    first = llm.enriquecer_noticia_com_ia("Fundo", "texto do fundo")
+
+    # Only the combined call is retried; the three separate results come from the cache
+    stub.responses = ["{"]
+    assert llm.enriquecer_noticia_com_ia("Fundo", "texto do fundo") == first
+    assert len(stub.requests) == 5
+    assert len(stub.combined_requests) == 2
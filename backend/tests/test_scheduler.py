@@ -0,0 +1,170 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from agents.agent_manager import AgentManager
+from agents.base_agent import BaseAgent
+from lib.cron import CronExpression
+
+START = datetime(2026, 3, 2, 12, 0)  # a Monday
+
+
+class FakeClock:
+    """
+    Controlled time source. wait() jumps the clock forward by the requested
+    timeout instead of sleeping; an untimed wait (nothing scheduled) blocks
+    on the real condition so notify() still wakes it.
+    """
+
+    def __init__(self, start: datetime):
+        self.current = start
+        self.waits = []
+
+    def now(self) -> datetime:
+        return self.current
+
+    def advance(self, **delta):
+        self.current += timedelta(**delta)
+
+    def wait(self, condition: threading.Condition, timeout):
+        self.waits.append(timeout)
+        if timeout is None:
+            return condition.wait()
+        self.current += timedelta(seconds=timeout)
+        return False
+
+
+class FakePool:
+    def warm_up(self):
+        pass
+
+    def closeall(self):
+        pass
+
+
+class NoopAgent(BaseAgent):
+    def __init__(self, name="NoopAgent"):
+        super().__init__(name)
+
+    def _execute(self):
+        return {}
+
+
+class BareAgentManager(AgentManager):
+    """AgentManager without the default (database-backed) agents"""
+
+    def _register_default_agents(self):
+        self.register_agent(NoopAgent())
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(START)
+
+
+@pytest.fixture
+def manager(clock):
+    return BareAgentManager(db_pool=FakePool(), clock=clock)
+
+
+def _next_due(manager):
+    manager.running = True
+    try:
+        return manager._wait_for_due_agents()
+    finally:
+        manager.running = False
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    ("*/5 * * * *", datetime(2026, 3, 2, 10, 2, 30), datetime(2026, 3, 2, 10, 5)),
+    ("*/5 * * * *", datetime(2026, 3, 2, 10, 5), datetime(2026, 3, 2, 10, 10)),
+    ("30 3 * * *", datetime(2026, 3, 2, 3, 30), datetime(2026, 3, 3, 3, 30)),
+    ("0 9 * * 1-5", datetime(2026, 3, 6, 9, 0), datetime(2026, 3, 9, 9, 0)),  # Friday -> Monday
+    ("0 0 1 * *", datetime(2026, 12, 15), datetime(2027, 1, 1)),
+    ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+    # Both day fields restricted: the 13th or any Friday
+    ("0 12 13 * 5", datetime(2026, 3, 2, 13, 0), datetime(2026, 3, 6, 12, 0)),
+])
+def test_cron_next_fire(expression, moment, expected):
+    assert CronExpression(expression).next_after(moment) == expected
+
+
+def test_cron_rejects_invalid_expressions():
+    for expression in ("* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *"):
+        with pytest.raises(ValueError):
+            CronExpression(expression)
+
+
+def test_cron_schedule_fires_on_each_matching_minute(manager, clock):
+    clock.advance(minutes=2, seconds=30)
+    manager.schedule_agent("NoopAgent", cron="*/5 * * * *")
+    assert manager.schedules["NoopAgent"]["next_run"] == START + timedelta(minutes=5)
+
+    fired = []
+    for _ in range(3):
+        assert _next_due(manager) == ["NoopAgent"]
+        fired.append(clock.now())
+
+    assert fired == [START + timedelta(minutes=m) for m in (5, 10, 15)]
+
+
+def test_fixed_rate_keeps_to_its_grid_despite_slow_runs(manager, clock):
+    manager.schedule_agent("NoopAgent", interval_hours=1)
+
+    fired = []
+    for _ in range(4):
+        assert _next_due(manager) == ["NoopAgent"]
+        fired.append(clock.now())
+        clock.advance(minutes=7)  # the run takes a while
+
+    assert fired == [START + timedelta(hours=h) for h in range(4)]
+
+
+def test_fixed_rate_coalesces_missed_runs(manager, clock):
+    manager.schedule_agent("NoopAgent", interval_hours=1)
+    assert _next_due(manager) == ["NoopAgent"]
+
+    clock.advance(hours=3, minutes=30)  # e.g. the process was suspended
+    assert _next_due(manager) == ["NoopAgent"]
+    assert manager.schedules["NoopAgent"]["next_run"] == START + timedelta(hours=4)
+
+
+def test_fixed_delay_counts_from_the_end_of_the_run(manager, clock):
+    manager.schedule_agent("NoopAgent", interval_hours=1, mode="fixed_delay")
+
+    assert _next_due(manager) == ["NoopAgent"]
+    assert manager.schedules["NoopAgent"]["next_run"] is None  # waits for the run to finish
+
+    clock.advance(minutes=20)
+    manager._schedule_after_run("NoopAgent")
+    assert manager.schedules["NoopAgent"]["next_run"] == START + timedelta(hours=1, minutes=20)
+
+    assert _next_due(manager) == ["NoopAgent"]
+    assert clock.now() == START + timedelta(hours=1, minutes=20)
+
+
+def test_disabled_schedule_does_not_fire(manager, clock):
+    manager.schedule_agent("NoopAgent", interval_hours=1)
+    manager.register_agent(NoopAgent("OtherAgent"))
+    manager.schedule_agent("OtherAgent", interval_hours=2, start_delay_minutes=30)
+    manager.disable_agent_schedule("NoopAgent")
+
+    assert _next_due(manager) == ["OtherAgent"]
+    assert clock.now() == START + timedelta(minutes=30)
+
+
+def test_stop_wakes_the_sleeping_scheduler_loop(manager, clock):
+    # Nothing scheduled: the loop sleeps without a timeout until notified
+    manager.start_scheduler()
+    deadline = time.monotonic() + 2
+    while None not in clock.waits and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert None in clock.waits
+
+    started = time.monotonic()
+    manager.stop_scheduler()
+
+    assert not manager.scheduler_thread.is_alive()
+    assert time.monotonic() - started < 1
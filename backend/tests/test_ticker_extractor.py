@@ -0,0 +1,33 @@
+from lib.ticker_extractor import TickerExtractor
+from lib.ticker_universe import TickerUniverse, build_index
+
+
+def _universe():
+    universe = TickerUniverse()
+    universe._index = build_index([
+        ("PETR4", "Petróleo Brasileiro", "stock"),
+        ("VALE3", "Vale", "stock"),
+        ("AAPL34", "Apple", "bdr"),
+        ("HGLG11", "CSHG Logística", "fund"),
+    ], "test")
+    return universe
+
+
+def test_dictionary_mode_keeps_listed_tickers_only():
+    extractor = TickerExtractor(_universe())
+
+    assert extractor.extract_tickers("PETR4 sobe, AAPL34 cai e ABCD12 não existe") == ["AAPL34", "PETR4"]
+
+
+def test_batch_in_spawned_workers_matches_inline_extraction():
+    extractor = TickerExtractor(_universe(), match_company_names=True)
+    documents = [
+        (i, f"Notícia {i}", ["PETR4 sobe", "VALE3 cai", "Petróleo Brasileiro e HGLG11", "sem tickers"][i % 4])
+        for i in range(60)
+    ]
+
+    inline = list(extractor.extract_batch(documents))
+    parallel = list(extractor.extract_batch(documents, processes=2, chunk_size=7))
+
+    assert parallel == inline
+    assert inline[2] == (2, ["HGLG11", "PETR4"])
@@ -0,0 +1,98 @@
+from collections import Counter
+from contextlib import contextmanager
+
+import pytest
+
+from agents.wallet_similarity_agent import WalletSimilarityAgent
+from lib.cooccurrence import TickerInterner, changed_tickers, wallet_delta
+from lib.similarity_state import SnapshotWriter
+
+
+class FakeStateStore:
+    def __init__(self, pair_counts):
+        self.pair_counts = pair_counts
+
+    def load_counts(self, cur, tickers):
+        tickers = set(tickers)
+        return {pair: both for pair, both in self.pair_counts.items() if tickers & set(pair)}, {}
+
+
+class FakeCursor:
+    def __init__(self, recommending):
+        self.recommending = recommending  # recommendedAsset -> base assets
+        self.rows = []
+
+    def execute(self, query, params):
+        tickers = params[0]
+        self.rows = [(base,) for ticker in tickers for base in self.recommending.get(ticker, [])]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_affected_base_assets_covers_net_zero_holder_moves():
+    # X moves from a wallet holding C to one holding B (holders of X unchanged)
+    holder_delta, pair_delta = Counter(), Counter()
+    for old, new in [(["B"], ["B", "X"]), (["C", "X"], ["C"])]:
+        holders, pairs = wallet_delta(old, new)
+        holder_delta.update(holders)
+        pair_delta.update(pairs)
+
+    agent = WalletSimilarityAgent()
+    agent.state_store = FakeStateStore({("B", "X"): 3, ("C", "X"): 1, ("D", "X"): 2, ("E", "F"): 4})
+    cur = FakeCursor({"X": ["G"]})
+
+    affected = agent._affected_base_assets(cur, changed_tickers(holder_delta, pair_delta))
+
+    assert affected == ["B", "C", "D", "G", "X"]
+
+
+def test_swap_max_attempts_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        WalletSimilarityAgent({"swap_max_attempts": 0})
+
+
+class FakeNamedCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        pass
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, name=None):
+        return FakeNamedCursor(self.rows)
+
+
+def test_full_run_snapshot_is_written_while_wallets_stream(monkeypatch):
+    rows = [(f"w{n:03d}", ticker) for n in range(10) for ticker in ("PETR4", "VALE3")]
+    pages = []
+    monkeypatch.setattr("lib.similarity_state.execute_values", lambda cur, query, page, page_size: pages.append(list(page)))
+
+    agent = WalletSimilarityAgent()
+    agent._db_connection = contextmanager(lambda: iter([FakeConnection(rows)]))
+    writer = SnapshotWriter(cur=None, page_size=4)
+    wallets = agent._stream_wallet_tickers(TickerInterner(), {"wallets": 0, "assets": 0}, writer)
+
+    for _ in range(5):
+        next(wallets)
+    # Only the current partial page is held, earlier ones are already written
+    assert pages == [[(f"w{n:03d}", ["PETR4", "VALE3"]) for n in range(4)]]
+    assert len(writer.page) == 1
+
+    list(wallets)
+    assert [wallet_id for page in pages for wallet_id, _ in page] == [f"w{n:03d}" for n in range(10)]
+    assert writer.written == 10
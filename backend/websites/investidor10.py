@@ -1,10 +1,5 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-import requests
-from lib.openai import gerar_resumo_com_ia, validar_conteudo_com_ia, capturar_tipo_por_conteudo
-from lib.https import HEADERS
 from abstract.website import Website
-from lib.ticker_extractor import TickerExtractor
 from zoneinfo import ZoneInfo
 import re
 
@@ -13,64 +8,45 @@ class Investidor10(Website):
 
     def __init__(self):
         super().__init__("Investidor10")
-        self.ticker_extractor = TickerExtractor()
 
-    def extract(self):
-        noticias = []
-        res = requests.get(self.BASE_URL, headers=HEADERS)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        artigos = soup.select(".news-container a")
+    def listing_urls(self):
+        return [(self.BASE_URL, None)]
 
-        for artigo in artigos:
+    def parse_listing(self, soup, categoria):
+        artigos = []
+        for artigo in soup.select(".news-container a"):
             try:
-                link = artigo["href"]
-                if not link.startswith("http"):
-                    link = self.BASE_URL + link
-
-                res_content = requests.get(link, headers=HEADERS)
-                soup_content = BeautifulSoup(res_content.text, 'html.parser')
-                article_component = soup_content.select_one(".news-container")
-
-                titulo = article_component.select_one('.title').text.strip()
-                corpo = article_component.select_one('.news-body').text.strip()
-
-                data_str = article_component.select_one(".update-date.desktop").text.strip()
+                artigos.append({
+                    "link": artigo["href"],
+                    "category": categoria
+                })
+            except Exception as e:
+                print(f"[ERRO] {e}")
+        return artigos
 
-                match = re.search(r"(\d{2}/\d{2}/\d{4}) às (\d{2}:\d{2})h", data_str)
+    def parse_article(self, soup, artigo):
+        article_component = soup.select_one(".news-container")
 
-                if match:
-                    data_str = match.group(1) + " " + match.group(2)
-                    dt = datetime.strptime(data_str, "%d/%m/%Y %H:%M")
+        titulo = article_component.select_one('.title').text.strip()
+        corpo = article_component.select_one('.news-body').text.strip()
 
-                    # Add Brazilian timezone
-                    data_pub = dt.replace(tzinfo=ZoneInfo("America/Sao_Paulo"))
+        data_str = article_component.select_one(".update-date.desktop").text.strip()
 
-                imagem_url = article_component.select_one('.news-body img')["src"]
+        match = re.search(r"(\d{2}/\d{2}/\d{4}) às (\d{2}:\d{2})h", data_str)
+        if not match:
+            raise ValueError(f"Data de publicação não reconhecida: {data_str}")
 
-                conteudo_limpo = validar_conteudo_com_ia(titulo, corpo)
-                resumo = gerar_resumo_com_ia(conteudo_limpo)
-                tipo_categoria = capturar_tipo_por_conteudo(conteudo_limpo)
-                
-                # Extract tickers from title and content
-                tickers_from_title = self.ticker_extractor.extract_tickers(titulo)
-                tickers_from_content = self.ticker_extractor.extract_tickers(corpo)
-                all_tickers = list(set(tickers_from_title + tickers_from_content))
+        data_str = match.group(1) + " " + match.group(2)
+        dt = datetime.strptime(data_str, "%d/%m/%Y %H:%M")
 
-                noticias.append({
-                    "title": titulo,
-                    "summary": resumo,
-                    "content": conteudo_limpo,
-                    "imageUrl": imagem_url,
-                    "source": self.nome_fonte,
-                    "sourceUrl": link,
-                    "publishedAt": data_pub.isoformat(),
-                    "category": tipo_categoria.upper().replace(' ', ''),
-                    "tags": [],
-                    "tickers": all_tickers
-                })
+        # Add Brazilian timezone
+        data_pub = dt.replace(tzinfo=ZoneInfo("America/Sao_Paulo"))
 
-                print(f"Adicionado: {titulo} | Tickers: {all_tickers}")
-            except Exception as e:
-                print(f"[ERRO] {e}")
+        imagem_url = article_component.select_one('.news-body img')["src"]
 
-        return noticias
+        return {
+            "title": titulo,
+            "body": corpo,
+            "publishedAt": data_pub,
+            "imageUrl": imagem_url
+        }
@@ -34,8 +34,9 @@ export class NewsDAL {
       }
 
       if (filters?.tickers && filters.tickers.length > 0) {
-        where.tickers = {
-          hasSome: filters.tickers,
+        // Looked up in the news_tickers index table instead of scanning news.tickers
+        where.tickerIndex = {
+          some: { ticker: { in: filters.tickers } },
         };
       }
 
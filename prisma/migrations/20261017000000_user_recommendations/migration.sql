@@ -0,0 +1,9 @@
+-- CreateTable
+CREATE TABLE "user_recommendations" (
+    "userId" TEXT NOT NULL,
+    "assets" TEXT[],
+    "recommendations" JSONB NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "user_recommendations_pkey" PRIMARY KEY ("userId")
+);
@@ -0,0 +1,24 @@
+-- CreateTable
+CREATE TABLE "news_tickers" (
+    "ticker" TEXT NOT NULL,
+    "newsId" TEXT NOT NULL,
+    "publishedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "news_tickers_pkey" PRIMARY KEY ("ticker","newsId")
+);
+
+-- CreateIndex
+CREATE INDEX "news_tickers_ticker_publishedAt_idx" ON "news_tickers"("ticker", "publishedAt" DESC);
+
+-- CreateIndex
+CREATE INDEX "news_tickers_newsId_idx" ON "news_tickers"("newsId");
+
+-- AddForeignKey
+ALTER TABLE "news_tickers" ADD CONSTRAINT "news_tickers_newsId_fkey" FOREIGN KEY ("newsId") REFERENCES "news"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Backfill from the existing news.tickers arrays
+INSERT INTO "news_tickers" ("ticker", "newsId", "publishedAt")
+SELECT DISTINCT t.ticker, n."id", n."publishedAt"
+FROM "news" n
+CROSS JOIN LATERAL unnest(n."tickers") AS t(ticker)
+WHERE t.ticker IS NOT NULL;
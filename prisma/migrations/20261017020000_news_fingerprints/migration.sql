@@ -0,0 +1,15 @@
+-- CreateTable
+CREATE TABLE "news_fingerprints" (
+    "newsId" TEXT NOT NULL,
+    "fingerprint" BIGINT NOT NULL,
+    "publishedAt" TIMESTAMP(3) NOT NULL,
+    "duplicateOf" TEXT,
+
+    CONSTRAINT "news_fingerprints_pkey" PRIMARY KEY ("newsId")
+);
+
+-- CreateIndex
+CREATE INDEX "news_fingerprints_publishedAt_idx" ON "news_fingerprints"("publishedAt");
+
+-- AddForeignKey
+ALTER TABLE "news_fingerprints" ADD CONSTRAINT "news_fingerprints_newsId_fkey" FOREIGN KEY ("newsId") REFERENCES "news"("id") ON DELETE CASCADE ON UPDATE CASCADE;